@@ -0,0 +1,162 @@
+# ---------------------------------------------------------------------------
+# ak_functions.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Helper functions for the AK reburn python scripts that work on plain
+# tables rather than Arc feature classes. Python counterpart of
+# R/ak_functions.R.
+#
+# Tables are held as ordered dicts of column name -> numpy array, which is
+# about as light as a table can get and still be read straight from the
+# csv files in data/.
+# ---------------------------------------------------------------------------
+
+import csv
+import datetime
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ----------------- read_table ----------------------------------------
+
+# Read a csv file into an ordered dict of column arrays. Columns that parse
+# as numbers become float64 (blanks -> NaN); everything else stays a string.
+# Pass 'columns' to keep only some of the columns.
+
+def read_table(path, columns=None):
+    with open(path, 'r') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        if columns is None:
+            columns = header
+        idx = [header.index(name) for name in columns]
+        raw = [[] for _ in idx]
+        for row in reader:
+            if not row:
+                continue
+            for j, i in enumerate(idx):
+                raw[j].append(row[i].strip())
+
+    table = OrderedDict()
+    for name, values in zip(columns, raw):
+        table[name] = _to_array(values)
+    return table
+
+
+def _to_array(values):
+    try:
+        return np.array([float(v) if v != '' else np.nan for v in values])
+    except ValueError:
+        return np.array(values, dtype=object)
+
+
+# ----------------- write_table ---------------------------------------
+
+# Write an ordered dict of column arrays to csv. Whole-number float columns
+# are written without the trailing '.0' so R and Arc read them as integers.
+
+def write_table(path, table, columns=None):
+    if columns is None:
+        columns = list(table.keys())
+    cols = [_format_column(table[name]) for name in columns]
+    with open(path, 'w') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(columns)
+        for row in zip(*cols):
+            writer.writerow(row)
+
+
+def _format_column(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        out = np.datetime_as_string(values, unit='D').astype(object)
+        out[np.isnat(values)] = ''
+        return out
+    if values.dtype.kind == 'f':
+        out = values.astype(object)
+        whole = np.isfinite(values) & (values == np.round(values))
+        out[whole] = values[whole].astype(np.int64)
+        out[np.isnan(values)] = ''
+        return out
+    return values
+
+
+# ----------------- parse_dates ---------------------------------------
+
+# Convert m/d/Y date strings, as exported by Arc ("6/24/2003 0:00:00",
+# "5/27/1990"), or ISO Y-m-d strings, as written by write_table
+# ("2003-06-24"), to datetime64[D]. Blanks become NaT.
+
+def parse_dates(values):
+    out = np.empty(len(values), dtype='datetime64[D]')
+    out[:] = np.datetime64('NaT')
+    cache = {}
+    for i, v in enumerate(values):
+        v = str(v).strip()
+        if not v or v == 'nan':
+            continue
+        day = v.split(' ')[0]
+        if day not in cache:
+            if '-' in day:
+                y, m, d = day.split('-')
+            else:
+                m, d, y = day.split('/')
+            cache[day] = np.datetime64(datetime.date(int(y), int(m), int(d)), 'D')
+        out[i] = cache[day]
+    return out
+
+
+# ----------------- date_year -----------------------------------------
+
+# Calendar year of each datetime64 value (NaT -> NaN)
+
+def date_year(dates):
+    years = dates.astype('datetime64[Y]').astype(np.float64) + 1970
+    years[np.isnat(dates)] = np.nan
+    return years
+
+
+# ----------------- group_starts --------------------------------------
+
+# Given keys that are already sorted, flag the first row of each run of
+# equal keys. Several key arrays may be passed; a new group starts wherever
+# any of them changes.
+
+def group_starts(*keys):
+    n = len(keys[0])
+    starts = np.zeros(n, dtype=bool)
+    if n == 0:
+        return starts
+    starts[0] = True
+    for k in keys:
+        k = np.asarray(k)
+        starts[1:] |= k[1:] != k[:-1]
+    return starts
+
+
+# ----------------- ranges --------------------------------------------
+
+# Concatenation of arange(starts[i], ends[i]) for all i, without a loop
+# (e.g., the rows of many slices of a ragged array at once)
+
+def ranges(starts, ends):
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(ends, dtype=np.int64) - starts
+    total = lengths.sum()
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return np.arange(total) + offsets
+
+
+# ----------------- assign_ecoregion ----------------------------------
+
+# Name of the ecoregion column holding the largest area in each row
+# (R: assignEcoreg). Ties go to the first column listed.
+
+def assign_ecoregion(x, columns=('tundra', 'maritime', 'boreal')):
+    areas = np.column_stack([x[c] for c in columns])
+    return np.array(columns, dtype=object)[np.argmax(areas, axis=1)]
@@ -0,0 +1,181 @@
+# ---------------------------------------------------------------------------
+# assign_burn_order.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# This script assigns burn numbers and fire intervals to the discrete
+# (non-overlapping) fire polygons. It replaces the round trip through
+# process_ak_burn_data.R (getReburnRanks) and back to processed_x.shp that
+# used to be needed before any of the pair scripts could run.
+#
+# Rather than ranking each polyid separately (R: ave(..., FUN = rank) and
+# ave(..., FUN = diff)), the whole table is sorted once by polyid and date.
+# Burn number, prior fire parentid and year interval then all come from
+# comparing each row with the row above it.
+#
+# Input files:
+#
+# 1.  firePerimeters_1940_2016_dates_for_each_burn.csv
+#
+# Attribute table of the points created by
+# convert_perimeters_to_discrete_polygons.py, i.e., the discrete polygons
+# intersected with the original fire perimeters. One row per polygon burn.
+# Needs at least these columns:
+#
+# ptid polyid  acres     date       parentid
+#  ...
+#   3    11   12357.6  11/26/1950    660
+#   4    11   12357.6  4/16/1997     1040
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. processed_x.csv  - one row per polygon burn:
+#
+# ptid polyid  acres  date        year  parentid burn_num reburn prev_parentid year_int
+#   3    11   12357.6 1950-11-26  1950   660       1       0
+#   4    11   12357.6 1997-04-16  1997   1040      2       1      660          47
+#
+# 2. processed_x_pairs<n>.csv - the burn/prior burn pairs for reburn n,
+#    i.e., exactly the rows the pair scripts look for with their second
+#    cursor:
+#
+# polyid acres  older_parentid newer_parentid year_int
+#   11  12357.6     660            1040          47
+#
+# Notes:
+# - Burns within the same season (reburns with year_int = 0) are dropped and
+#   the order recalculated, as in process_ak_burn_data.R
+# - Ties on date are broken by ptid so the ordering is deterministic
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+
+from ak_functions import read_table, write_table, parse_dates, date_year, group_starts
+
+
+burn_columns = ['ptid', 'polyid', 'acres', 'date', 'year', 'parentid',
+                'burn_num', 'reburn', 'prev_parentid', 'year_int']
+pair_columns = ['polyid', 'acres', 'older_parentid', 'newer_parentid', 'year_int']
+
+
+# ----------------- get_burn_order ------------------------------------
+
+# Sort by polyid/date and number the burns of each polyid.
+# Returns the sort order plus burn_num, prev_parentid and year_int, all
+# in sorted order.
+
+def get_burn_order(polyid, dates, parentid, ptid):
+    order = np.lexsort((ptid, dates, polyid))
+    starts = group_starts(polyid[order])
+
+    # Row index of the first burn of each row's polygon
+    first = np.flatnonzero(starts)[np.cumsum(starts) - 1]
+    burn_num = np.arange(len(order)) - first + 1
+
+    # Prior burn is simply the row above, unless this is a first burn
+    sorted_parent = parentid[order].astype(np.float64)
+    prev_parentid = np.empty(len(order))
+    prev_parentid[0:1] = np.nan
+    prev_parentid[1:] = sorted_parent[:-1]
+    prev_parentid[starts] = np.nan
+
+    years = date_year(dates[order])
+    year_int = np.empty(len(order))
+    year_int[0:1] = np.nan
+    year_int[1:] = np.diff(years)
+    year_int[starts] = np.nan
+
+    return order, burn_num, prev_parentid, year_int
+
+
+# ----------------- assign_burn_order ---------------------------------
+
+# Add burn_num, reburn, prev_parentid, year_int (and year) to a table of
+# polygon burns. Polygons smaller than min_acres are dropped, as are
+# within-season reburns when drop_same_season is set.
+
+def assign_burn_order(x, min_acres=0.1, drop_same_season=True):
+    dates = x['date']
+    if dates.dtype.kind != 'M':
+        dates = parse_dates(dates)
+
+    keep = (x['acres'] > min_acres) & ~np.isnat(dates)
+    x = dict((name, col[keep]) for name, col in x.items())
+    dates = dates[keep]
+
+    order, burn_num, prev_parentid, year_int = get_burn_order(
+        x['polyid'], dates, x['parentid'], x['ptid'])
+
+    # Remove within-season burns and redo the order
+    if drop_same_season:
+        same_season = (burn_num > 1) & (year_int == 0)
+        if same_season.any():
+            keep = np.ones(len(dates), dtype=bool)
+            keep[order[same_season]] = False
+            x = dict((name, col[keep]) for name, col in x.items())
+            dates = dates[keep]
+            order, burn_num, prev_parentid, year_int = get_burn_order(
+                x['polyid'], dates, x['parentid'], x['ptid'])
+
+    out = dict((name, col[order]) for name, col in x.items())
+    out['date'] = dates[order]
+    out['year'] = date_year(out['date'])
+    out['burn_num'] = burn_num
+    out['reburn'] = (burn_num > 1).astype(np.int64)
+    out['prev_parentid'] = prev_parentid
+    out['year_int'] = year_int
+    return out
+
+
+# ----------------- get_reburn_pairs ----------------------------------
+
+# Pull the burn/prior burn pairs for a given reburn number out of a table
+# produced by assign_burn_order. Only polygons larger than min_acres are
+# kept, matching the pair scripts' '"acres" > 5' filter.
+
+def get_reburn_pairs(x, reburn_num=2, min_acres=5):
+    sel = (x['burn_num'] == reburn_num) & (x['acres'] > min_acres)
+    pairs = {'polyid': x['polyid'][sel],
+             'acres': x['acres'][sel],
+             'older_parentid': x['prev_parentid'][sel],
+             'newer_parentid': x['parentid'][sel],
+             'year_int': x['year_int'][sel]}
+    return pairs
+
+
+if __name__ == '__main__':
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\data"
+    file_in = "firePerimeters_1940_2016_dates_for_each_burn.csv"
+
+    # Local variables
+    reburn_num = 2  # reburn number of interest (pairs are this and n-1)
+    file_out = "processed_x.csv"
+    pairs_out = "processed_x_pairs" + str(reburn_num) + ".csv"
+    # ********************************************************
+
+    ts0 = time.time()
+
+    x = read_table(os.path.join(path_in, file_in))
+    x = assign_burn_order(x)
+    write_table(os.path.join(path_in, file_out), x,
+                burn_columns + [c for c in x if c not in burn_columns])
+
+    pairs = get_reburn_pairs(x, reburn_num)
+    write_table(os.path.join(path_in, pairs_out), pairs, pair_columns)
+
+    print('Total number of polygon burns ' + str(len(x['polyid'])))
+    print('Total number of reburn pairs ' + str(len(pairs['polyid'])))
+    print('Done! Files written to: ')
+    print(os.path.join(path_in, file_out))
+    print(os.path.join(path_in, pairs_out))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,266 @@
+# ---------------------------------------------------------------------------
+# benchmark_pair_pipeline.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Benchmark of the pair pipeline on synthetic fire perimeters. For each
+# dataset size it generates the fires (synthetic_fires.py), builds the
+# burn order and pair list (assign_burn_order.py), then times each pair
+# stage (pair_geometry.py):
+#
+#   union, classify + union_fast (classify_pairs.py shortcuts),
+#   shared_edge, shared_length, core_area, near
+#
+# For every stage it records wall and CPU time, pairs/s, vertices/s (input
+# vertices of both fires) and peak memory, and writes everything to a JSON
+# file so runs can be compared:
+#
+#   python benchmark_pair_pipeline.py --sizes 1000 10000 --out bench
+#   python benchmark_pair_pipeline.py --sizes 1000 10000 --out bench --compare bench/<earlier>.json
+#
+# Notes:
+# - Pair stages run on at most --max-pairs pairs (a seeded sample) per size,
+#   so large sizes measure per-pair cost at realistic density without
+#   taking hours; generation and the pair plan always use every fire
+# - Peak memory is the resident set size (which includes GEOS) sampled
+#   every 10 ms while the stage runs, and the process high-water mark
+#   (ru_maxrss) when the stage raises it, so short peaks between samples
+#   are not missed. peak_rss_mb is the highest RSS during the stage and
+#   stage_rss_mb how far that is above the RSS when the stage started.
+#   RSS is read from /proc/self/statm, or psutil where that is missing;
+#   without either, both are None
+# -----------------------------------------------------------------------
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+import numpy as np
+import shapely
+
+import pair_geometry
+from classify_pairs import classify_pairs, union_pieces_classified
+from assign_burn_order import assign_burn_order, get_reburn_pairs
+from synthetic_fires import generate_fires, make_point_table
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Stage name -> function(older, newer, params) returning nothing useful;
+# only the time matters here. params['k'] is the pair's position in the
+# sample and params['cls'] the pair classes from the 'classify' stage.
+pair_stages = [('union', lambda o, n, p: pair_geometry.union_pieces(o, n)),
+               ('union_fast', lambda o, n, p: union_pieces_classified(o, n, p['cls'][p['k']])),
+               ('shared_edge', lambda o, n, p: pair_geometry.shared_edge(o, n).length),
+               ('shared_length', lambda o, n, p: pair_geometry.shared_edge_lengths(o, n)),
+               ('core_area', lambda o, n, p: pair_geometry.core_area(o, n, p['buffer_size']).area),
+               ('near', lambda o, n, p: pair_geometry.near_distances(o, n, p['spacing'], p['max_points']))]
+
+
+# ----------------- max_rss_mb ----------------------------------------
+
+# Process high-water mark in MB, or None where unavailable
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on linux, bytes on mac
+    return rss / 1024.0 ** 2 if sys.platform == 'darwin' else rss / 1024.0
+
+
+# Current resident set size in MB, or None where unavailable
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024.0 ** 2
+    except (IOError, OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1024.0 ** 2
+    return None
+
+
+# ----------------- RssSampler ----------------------------------------
+
+# Highest RSS of this process while the block runs, sampled on a thread
+
+class RssSampler(object):
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start = self.peak = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start = self.peak = rss_mb()
+        self._max_before = max_rss_mb()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __exit__(self, *exc):
+        if self.start is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+        # A new process high-water mark was set during the block
+        max_after = max_rss_mb()
+        if max_after is not None and self._max_before is not None and max_after > self._max_before:
+            self.peak = max(self.peak, max_after)
+
+
+# ----------------- measure -------------------------------------------
+
+# Run fn() and return its result plus wall/cpu time and peak memory
+
+def measure(fn):
+    with RssSampler() as rss:
+        t0, c0 = time.perf_counter(), time.process_time()
+        result = fn()
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    stage = rss.peak - rss.start if rss.start is not None else None
+    return result, {'wall_s': wall, 'cpu_s': cpu, 'peak_rss_mb': rss.peak, 'stage_rss_mb': stage}
+
+
+# ----------------- run_size ------------------------------------------
+
+def run_size(n_fires, args):
+    params = {'buffer_size': args.buffer_size, 'spacing': args.spacing, 'max_points': args.max_points}
+    results = []
+
+    fires, m = measure(lambda: generate_fires(n_fires, args.seed, args.vertices))
+    geoms = fires['geometry']
+    n_vertices = int(shapely.get_num_coordinates(geoms).sum())
+    m.update(stage='generate', n_fires=n_fires, items=n_fires, vertices=n_vertices)
+    results.append(m)
+
+    def plan():
+        x = assign_burn_order(make_point_table(fires), min_acres=0)
+        return get_reburn_pairs(x, reburn_num=2, min_acres=5)
+    pairs, m = measure(plan)
+    m.update(stage='pair_plan', n_fires=n_fires, items=len(pairs['polyid']), vertices=n_vertices)
+    results.append(m)
+
+    # Seeded sample of pairs for the geometry stages
+    older = pairs['older_parentid'].astype(np.int64)
+    newer = pairs['newer_parentid'].astype(np.int64)
+    if len(older) > args.max_pairs:
+        pick = np.sort(np.random.default_rng(args.seed).choice(len(older), args.max_pairs, replace=False))
+        older, newer = older[pick], newer[pick]
+    pair_vertices = int(shapely.get_num_coordinates(geoms[older]).sum() +
+                        shapely.get_num_coordinates(geoms[newer]).sum())
+
+    # Pair classes for union_fast, all pairs at once
+    params['cls'], m = measure(lambda: classify_pairs(geoms[older], geoms[newer]))
+    m.update(stage='classify', n_fires=n_fires, items=len(older), vertices=pair_vertices)
+    results.append(m)
+
+    for name, fn in pair_stages:
+        def run():
+            for k, (i, j) in enumerate(zip(older, newer)):
+                params['k'] = k
+                fn(geoms[i], geoms[j], params)
+        _, m = measure(run)
+        m.update(stage=name, n_fires=n_fires, items=len(older), vertices=pair_vertices)
+        results.append(m)
+
+    for m in results:
+        m['items_per_s'] = m['items'] / m['wall_s'] if m['wall_s'] > 0 else None
+        m['vertices_per_s'] = m['vertices'] / m['wall_s'] if m['wall_s'] > 0 else None
+    return results
+
+
+# ----------------- print_results / compare ---------------------------
+
+def print_results(results):
+    print('%-8s %-12s %8s %10s %10s %14s %16s %10s %10s' % ('n_fires', 'stage', 'items', 'wall_s', 'cpu_s',
+                                                           'items/s', 'vertices/s', 'rss_mb', 'stage_mb'))
+    for m in results:
+        print('%-8d %-12s %8d %10.3f %10.3f %14.1f %16.0f %10.1f %10.1f' % (
+            m['n_fires'], m['stage'], m['items'], m['wall_s'], m['cpu_s'],
+            m['items_per_s'] or 0, m['vertices_per_s'] or 0,
+            _mb(m['peak_rss_mb']), _mb(m['stage_rss_mb'])))
+
+
+def _mb(value):
+    return value if value is not None else float('nan')
+
+
+# Throughput ratio (new/old) for every (n_fires, stage) in both runs.
+# Ratios below 1 are slowdowns.
+
+def compare(results, old_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    old_by_key = dict(((m['n_fires'], m['stage']), m) for m in old['results'])
+    print('Compared with ' + old_path)
+    print('%-8s %-12s %12s' % ('n_fires', 'stage', 'new/old'))
+    for m in results:
+        prev = old_by_key.get((m['n_fires'], m['stage']))
+        if prev and prev.get('vertices_per_s') and m.get('vertices_per_s'):
+            print('%-8d %-12s %12.2f' % (m['n_fires'], m['stage'], m['vertices_per_s'] / prev['vertices_per_s']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pair pipeline on synthetic fires')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vertices', type=int, default=64)
+    parser.add_argument('--max-pairs', type=int, default=2000)
+    parser.add_argument('--buffer-size', type=float, default=-500)
+    parser.add_argument('--spacing', type=float, default=500)
+    parser.add_argument('--max-points', type=int, default=None, help='cap on near points per pair')
+    parser.add_argument('--out', default='.', help='directory for the JSON results')
+    parser.add_argument('--compare', help='earlier JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_fires in args.sizes:
+        results.extend(run_size(n_fires, args))
+
+    print_results(results)
+
+    run = {'created': datetime.datetime.now().isoformat(),
+           'python': platform.python_version(),
+           'numpy': np.__version__,
+           'shapely': shapely.__version__,
+           'platform': platform.platform(),
+           'args': vars(args),
+           'results': results}
+
+    if not os.path.exists(args.out):
+        os.makedirs(args.out)
+    out_file = os.path.join(args.out, 'benchmark_' + datetime.datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    with open(out_file, 'w') as f:
+        json.dump(run, f, indent=1)
+    print('Results written to: ' + out_file)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+# ---------------------------------------------------------------------------
+# burn_history.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Per-pixel burn history: every perimeter is burned onto one Alaska Albers
+# grid (30-250 m) in date order, in a single pass, keeping for each cell
+#
+#   count          uint8   number of times burned (0 = never)
+#   first_year     uint16  year of the first burn (0 = never)
+#   last_year      uint16  year of the last burn (0 = never)
+#   min_int        uint8   shortest interval between burns, years (255 = burned < 2 times)
+#   mean_int_x10   uint16  mean interval between burns, tenths of a year (65535 = burned < 2 times)
+#   last_parentid  int32   parentid of the last fire (-1 = never)
+#
+# so "how many times has this cell burned, and when" is an array lookup
+# instead of a polygon overlay. The mean interval is
+# (last_year - first_year) / (count - 1), so no running sum is needed.
+#
+# Input files:
+#
+# 1.  firePerimeters_1940_2016_gt1000ac_notPrescribed.shp
+#
+# ----------------------------------------------------------
+#  Output:  D:\\projects\\ak_fire\\gis\\data\\burn_history_<cell>m\\
+#
+# 1. count.npy, first_year.npy, last_year.npy, min_int.npy, mean_int_x10.npy,
+#    last_parentid.npy, manifest.json (raster_tiles.open_tiles)
+# 2. burn_count.tif, burn_first_year.tif, ... (write_tif = True)
+#
+# Notes:
+# - Cells are in a fire when their center is (raster_grid.polygon_cells)
+# - Burns in the same year count as separate burns with a 0 year interval,
+#   as in the raw AICC perimeters; filter the perimeters first to drop them
+# - Grids too big for memory (statewide at 30 m) are done a tile at a
+#   time with raster_tiles.run_tiles and burn_history_tile; the layers go
+#   to memory-mapped .npy files, and rasters are written only when asked
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+import shapely
+
+from raster_grid import Grid, polygon_cells, write_raster
+from raster_tiles import run_tiles
+
+# Layer name -> (dtype, nodata)
+history_layers = [('count', np.uint8, 0),
+                  ('first_year', np.uint16, 0),
+                  ('last_year', np.uint16, 0),
+                  ('min_int', np.uint8, 255),
+                  ('mean_int_x10', np.uint16, 65535),
+                  ('last_parentid', np.int32, -1)]
+
+
+# ----------------- burn_history --------------------------------------
+
+# Burn history layers (dict of 2d arrays) of a set of fires on a grid.
+# Fires are burned in order of dates (years if no dates), then parentid.
+
+def burn_history(geoms, years, parentids, grid, dates=None):
+    geoms = np.asarray(geoms, dtype=object)
+    years = np.asarray(years).astype(np.int64)
+    parentids = np.asarray(parentids)
+    order = np.lexsort((parentids, years if dates is None else np.asarray(dates)))
+
+    layers = dict((name, np.full(grid.size, nodata, dtype=dtype)) for name, dtype, nodata in history_layers)
+    count, first, last = layers['count'], layers['first_year'], layers['last_year']
+    min_int, last_pid = layers['min_int'], layers['last_parentid']
+
+    # Skip fires that miss the grid entirely
+    b = shapely.bounds(geoms)
+    hits = (b[:, 2] > grid.xmin) & (b[:, 0] < grid.xmax) & (b[:, 3] > grid.ymin) & (b[:, 1] < grid.ymax)
+
+    for k in order[hits[order]]:
+        cells = polygon_cells(geoms[k], grid)
+        if len(cells) == 0:
+            continue
+        year = years[k]
+        burned = count[cells] > 0
+        again = cells[burned]
+        interval = np.minimum(year - last[again].astype(np.int64), 254)
+        min_int[again] = np.minimum(min_int[again], interval)
+        first[cells[~burned]] = year
+        last[cells] = year
+        last_pid[cells] = parentids[k]
+        count[cells] = np.minimum(count[cells].astype(np.int64) + 1, 255)
+
+    repeat = count > 1
+    mean_int = layers['mean_int_x10']
+    mean_int[repeat] = np.round(10.0 * (last[repeat].astype(np.float64) - first[repeat]) / (count[repeat] - 1))
+
+    return dict((name, arr.reshape(grid.shape)) for name, arr in layers.items())
+
+
+# ----------------- burn_history_tile ---------------------------------
+
+# burn_history for one tile of raster_tiles.run_tiles. shared holds the
+# 'geoms', 'years', 'parentids' and (optionally) 'dates' of all fires; only
+# the fires touching the tile are burned.
+
+def burn_history_tile(window, shared):
+    if 'tree' not in shared:
+        shared['tree'] = shapely.STRtree(shared['geoms'])
+    idx = np.sort(shared['tree'].query(shapely.box(*window.bounds)))
+    dates = shared.get('dates')
+    return burn_history(shared['geoms'][idx], shared['years'][idx], shared['parentids'][idx], window,
+                        None if dates is None else dates[idx])
+
+
+# ----------------- cell_history --------------------------------------
+
+# History of the cell containing point (x, y), as a dict of values
+# (None outside the grid)
+
+def cell_history(layers, grid, x, y):
+    r = int(np.floor((grid.ymax - y) / grid.cell))
+    c = int(np.floor((x - grid.xmin) / grid.cell))
+    if not (0 <= r < grid.nrows and 0 <= c < grid.ncols):
+        return None
+    return dict((name, layers[name][r, c].item()) for name, _, _ in history_layers)
+
+
+if __name__ == '__main__':
+
+    from perimeter_io import read_perimeters
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\gis\\data"
+    file_in = "firePerimeters_1940_2016_gt1000ac_notPrescribed.shp"
+
+    # Local variables
+    cell_size = 250   # m; 30-250
+    tile_size = 2048  # cells; peak memory is about 15 bytes x (tile_size ^ 2) per process
+    processes = 4
+    write_tif = True  # also write Arc rasters (whole grid in memory; leave off at 30 m)
+    # ********************************************************
+
+    fc_in = os.path.join(path_in, file_in)
+    path_out = os.path.join(path_in, "burn_history_" + str(cell_size) + "m")
+
+    ts0 = time.time()
+
+    fires = read_perimeters(fc_in, ['parentid', 'FireYear', 'DiscDate'])
+    grid = Grid.from_bounds(shapely.total_bounds(fires['geometry']), cell_size)
+    print('Burning ' + str(len(fires['parentid'])) + ' perimeters onto ' + str(grid))
+
+    shared = {'geoms': fires['geometry'], 'years': fires['FireYear'], 'parentids': fires['parentid'],
+              'dates': np.array(fires['DiscDate'], dtype='datetime64[D]')}
+    layers, _ = run_tiles(burn_history_tile, grid, shared, history_layers, path_out, tile_size,
+                          processes=processes)
+
+    if write_tif:
+        import arcpy
+        sr = arcpy.Describe(fc_in).spatialReference
+        for name, dtype, nodata in history_layers:
+            write_raster(os.path.join(path_out, "burn_" + name + ".tif"), np.asarray(layers[name]), grid, nodata, sr)
+
+    print('Cells burned: ' + str(int(sum((layers['count'][r] > 0).sum() for r in range(grid.nrows)))))
+    print('Done! Files written to: ')
+    print(path_out)
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,162 @@
+# ---------------------------------------------------------------------------
+# classify_pairs.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Sorts burn/reburn pairs by how the two fires relate before any overlay is
+# run. A lot of the pairs in union_polygon_results.csv are complete reburns
+# (the newer fire covers the older one; only 2 union pieces) or only touch,
+# and running a full Union for them is wasted work.
+#
+# Classes:
+#
+#   disjoint      - bounding boxes or geometries don't meet
+#   touching      - boundaries meet, interiors don't overlap
+#   newer_covers  - newer fire covers the older fire (complete reburn)
+#   older_covers  - older fire covers the newer fire
+#   sliver        - (optional) overlap can be no more than sliver_fraction
+#                   of the smaller fire; checked from the bounding boxes
+#   partial       - everything else: a real partial overlap
+#
+# Bounding boxes are checked first for all pairs at once, then prepared
+# geometry predicates for the pairs whose boxes meet. Only 'partial' pairs
+# need the full overlay in pair_geometry.union_pieces; the others get
+# their pieces from union_pieces_classified directly:
+#
+#   disjoint/touching/sliver - each fire whole, no reburn piece
+#   newer_covers             - reburn = older fire; newer-only = newer fire
+#                              with the older fire cut out as a hole
+#   older_covers             - mirror image
+#
+# Notes:
+# - 'sliver' is off unless sliver_fraction is given, since it drops the
+#   (tiny) reburn piece of those pairs
+# - The hole shortcut needs the covered fire properly inside the other
+#   and without holes of its own; otherwise a single difference is run,
+#   still saving two of the three overlays
+# -----------------------------------------------------------------------
+
+import numpy as np
+import shapely
+
+from pair_geometry import union_pieces, shared_edge
+
+DISJOINT = 'disjoint'
+TOUCHING = 'touching'
+NEWER_COVERS = 'newer_covers'
+OLDER_COVERS = 'older_covers'
+SLIVER = 'sliver'
+PARTIAL = 'partial'
+
+
+# ----------------- classify_pairs ------------------------------------
+
+# Class of each (older[i], newer[i]) pair. older and newer are arrays of
+# shapely geometries; they are prepared in place.
+
+def classify_pairs(older, newer, sliver_fraction=None):
+    older = np.asarray(older, dtype=object)
+    newer = np.asarray(newer, dtype=object)
+    cls = np.full(len(older), PARTIAL, dtype=object)
+
+    # Bounding boxes first
+    ob, nb = shapely.bounds(older), shapely.bounds(newer)
+    ix = np.minimum(ob[:, 2], nb[:, 2]) - np.maximum(ob[:, 0], nb[:, 0])
+    iy = np.minimum(ob[:, 3], nb[:, 3]) - np.maximum(ob[:, 1], nb[:, 1])
+    todo = (ix >= 0) & (iy >= 0)
+    cls[~todo] = DISJOINT
+
+    shapely.prepare(older[todo])
+    shapely.prepare(newer[todo])
+
+    idx = np.flatnonzero(todo)
+    meets = shapely.intersects(older[idx], newer[idx])
+    cls[idx[~meets]] = DISJOINT
+    idx = idx[meets]
+
+    touch = shapely.touches(older[idx], newer[idx])
+    cls[idx[touch]] = TOUCHING
+    idx = idx[~touch]
+
+    covers = shapely.covers(newer[idx], older[idx])
+    cls[idx[covers]] = NEWER_COVERS
+    idx = idx[~covers]
+
+    covers = shapely.covers(older[idx], newer[idx])
+    cls[idx[covers]] = OLDER_COVERS
+    idx = idx[~covers]
+
+    # The overlap can't be bigger than the overlap of the bounding boxes
+    if sliver_fraction:
+        smaller = np.minimum(shapely.area(older[idx]), shapely.area(newer[idx]))
+        box_overlap = ix[idx] * iy[idx]
+        cls[idx[box_overlap <= sliver_fraction * smaller]] = SLIVER
+
+    return cls
+
+
+# ----------------- cut_hole ------------------------------------------
+
+# outer minus inner, for inner properly inside outer. Built by adding
+# inner's exterior as a hole rather than by overlay. Returns None when the
+# shortcut doesn't apply.
+
+def cut_hole(outer, inner):
+    if shapely.get_type_id(inner) != 3 or shapely.get_num_interior_rings(inner) > 0:
+        return None
+    if not shapely.contains_properly(outer, inner):
+        return None
+    parts = list(shapely.get_parts(outer))
+    for k, part in enumerate(parts):
+        if shapely.contains_properly(part, inner):
+            holes = [ring.coords for ring in part.interiors] + [inner.exterior.coords]
+            parts[k] = shapely.Polygon(part.exterior.coords, holes)
+            return parts[0] if len(parts) == 1 else shapely.MultiPolygon(parts)
+    return None
+
+
+# ----------------- union_pieces_classified ---------------------------
+
+# Same output as pair_geometry.union_pieces, using the pair class to skip
+# the overlay where possible
+
+def union_pieces_classified(older, newer, cls):
+    if cls in (DISJOINT, TOUCHING, SLIVER):
+        return [('burn', older), ('newer', newer)]
+
+    if cls == NEWER_COVERS:
+        rest = cut_hole(newer, older)
+        if rest is None:
+            rest = newer.difference(older)
+        pieces = [('newer', rest), ('reburn', older)]
+    elif cls == OLDER_COVERS:
+        rest = cut_hole(older, newer)
+        if rest is None:
+            rest = older.difference(newer)
+        pieces = [('burn', rest), ('reburn', newer)]
+    else:
+        return union_pieces(older, newer)
+
+    return [(status, geom) for status, geom in pieces if not geom.is_empty and geom.area > 0]
+
+
+# ----------------- shared_edge_classified ----------------------------
+
+# pair_geometry.shared_edge with the same shortcuts: nothing is shared for
+# disjoint/touching pairs, and all of the older border is inside the newer
+# fire when the newer fire covers it
+
+def shared_edge_classified(older, newer, cls):
+    if cls in (DISJOINT, TOUCHING):
+        return shapely.LineString()
+    if cls == NEWER_COVERS:
+        return shapely.line_merge(older.boundary)
+    return shared_edge(older, newer)
+
+
+# ----------------- count_classes -------------------------------------
+
+def count_classes(cls):
+    names, counts = np.unique(cls.astype(str), return_counts=True)
+    return dict(zip(names, counts.tolist()))
@@ -71,6 +71,7 @@
 # Import arcpy module
 import arcpy, os, time
 from arcpy import env
+from pair_telemetry import PairTelemetry, arc_vertex_count
 
 # Set to overwrite
 arcpy.env.overwriteOutput = True
@@ -86,6 +87,7 @@ buffer_size = -500  #negative for inward buffer
 reburn_num = 2  # reburn number of interest (will look for this and n-1)
 filename_add = "_JUNKTESTiter2"  # tag for filename
 out_shp_name = "reburns_x" + str(reburn_num) + "_core_areas_" + str(abs(buffer_size)) + "mbuffer" + filename_add + ".shp"
+telemetry_name = "reburns_x" + str(reburn_num) + "_core_areas_" + str(abs(buffer_size)) + "mbuffer" + filename_add + "_telemetry.jsonl"
 # ********************************************************
 
 pt_file = "processed_x.shp"
@@ -113,8 +115,9 @@ fcs_list = []
 # Initialize counter
 n_poly = 0
 
-# Start the clock
+# Start the clock; per-stage and per-pair times go to the telemetry log
 ts0 = time.time()
+telemetry = PairTelemetry(os.path.join(ws, telemetry_name))
 
 # Step through all rows in the POINTS layer
 for row in cursor:
@@ -142,26 +145,35 @@ for row in cursor:
                 sql_both_polys = '"parentid" = ' + str(older_parent_id) + ' OR "parentid" = ' + str(newer_parent_id)  # sql to get both newer, older burn polys
                 print '----------------------------------'
                 print 'Processing fire FIDs ' + str(older_parent_id) + ' and ' + str(newer_parent_id)
+                telemetry.start_pair(n_poly, older_parent_id, newer_parent_id)
 
                 # Older fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
 
                 # Newer fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                telemetry.add_vertices(arc_vertex_count("in_memory/older_fc") + arc_vertex_count("in_memory/newer_fc"))
 
             # Intersect older fire and newer fire to get the overlapping sections (reburn)
                 intsct_poly = os.path.join(ws, "reburn_poly" + str(n_poly) + ".shp")
-                arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_fc", "ALL")
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_fc", "ALL")
 
             # Calculate area of reburn within prior fire, beyond buffer zone
                 # Buffer prior fire poly
-                arcpy.Buffer_analysis("in_memory/older_fc", "in_memory/older_buffd", buffer_size, "FULL", "#", "NONE")
+                with telemetry.stage('buffer'):
+                    arcpy.Buffer_analysis("in_memory/older_fc", "in_memory/older_buffd", buffer_size, "FULL", "#", "NONE")
 
                 # Intersect buffered prior fire with reburn poly
                 reburn_buff_poly = os.path.join(ws, "reburn_beyond_buffer" + str(n_poly) + ".shp")
-                arcpy.Intersect_analysis(["in_memory/older_buffd", "in_memory/reburn_fc"], reburn_buff_poly)
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_buffd", "in_memory/reburn_fc"], reburn_buff_poly)
 
                 # Add buffered area shapefile to list
                 fcs_list.append(os.path.join(ws, reburn_buff_poly))
@@ -169,12 +181,14 @@ for row in cursor:
                 # clean up
                 print 'Deleting memory...'
                 arcpy.Delete_management('in_memory')
+                telemetry.end_pair()
 
-    except:
+    except Exception as e:
         print ' ** Could not save polygon ' + str(poly_id)
         ts1 = time.time()
         print 'Time elapsed is: ' + str(ts1 - ts0)
         print arcpy.GetMessages()
+        telemetry.fail_pair(arcpy.GetMessages(2) or e)
         continue
 
 
@@ -209,5 +223,6 @@ print os.path.join(ws, out_shp_name)
 ts1 = time.time()
 print 'Time elapsed: ' + str(ts1 - ts0) + ' seconds'
 
-
-
+telemetry.print_summary()
+telemetry.close()
+print 'Telemetry written to: ' + os.path.join(ws, telemetry_name)
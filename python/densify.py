@@ -0,0 +1,122 @@
+# ---------------------------------------------------------------------------
+# densify.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Points at a fixed spacing along many polylines at once, for the near
+# analysis (GeneratePointsAlongLines 'DISTANCE' did this one pair at a time
+# in Arc). The number of points depends only on line length and spacing,
+# not on how many vertices the perimeters happen to have, so both the
+# work per pair and the distance statistics are comparable across pairs.
+#
+# Lines are given as ragged arrays: all vertices in one (n, 2) array and
+# offsets such that line i is coords[offsets[i]:offsets[i + 1]]. Every
+# line gets a point at its start, then one every 'spacing' m along it.
+#
+#   points, line = densify(coords, offsets, 500)
+#
+# With groups (e.g., the pair each line belongs to) and max_points, the
+# spacing is widened for any group whose lines would get more than
+# max_points points, so no pair costs more than max_points distances.
+#
+# Notes:
+# - numpy only, so the Arc scripts can use it under python 2.7 too
+# - Coordinates are assumed to be projected, in meters
+# -----------------------------------------------------------------------
+
+from __future__ import print_function, division
+
+import numpy as np
+
+
+# ----------------- line_lengths --------------------------------------
+
+# Length of each line, and the length of each segment (segment j runs
+# from coords[j] to coords[j + 1]; segments that cross from one line to the
+# next have length 0)
+
+def line_lengths(coords, offsets):
+    coords = np.asarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    seg = np.hypot(*np.diff(coords, axis=0).T) if len(coords) > 1 else np.zeros(0)
+    # Zero the segment from the last vertex of each (non-empty) line
+    ends = offsets[1:][np.diff(offsets) > 0] - 1
+    seg[ends[ends < len(seg)]] = 0
+    cum = np.concatenate([[0], np.cumsum(seg)])
+    lengths = cum[np.maximum(offsets[1:] - 1, 0)] - cum[np.minimum(offsets[:-1], len(cum) - 1)]
+    return np.where(np.diff(offsets) > 0, lengths, 0), seg
+
+
+# ----------------- line_spacing --------------------------------------
+
+# Spacing for each line: 'spacing', widened for groups of lines that would
+# otherwise get more than max_points points
+
+def line_spacing(lengths, spacing, groups=None, max_points=None):
+    out = np.full(len(lengths), float(spacing))
+    if max_points is None or len(lengths) == 0:
+        return out
+    groups = np.zeros(len(lengths), dtype=np.int64) if groups is None else np.asarray(groups)
+    _, g = np.unique(groups, return_inverse=True)
+    total = np.bincount(g, weights=lengths)
+    n_lines = np.bincount(g)
+    n_points = np.bincount(g, weights=np.floor(lengths / spacing) + 1)
+    # A group of n_lines lines totalling L m gets at most L / s + n_lines points
+    widened = total / np.maximum(max_points - n_lines, 1)
+    group_spacing = np.where(n_points > max_points, np.maximum(widened, spacing), spacing)
+    return group_spacing[g]
+
+
+# ----------------- densify -------------------------------------------
+
+# Points every spacing m along each line, starting at its first vertex.
+# Returns (points (m, 2), index of the line each point is on).
+
+def densify(coords, offsets, spacing, groups=None, max_points=None):
+    coords = np.asarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n_lines = len(offsets) - 1
+    if n_lines == 0 or len(coords) == 0:
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+
+    lengths, seg = line_lengths(coords, offsets)
+    step = line_spacing(lengths, spacing, groups, max_points)
+    n = np.floor(lengths / step).astype(np.int64) + 1
+    n[np.diff(offsets) == 0] = 0
+    line = np.repeat(np.arange(n_lines), n)
+
+    # Distance of each point along its line, then along all the lines
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    along = k * step[line]
+    cum = np.concatenate([[0], np.cumsum(seg)])
+    target = cum[offsets[line]] + along
+
+    # Segment holding each point, kept within the point's own line
+    j = np.searchsorted(cum, target, side='right') - 1
+    j = np.clip(j, offsets[line], np.maximum(offsets[line + 1] - 2, offsets[line]))
+    seg_len = np.append(seg, 0)[j]
+    t = np.where(seg_len > 0, (target - cum[j]) / np.where(seg_len > 0, seg_len, 1), 0)
+    t = np.clip(t, 0, 1)
+    nxt = np.minimum(j + 1, len(coords) - 1)
+    points = coords[j] + t[:, None] * (coords[nxt] - coords[j])
+    return points, line
+
+
+# ----------------- arc_line_coords -----------------------------------
+
+# Ragged (coords, offsets) of every part of every line in an Arc feature
+# class, for densify
+
+def arc_line_coords(fc):
+    import arcpy
+    coords, offsets = [], [0]
+    with arcpy.da.SearchCursor(fc, ["SHAPE@"]) as cursor:
+        for row in cursor:
+            if row[0] is None:
+                continue
+            for part in row[0]:
+                xy = [(p.X, p.Y) for p in part if p is not None]
+                coords.extend(xy)
+                offsets.append(offsets[-1] + len(xy))
+    return np.array(coords, dtype=np.float64).reshape(-1, 2), np.array(offsets, dtype=np.int64)
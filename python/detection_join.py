@@ -0,0 +1,296 @@
+# ---------------------------------------------------------------------------
+# detection_join.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Assigns MODIS/VIIRS active fire detections to the fire perimeters they
+# fall in, in place of the Arc intersect in
+# intersect_frp_data_with_fire_perimeters.py. All detections are tested in
+# one bulk STRtree point-in-polygon query.
+#
+# The Arc intersect writes a detection once per enclosing fire, with all of
+# its class* columns copied each time (mxd14a1_gee_<yyyy>_plus_fires_r.csv).
+# Here the join is kept as two index arrays (detection row, fire row),
+# sorted by detection and then fire id, and written in two forms:
+#
+#   long     one row per detection x fire: detection row and key ('index',
+#            newdate), and the fire's fields; no class columns
+#   compact  one row per detection: all the detection columns as read, plus
+#            n_fires and the sorted list of fire ids ("660;1040")
+#
+# Input files:
+#
+# 1.  mxd14a1_ak_GEE_<yyyy>_processed.csv  (format_gee_file_for_arc_import.R)
+# 2.  firePerimeters_1940_2016_gt1000ac_notPrescribed.shp
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. mxd14a1_gee_<yyyy>_plus_fires_long.csv
+#
+# det_row  index          newdate    parentid  FireName      FireYear  DiscDate
+#    0     2_+14225+2918  2003-06-24   941     Fish Creek    2005      2005-06-16
+#
+# 2. mxd14a1_gee_<yyyy>_plus_fires_compact.csv
+#
+# index ... class11 ... latitude longitude newdate ... n_fires  fire_ids
+#
+# With match_dates = True, a third file attributes each detection to the
+# fire that was burning when it was detected: only fires whose discovery
+# to out date window (+/- date_tolerance days) contains the detection date
+# are candidates. Older fires the detection falls in (e.g., the 1991 fire
+# 1480 under 2003/2005 detections) are kept apart as burn history:
+#
+# 3. mxd14a1_gee_<yyyy>_plus_fires_active.csv
+#
+# index ... newdate ... active_parentid  n_active  n_prior  prior_ids   last_prior_year
+#                          1649             1         1      1480       1991
+#
+# The date test comes first: detections are sorted by date, so each fire's
+# window is one slice of them (two binary searches), and only detections in
+# that slice and in the fire's bounding box get a point-in-polygon test.
+#
+# Notes:
+# - Fires without an out date are taken as burning until the end of their
+#   discovery year
+# - When several fires are active at a detection, the one discovered most
+#   recently before it is the active fire (n_active says how many there were)
+# - Detections come as latitude/longitude (WGS84) and are projected to NAD
+#   1983 Alaska Albers (ak_albers) to match the perimeters; the datum
+#   difference (~1 m) is ignored
+# - Detections on a perimeter boundary count as inside, as with Intersect
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import read_table, write_table, parse_dates
+
+# GRS 1980 ellipsoid
+grs80_a = 6378137.0
+grs80_e2 = 0.00669438002290
+
+
+# ----------------- ak_albers -----------------------------------------
+
+# Project longitude/latitude (degrees) to NAD 1983 Alaska Albers x, y (m);
+# Albers equal-area conic on the ellipsoid (Snyder 1987, eqs. 14-1 to 14-19)
+
+def ak_albers(lon, lat, lon0=-154.0, lat0=50.0, lat1=55.0, lat2=65.0):
+    e = np.sqrt(grs80_e2)
+
+    def q(phi):
+        s = np.sin(phi)
+        return (1 - grs80_e2) * (s / (1 - grs80_e2 * s ** 2) -
+                                 np.log((1 - e * s) / (1 + e * s)) / (2 * e))
+
+    def m(phi):
+        return np.cos(phi) / np.sqrt(1 - grs80_e2 * np.sin(phi) ** 2)
+
+    phi0, phi1, phi2 = np.radians([lat0, lat1, lat2])
+    n = (m(phi1) ** 2 - m(phi2) ** 2) / (q(phi2) - q(phi1))
+    c = m(phi1) ** 2 + n * q(phi1)
+    rho0 = grs80_a * np.sqrt(c - n * q(phi0)) / n
+
+    rho = grs80_a * np.sqrt(c - n * q(np.radians(np.asarray(lat, dtype=np.float64)))) / n
+    theta = n * np.radians(np.asarray(lon, dtype=np.float64) - lon0)
+    return rho * np.sin(theta), rho0 - rho * np.cos(theta)
+
+
+# ----------------- join_detections -----------------------------------
+
+# Detection/fire pairs for points (x, y) inside fire geometries. Returns
+# (det, fire): row numbers into the detections and the fires, sorted by
+# detection and then fire id.
+
+def join_detections(x, y, geoms, fire_ids, tree=None):
+    if tree is None:
+        tree = shapely.STRtree(geoms)
+    det, fire = tree.query(shapely.points(x, y), predicate='intersects')
+    order = np.lexsort((np.asarray(fire_ids)[fire], det))
+    return det[order], fire[order]
+
+
+# ----------------- long_form / compact_form --------------------------
+
+# One row per detection x fire. det_columns from the detections table,
+# fire_columns from the fires table (fires['parentid'] is always included).
+
+def long_form(det, fire, detections, fires, det_columns=('index', 'newdate'),
+              fire_columns=('FireName', 'FireYear', 'DiscDate')):
+    out = {'det_row': det}
+    for name in det_columns:
+        out[name] = np.asarray(detections[name])[det]
+    out['parentid'] = np.asarray(fires['parentid'])[fire]
+    for name in fire_columns:
+        out[name] = np.asarray(fires[name])[fire]
+    return out
+
+
+# One row per detection: the detection columns plus n_fires and the
+# ';'-separated, sorted fire ids
+
+def compact_form(det, fire, detections, fire_ids):
+    n_det = len(next(iter(detections.values())))
+    n_fires = np.bincount(det, minlength=n_det)
+    offsets = np.concatenate([[0], np.cumsum(n_fires)])
+    ids = np.asarray(fire_ids)[fire].astype(np.int64).astype(str)
+    fire_list = np.array([';'.join(ids[offsets[i]:offsets[i + 1]]) for i in range(n_det)], dtype=object)
+
+    out = dict(detections)
+    out['n_fires'] = n_fires.astype(np.float64)
+    out['fire_ids'] = fire_list
+    return out
+
+
+# ----------------- fire_windows --------------------------------------
+
+# Start and end (datetime64[D]) of the window in which each fire can
+# produce detections: discovery date - tolerance to out date + tolerance.
+# Missing out dates become the end of the discovery year.
+
+def fire_windows(disc_dates, out_dates=None, tolerance=1):
+    start = np.asarray(disc_dates, dtype='datetime64[D]')
+    year_end = (start.astype('datetime64[Y]') + 1).astype('datetime64[D]') - 1
+    if out_dates is None:
+        end = year_end
+    else:
+        end = np.asarray(out_dates, dtype='datetime64[D]')
+        end = np.where(np.isnat(end) | (end < start), year_end, end)
+    tol = np.timedelta64(int(tolerance), 'D')
+    return start - tol, end + tol
+
+
+# ----------------- match_active_fires --------------------------------
+
+# Detection/fire pairs where the detection is inside the fire and its date
+# within the fire's window. Returns (det, fire) sorted by detection, then
+# fire start.
+
+def match_active_fires(x, y, dates, geoms, starts, ends):
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    by_date = np.argsort(dates, kind='stable')
+    sorted_dates = dates[by_date]
+    lo = np.searchsorted(sorted_dates, starts, side='left')
+    hi = np.searchsorted(sorted_dates, ends, side='right')
+    bounds = shapely.bounds(geoms)
+
+    det, fire = [], []
+    for k in np.flatnonzero(hi > lo):
+        cand = by_date[lo[k]:hi[k]]
+        xmin, ymin, xmax, ymax = bounds[k]
+        cand = cand[(x[cand] >= xmin) & (x[cand] <= xmax) & (y[cand] >= ymin) & (y[cand] <= ymax)]
+        if len(cand) == 0:
+            continue
+        shapely.prepare(geoms[k])
+        cand = cand[shapely.intersects_xy(geoms[k], x[cand], y[cand])]
+        det.append(cand)
+        fire.append(np.full(len(cand), k))
+    if not det:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    det, fire = np.concatenate(det), np.concatenate(fire)
+    order = np.lexsort((starts[fire], det))
+    return det[order], fire[order]
+
+
+# ----------------- active_form ---------------------------------------
+
+# One row per detection: the detection columns plus the active fire and
+# the prior burn history. (act_det, act_fire) come from
+# match_active_fires, (det, fire) from join_detections (all fires the
+# detection is inside); years are the fires' years.
+
+def active_form(act_det, act_fire, det, fire, detections, fire_ids, fire_starts, years):
+    fire_ids = np.asarray(fire_ids).astype(np.int64)
+    dates = np.asarray(detections['newdate'], dtype='datetime64[D]')
+    n_det = len(dates)
+
+    # Active fire: the last one started (pairs are sorted by start)
+    n_active = np.bincount(act_det, minlength=n_det)
+    last = np.flatnonzero(np.r_[act_det[1:] != act_det[:-1], True]) if len(act_det) else act_det
+    active = np.full(n_det, np.nan)
+    active[act_det[last]] = fire_ids[act_fire[last]]
+
+    # Prior burns: fires the detection is in that started before it and
+    # aren't active at it, oldest first
+    is_active = np.zeros(len(det), dtype=bool)
+    if len(act_det):
+        act_key = act_det * len(fire_ids) + act_fire
+        is_active = np.isin(det * len(fire_ids) + fire, act_key)
+    prior = ~is_active & (fire_starts[fire] < dates[det])
+    p_det, p_fire = det[prior], fire[prior]
+    order = np.lexsort((fire_starts[p_fire], p_det))
+    p_det, p_fire = p_det[order], p_fire[order]
+
+    n_prior = np.bincount(p_det, minlength=n_det)
+    offsets = np.concatenate([[0], np.cumsum(n_prior)])
+    ids = fire_ids[p_fire].astype(str)
+    prior_ids = np.array([';'.join(ids[offsets[i]:offsets[i + 1]]) for i in range(n_det)], dtype=object)
+    last_prior_year = np.full(n_det, np.nan)
+    has = n_prior > 0
+    last_prior_year[has] = np.asarray(years, dtype=np.float64)[p_fire[offsets[1:][has] - 1]]
+
+    out = dict(detections)
+    out['active_parentid'] = active
+    out['n_active'] = n_active.astype(np.float64)
+    out['n_prior'] = n_prior.astype(np.float64)
+    out['prior_ids'] = prior_ids
+    out['last_prior_year'] = last_prior_year
+    return out
+
+
+if __name__ == '__main__':
+
+    from perimeter_io import read_perimeters
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_frp = "D:\\projects\\ak_fire\\data\\tables\\gee_output"
+    path_fires = "D:\\projects\\ak_fire\\gis\\data"
+    file_fires = "firePerimeters_1940_2016_gt1000ac_notPrescribed.shp"
+    path_out = "D:\\projects\\ak_fire\\data"
+
+    # Local variables
+    years = range(2002, 2017)
+    match_dates = True   # also write the active fire/prior burn table
+    date_tolerance = 1   # days either side of the discovery-out window
+    # ********************************************************
+
+    ts0 = time.time()
+
+    fires = read_perimeters(os.path.join(path_fires, file_fires),
+                            ['parentid', 'FireName', 'FireYear', 'DiscDate', 'OutDate'])
+    fires['DiscDate'] = np.array(fires['DiscDate'], dtype='datetime64[D]')
+    fires['OutDate'] = np.array(fires['OutDate'], dtype='datetime64[D]')
+    starts, ends = fire_windows(fires['DiscDate'], fires['OutDate'], date_tolerance)
+    tree = shapely.STRtree(fires['geometry'])
+
+    for year in years:
+        file_in = os.path.join(path_frp, "mxd14a1_ak_GEE_" + str(year) + "_processed.csv")
+        if not os.path.exists(file_in):
+            continue
+        x = read_table(file_in)
+        x['newdate'] = parse_dates(x['newdate'])
+        px, py = ak_albers(x['longitude'], x['latitude'])
+        det, fire = join_detections(px, py, fires['geometry'], fires['parentid'], tree)
+
+        name_out = "mxd14a1_gee_" + str(year) + "_plus_fires"
+        write_table(os.path.join(path_out, name_out + "_long.csv"), long_form(det, fire, x, fires))
+        write_table(os.path.join(path_out, name_out + "_compact.csv"), compact_form(det, fire, x, fires['parentid']))
+        if match_dates:
+            act_det, act_fire = match_active_fires(px, py, x['newdate'], fires['geometry'], starts, ends)
+            write_table(os.path.join(path_out, name_out + "_active.csv"),
+                        active_form(act_det, act_fire, det, fire, x, fires['parentid'], fires['DiscDate'],
+                                    fires['FireYear']))
+        print(str(year) + ': ' + str(len(x['index'])) + ' detections, ' + str(len(det)) + ' detection/fire pairs')
+
+    print('Done! Files written to: ')
+    print(path_out)
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,176 @@
+# ---------------------------------------------------------------------------
+# distance_summary.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Per-pair summaries of penetration distance (NEAR_DIST) for the near
+# analysis scripts, built up one distance at a time so the sample points
+# never have to be kept: count, mean, max, a few quantiles and a
+# fixed-bin histogram. This is what R/distance_of_burn_intrusion.R reduces
+# the merged point shapefile (millions of points) to anyway.
+#
+# Quantiles are estimated with the P-square algorithm (Jain & Chlamtac
+# 1985, Communications of the ACM 28:1076-1085), which keeps five markers
+# per probability and no sample values. For pairs with five points or fewer
+# the exact (R type 7) quantile is given.
+#
+# Usage (see near_analysis_distance_to_fire_perimeter_POLYLINE.py):
+#
+#   table = SummaryTable(os.path.join(ws, "near_summary.csv"), probs=(0.5, 0.9), bin_width=100, n_bins=50)
+#   ...
+#   summary = table.summary()
+#   for row in arcpy.da.SearchCursor(pts, ['NEAR_DIST']):
+#       summary.add(row[0])
+#   table.write(older_parent_id, newer_parent_id, summary)
+#   ...
+#   table.close()
+#
+# ----------------------------------------------------------
+#  Output: one row per pair
+#
+# parentid1 parentid2 n_pts mean_dist max_dist q50_dist q90_dist bin_0 bin_100 ... bin_4900
+#       2       877   412   803.2     3328.9   611.0    1790.4    37    41          3
+#
+# bin_<d> counts distances in [d, d + bin_width); the last bin also holds
+# everything beyond it.
+#
+# Notes:
+# - Pure python with no dependencies so it runs under ArcMap's python 2.7
+#   as well as python 3
+# -----------------------------------------------------------------------
+
+from __future__ import print_function, division
+
+import csv
+
+
+# ----------------- P2Quantile ----------------------------------------
+
+# Streaming estimate of the p quantile (0 < p < 1)
+
+class P2Quantile(object):
+
+    def __init__(self, p):
+        self.p = p
+        self.q = []  # marker heights (the first five values until there are five)
+        self.n = [0, 1, 2, 3, 4]  # marker positions
+        self.want = [0, 2 * p, 4 * p, 2 + 2 * p, 4]  # desired positions
+        self.step = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q, n = self.q, self.n
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Cell of x, stretching the end markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.want[i] += self.step[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.want[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                h = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = h
+                n[i] += d
+
+    def value(self):
+        q = self.q
+        if not q:
+            return None
+        if len(q) < 5 or self.n[4] == 4:
+            # Exact, R type 7
+            pos = (len(q) - 1) * self.p
+            lo = int(pos)
+            hi = min(lo + 1, len(q) - 1)
+            return q[lo] + (pos - lo) * (q[hi] - q[lo])
+        return q[2]
+
+
+# ----------------- DistanceSummary -----------------------------------
+
+# Count, mean, max, quantiles and histogram of a stream of distances
+
+class DistanceSummary(object):
+
+    def __init__(self, probs=(0.5, 0.9), bin_width=100, n_bins=50):
+        self.quantiles = [P2Quantile(p) for p in probs]
+        self.bin_width = bin_width
+        self.bins = [0] * n_bins
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, x):
+        if x is None:
+            return
+        self.count += 1
+        self.total += x
+        if self.max is None or x > self.max:
+            self.max = x
+        for q in self.quantiles:
+            q.add(x)
+        self.bins[min(max(int(x // self.bin_width), 0), len(self.bins) - 1)] += 1
+
+    def extend(self, values):
+        for x in values:
+            self.add(x)
+
+    # Values in the order of summary_columns
+    def row(self):
+        mean = self.total / self.count if self.count else None
+        return [self.count, mean, self.max] + [q.value() for q in self.quantiles] + self.bins
+
+
+# Column names of DistanceSummary.row()
+
+def summary_columns(probs=(0.5, 0.9), bin_width=100, n_bins=50):
+    return (['n_pts', 'mean_dist', 'max_dist'] +
+            ['q' + ('%g' % (100 * p)).replace('.', '_') + '_dist' for p in probs] +
+            ['bin_' + ('%g' % (i * bin_width)) for i in range(n_bins)])
+
+
+# ----------------- SummaryTable --------------------------------------
+
+# csv of one DistanceSummary row per pair, written as pairs finish
+
+class SummaryTable(object):
+
+    def __init__(self, path, probs=(0.5, 0.9), bin_width=100, n_bins=50):
+        self.path = path
+        self.probs = probs
+        self.bin_width = bin_width
+        self.n_bins = n_bins
+        self._file = open(path, 'w')
+        self._csv = csv.writer(self._file, lineterminator='\n')
+        self._csv.writerow(['parentid1', 'parentid2'] + summary_columns(probs, bin_width, n_bins))
+
+    def summary(self):
+        return DistanceSummary(self.probs, self.bin_width, self.n_bins)
+
+    def write(self, parentid1, parentid2, summary):
+        self._csv.writerow([parentid1, parentid2] + ['' if v is None else v for v in summary.row()])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
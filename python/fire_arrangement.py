@@ -0,0 +1,302 @@
+# ---------------------------------------------------------------------------
+# fire_arrangement.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# One planar overlay of all the fire perimeters, in place of a separate
+# Union_analysis per pair in union_fire_pairs.py. The boundaries of all
+# fires are noded together once and polygonized into faces
+# (partitioned_reburns.discrete_polygons, or its partitioned version for
+# very large databases). Each face carries the sorted list of fires that
+# cover it, so for any pair of fires
+#
+#   reburn     = faces covered by both
+#   older only = faces covered by the older fire and not the newer
+#   newer only = faces covered by the newer fire and not the older
+#
+# and for any set of fires (an N-fire reburn history), the area burned by
+# all of them is the faces covered by all of them. Areas are sums of face
+# areas, looked up from tables built once:
+#
+#   fire_area      area of each fire (sum over its faces)
+#   pair overlaps  area shared by every pair of fires that overlap,
+#                  sorted by pair key for binary search
+#
+# so the union areas of every reburn pair come from one vectorized lookup.
+# Geometries of the pieces, when needed, are unions of their faces.
+#
+#   arr = FireArrangement.build(fires['geometry'], fires['parentid'])
+#   older_ac, newer_ac, reburn_ac = arr.pair_areas(pairs['older_parentid'], pairs['newer_parentid'])
+#   pieces = arr.pieces(660, 1040)       # [('burn', geom), ('newer', geom), ('reburn', geom)]
+#   area = arr.area_burned_by([660, 1040, 1655])
+#
+# Input files:
+#
+# 1.  firePerimeters_1940_2016_gt1000ac_notPrescribed.shp
+# 2.  processed_x_pairs2.csv  (assign_burn_order.py)
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. union_polygon_results.csv - 2-3 rows per pair, as from union_fire_pairs.py
+#    (read by shape_indices.read_union_pieces):
+#
+# FID parentid FireYear parentid_1 FireYear_1 pairid  ac        perim_m
+#  0    660     1950       0           0       1    21450.54  72242.81   <- older fire only
+#  1    0         0      1040        1997      1     2495.20  29787.90   <- newer fire only
+#  2    660     1950      1040        1997      1    12357.66  39645.59   <- reburn
+#
+# Notes:
+# - Geometries are assumed to be in a projected coordinate system in meters
+# - Piece perimeters are face perimeters less the edges shared between
+#   faces of the same piece (face adjacency is built once), so no piece
+#   geometry is built for them either
+# -----------------------------------------------------------------------
+
+import os
+import time
+from itertools import combinations
+
+import numpy as np
+import shapely
+
+from ak_functions import ranges
+from partitioned_reburns import discrete_polygons, partitioned_discrete_polygons, polygonal
+
+# Square meters to acres
+sqm2ac = 0.000247105
+
+union_columns = ['FID', 'parentid', 'FireYear', 'parentid_1', 'FireYear_1', 'pairid', 'ac', 'perim_m']
+
+
+# ----------------- FireArrangement -----------------------------------
+
+class FireArrangement(object):
+
+    # faces: face geometries; the fires covering face i are
+    # fires[offsets[i]:offsets[i + 1]] (positions in ids, ascending)
+    def __init__(self, faces, offsets, fires, ids):
+        self.faces = np.asarray(faces, dtype=object)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.fires = np.asarray(fires, dtype=np.int64)
+        self.ids = np.asarray(ids)
+        self.face_area = shapely.area(self.faces)
+
+        # Face of each (face, fire) row, and the faces of each fire (CSR)
+        self.row_face = np.repeat(np.arange(len(self.faces)), np.diff(self.offsets))
+        order = np.argsort(self.fires, kind='stable')
+        self.fire_faces = self.row_face[order]
+        self.fire_offsets = np.concatenate([[0], np.cumsum(np.bincount(self.fires, minlength=len(self.ids)))])
+        self.fire_area = np.bincount(self.fires, weights=self.face_area[self.row_face], minlength=len(self.ids))
+
+        # Positions of ids, for lookups by parentid
+        self._id_order = np.argsort(self.ids, kind='stable')
+        self._pair_keys = None
+        self._pair_area = None
+        self._adjacent = None
+
+    # Overlay of the fires; with partitions, partitioned and run on a pool
+    # (partitioned_reburns.py)
+    @classmethod
+    def build(cls, geoms, ids, partitions=None, processes=None):
+        # make_valid can give a collection of a polygon and lines (e.g., a
+        # perimeter with a spike); only its polygons are part of the fire
+        geoms = polygonal(shapely.make_valid(np.asarray(geoms, dtype=object)))
+        if partitions is None:
+            faces, offsets, fires = discrete_polygons(geoms)
+        else:
+            faces, offsets, fires = partitioned_discrete_polygons(geoms, partitions, processes)
+        return cls(faces, offsets, fires, ids)
+
+    def save(self, path):
+        np.savez(path, faces=shapely.to_wkb(self.faces), offsets=self.offsets, fires=self.fires, ids=self.ids)
+
+    @classmethod
+    def load(cls, path):
+        d = np.load(path, allow_pickle=True)
+        return cls(shapely.from_wkb(d['faces']), d['offsets'], d['fires'], d['ids'])
+
+    # Positions of parentids (KeyError if any are missing)
+    def index_of(self, parentids):
+        parentids = np.asarray(parentids)
+        pos = np.searchsorted(self.ids[self._id_order], parentids)
+        pos = np.minimum(pos, len(self.ids) - 1)
+        idx = self._id_order[pos]
+        if not np.all(self.ids[idx] == parentids):
+            raise KeyError('parentid not in arrangement: ' + str(parentids))
+        return idx
+
+    # Faces covered by a fire
+    def faces_of(self, parentid):
+        k = int(self.index_of(parentid))
+        return self.fire_faces[self.fire_offsets[k]:self.fire_offsets[k + 1]]
+
+    # Faces covered by every one of the given fires
+    def faces_burned_by(self, parentids):
+        faces = None
+        for parentid in parentids:
+            f = self.faces_of(parentid)
+            faces = f if faces is None else np.intersect1d(faces, f, assume_unique=True)
+        return faces
+
+    # Area (m2) burned by every one of the given fires
+    def area_burned_by(self, parentids):
+        return float(self.face_area[self.faces_burned_by(parentids)].sum())
+
+    # Number of fires covering each face
+    def burn_counts(self):
+        return np.diff(self.offsets)
+
+    # ----------------- pair lookups ----------------------------------
+
+    # Area shared by every pair of fires that overlap: sorted keys
+    # (a * n + b, a < b) and areas. Each face covered by k fires adds its
+    # area to its k (k - 1) / 2 pairs.
+    def _build_pairs(self):
+        n = len(self.ids)
+        counts = self.burn_counts()
+        keys, areas = [np.empty(0, dtype=np.int64)], [np.empty(0)]
+        for k in np.unique(counts[counts > 1]):
+            f = np.flatnonzero(counts == k)
+            fires = self.fires[self.offsets[f][:, None] + np.arange(k)[None, :]]
+            for i, j in combinations(range(k), 2):
+                keys.append(fires[:, i] * n + fires[:, j])
+                areas.append(self.face_area[f])
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        self._pair_keys = keys
+        self._pair_area = np.bincount(inverse, weights=np.concatenate(areas), minlength=len(keys))
+
+    # Area (m2) shared by fires a and b (arrays of parentids)
+    def overlap_area(self, a, b):
+        if self._pair_keys is None:
+            self._build_pairs()
+        a, b = self.index_of(a), self.index_of(b)
+        key = np.minimum(a, b) * len(self.ids) + np.maximum(a, b)
+        pos = np.minimum(np.searchsorted(self._pair_keys, key), max(len(self._pair_keys) - 1, 0))
+        if len(self._pair_keys) == 0:
+            return np.zeros(len(np.atleast_1d(key)))
+        return np.where(self._pair_keys[pos] == key, self._pair_area[pos], 0.0)
+
+    # Union areas (acres) of pairs of fires: older only, newer only, reburn
+    def pair_areas(self, older, newer):
+        both = self.overlap_area(older, newer)
+        older_only = self.fire_area[self.index_of(older)] - both
+        newer_only = self.fire_area[self.index_of(newer)] - both
+        return np.maximum(older_only, 0) * sqm2ac, np.maximum(newer_only, 0) * sqm2ac, both * sqm2ac
+
+    # Faces sharing an edge with each face (CSR over faces: adj_face and
+    # the shared edge length adj_len), and the perimeter of each face
+    def _build_adjacency(self):
+        i, j = shapely.STRtree(self.faces).query(self.faces, predicate='intersects')
+        keep = i < j
+        i, j = i[keep], j[keep]
+        length = shapely.length(shapely.intersection(shapely.boundary(self.faces[i]),
+                                                     shapely.boundary(self.faces[j])))
+        i, j, length = np.concatenate([i, j]), np.concatenate([j, i]), np.concatenate([length, length])
+        order = np.argsort(i, kind='stable')
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(i, minlength=len(self.faces)))])
+        self._adjacent = (indptr, j[order], length[order])
+        self.face_perim = shapely.length(self.faces)
+
+    # Perimeters (m) of the union pieces of one pair: older only, newer
+    # only, reburn. The perimeter of a set of faces is the sum of their
+    # perimeters less twice the edges shared within the set.
+    def piece_perimeters(self, older, newer):
+        if self._adjacent is None:
+            self._build_adjacency()
+        indptr, adj_face, adj_len = self._adjacent
+        a, b = self.faces_of(older), self.faces_of(newer)
+        faces = np.union1d(a, b)
+        code = np.isin(faces, a) + 2 * np.isin(faces, b)  # 1 older only, 2 newer only, 3 both
+
+        counts = indptr[faces + 1] - indptr[faces]
+        edge = ranges(indptr[faces], indptr[faces + 1])
+        f_code = np.repeat(code, counts)
+        g = adj_face[edge]
+        pos = np.minimum(np.searchsorted(faces, g), len(faces) - 1)
+        inner = (faces[pos] == g) & (code[pos] == f_code)
+        # Each inner edge is seen from both of its faces
+        shared = np.bincount(f_code[inner], weights=adj_len[edge][inner], minlength=4)
+        total = np.bincount(code, weights=self.face_perim[faces], minlength=4)
+        perim = total - shared
+        return perim[1], perim[2], perim[3]
+
+    # Union pieces of one pair, like pair_geometry.union_pieces: list of
+    # (status, geometry) for the non-empty pieces
+    def pieces(self, older, newer):
+        a, b = self.faces_of(older), self.faces_of(newer)
+        pieces = [('burn', np.setdiff1d(a, b, assume_unique=True)),
+                  ('newer', np.setdiff1d(b, a, assume_unique=True)),
+                  ('reburn', np.intersect1d(a, b, assume_unique=True))]
+        return [(status, shapely.union_all(self.faces[f])) for status, f in pieces if len(f)]
+
+
+# ----------------- union_table ---------------------------------------
+
+# The union_fire_pairs.py output for pairs of fires (union_columns). years
+# is the fire year of each fire, in the order of arr.ids.
+
+def union_table(arr, older, newer, years, with_perimeter=True):
+    older, newer = np.asarray(older), np.asarray(newer)
+    areas = arr.pair_areas(older, newer)
+    oy, ny = years[arr.index_of(older)], years[arr.index_of(newer)]
+    zero = np.zeros(len(older), dtype=oy.dtype)
+    zero_id = np.zeros(len(older), dtype=older.dtype)
+
+    # Rows: older only, newer only, reburn for each pair; empty pieces dropped
+    parts = [(older, oy, zero_id, zero, areas[0]),
+             (zero_id, zero, newer, ny, areas[1]),
+             (older, oy, newer, ny, areas[2])]
+    pairid = np.tile(np.arange(1, len(older) + 1), 3)
+    cols = [np.concatenate([p[i] for p in parts]) for i in range(5)]
+    order = np.lexsort((np.repeat(np.arange(3), len(older)), pairid))
+    keep = order[cols[4][order] > 1e-6]  # drop empty pieces (and rounding residue)
+
+    table = {'FID': np.arange(len(keep)),
+             'parentid': cols[0][keep], 'FireYear': cols[1][keep],
+             'parentid_1': cols[2][keep], 'FireYear_1': cols[3][keep],
+             'pairid': pairid[keep], 'ac': cols[4][keep]}
+    if with_perimeter:
+        perims = np.array([arr.piece_perimeters(o, n) for o, n in zip(older, newer)]).reshape(-1, 3)
+        table['perim_m'] = perims.T.ravel()[keep]
+    return table
+
+
+if __name__ == '__main__':
+
+    from ak_functions import read_table, write_table
+    from perimeter_io import read_perimeters
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\gis\\data"
+    file_in = "firePerimeters_1940_2016_gt1000ac_notPrescribed.shp"
+    pairs_in = "D:\\projects\\ak_fire\\data\\processed_x_pairs2.csv"  # assign_burn_order.py
+    path_out = "D:\\projects\\ak_fire\\data"
+    file_out = "union_polygon_results.csv"
+    arrangement_out = "fire_arrangement.npz"
+
+    # Local variables
+    with_perimeter = True
+    # ********************************************************
+
+    ts0 = time.time()
+
+    fires = read_perimeters(os.path.join(path_in, file_in), ['parentid', 'FireYear'])
+    arr = FireArrangement.build(fires['geometry'], fires['parentid'])
+    arr.save(os.path.join(path_out, arrangement_out))
+    print('Overlay: ' + str(len(arr.faces)) + ' faces, ' + str(int((arr.burn_counts() > 1).sum())) + ' reburned')
+
+    pairs = read_table(pairs_in)
+    table = union_table(arr, pairs['older_parentid'].astype(np.int64), pairs['newer_parentid'].astype(np.int64),
+                        fires['FireYear'], with_perimeter)
+    write_table(os.path.join(path_out, file_out), table, [c for c in union_columns if c in table])
+
+    print('Pairs: ' + str(len(pairs['polyid'])) + ', union polygons: ' + str(len(table['FID'])))
+    print('Done! Files written to: ')
+    print(os.path.join(path_out, file_out))
+    print(os.path.join(path_out, arrangement_out))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
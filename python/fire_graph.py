@@ -0,0 +1,248 @@
+# ---------------------------------------------------------------------------
+# fire_graph.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Graph of which fires overlap or border which, built once from all
+# perimeters with a single STRtree spatial join and saved to disk. Fires
+# are nodes; every pair of fires whose perimeters intersect is an edge,
+# oriented from the older fire to the newer one (by date, then parentid).
+# Each edge carries:
+#
+#   overlap_ac        area burned by both fires (0 for fires that only border)
+#   older_in_newer_m  older fire border inside the newer fire (as in
+#                     shared_edges_TABLE.py)
+#   newer_in_older_m  newer fire border inside the older fire
+#   year_gap          newer fire year - older fire year
+#
+# Unlike the processed_x pairs, which only link consecutive burn_num at a
+# polyid, this has every overlap and every shared border, so reburn
+# chains, the pair lists for the pair scripts and border-stopping
+# questions all come out of the graph without more geometry work:
+#
+#   g = FireGraph.build(fires['parentid'], fires['geometry'], fires['date'])
+#   g.save("D:\\projects\\ak_fire\\data\\fire_graph.npz")
+#   g = FireGraph.load("D:\\projects\\ak_fire\\data\\fire_graph.npz")
+#   g.neighbors(660)                # fires overlapping/bordering 660
+#   g.k_hop(660, 2)                 # within 2 steps, with the step count
+#   g.chain(660)                    # later fires reburning 660, and their reburns...
+#   g.pairs(min_overlap_ac=5)       # older/newer pair table
+#   g.borders(660)                  # fires that share border with 660 but don't overlap
+#
+# Notes:
+# - Adjacency is kept in compressed sparse row form (indptr/adjacent
+#   arrays), both undirected and forward (older -> newer, overlapping
+#   fires only), so traversals are array lookups
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import ranges
+from pair_geometry import shared_edge_lengths
+
+# Square meters to acres
+sqm2ac = 0.000247105
+
+edge_columns = ['older_parentid', 'newer_parentid', 'overlap_ac', 'older_in_newer_m',
+                'newer_in_older_m', 'year_gap']
+
+
+# ----------------- FireGraph -----------------------------------------
+
+class FireGraph(object):
+
+    # ids/years/dates: one per fire (node). Edge arrays: older/newer are
+    # node positions, plus the edge attributes.
+    def __init__(self, ids, years, dates, older, newer, overlap_ac, older_in_newer_m, newer_in_older_m):
+        self.ids = np.asarray(ids)
+        self.years = np.asarray(years)
+        self.dates = np.asarray(dates)
+        self.older = np.asarray(older, dtype=np.int64)
+        self.newer = np.asarray(newer, dtype=np.int64)
+        self.overlap_ac = np.asarray(overlap_ac, dtype=np.float64)
+        self.older_in_newer_m = np.asarray(older_in_newer_m, dtype=np.float64)
+        self.newer_in_older_m = np.asarray(newer_in_older_m, dtype=np.float64)
+        self.year_gap = self.years[self.newer] - self.years[self.older]
+
+        n = len(self.ids)
+        self._id_order = np.argsort(self.ids, kind='stable')
+        src = np.concatenate([self.older, self.newer])
+        dst = np.concatenate([self.newer, self.older])
+        edge = np.concatenate([np.arange(len(self.older))] * 2)
+        self.indptr, self.adjacent, self.adjacent_edge = _csr(src, dst, edge, n)
+        # Forward (older -> newer) over overlapping edges only, for chains
+        fwd = np.flatnonzero(self.overlap_ac > 0)
+        self.fwd_indptr, self.fwd_adjacent, self.fwd_edge = _csr(self.older[fwd], self.newer[fwd], fwd, n)
+
+    # One spatial join over all perimeters. dates (or years) order the two
+    # fires of each edge.
+    @classmethod
+    def build(cls, ids, geoms, dates, years=None):
+        geoms = np.asarray(geoms, dtype=object)
+        dates = np.asarray(dates)
+        if years is None:
+            years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+
+        tree = shapely.STRtree(geoms)
+        i, j = tree.query(geoms, predicate='intersects')
+        keep = i < j
+        i, j = i[keep], j[keep]
+
+        # Older fire first: by date, then id
+        rank = np.empty(len(geoms), dtype=np.int64)
+        rank[np.lexsort((np.asarray(ids), dates))] = np.arange(len(geoms))
+        swap = rank[i] > rank[j]
+        older, newer = np.where(swap, j, i), np.where(swap, i, j)
+
+        overlap_ac = shapely.area(shapely.intersection(geoms[older], geoms[newer])) * sqm2ac
+        older_in_newer, newer_in_older = shared_edge_lengths(geoms[older], geoms[newer])
+        return cls(ids, years, dates, older, newer, overlap_ac, older_in_newer, newer_in_older)
+
+    def save(self, path):
+        np.savez(path, ids=self.ids, years=self.years, dates=self.dates, older=self.older,
+                 newer=self.newer, overlap_ac=self.overlap_ac, older_in_newer_m=self.older_in_newer_m,
+                 newer_in_older_m=self.newer_in_older_m)
+
+    @classmethod
+    def load(cls, path):
+        f = np.load(path)
+        return cls(f['ids'], f['years'], f['dates'], f['older'], f['newer'], f['overlap_ac'],
+                   f['older_in_newer_m'], f['newer_in_older_m'])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def n_edges(self):
+        return len(self.older)
+
+    # Node position(s) of parentid(s) (KeyError if any are missing)
+    def node(self, parentid):
+        parentid = np.asarray(parentid)
+        k = np.searchsorted(self.ids[self._id_order], parentid)
+        k = np.minimum(k, len(self.ids) - 1)
+        node = self._id_order[k]
+        if not np.all(self.ids[node] == parentid):
+            raise KeyError('parentid not in graph: ' + str(parentid))
+        return node
+
+    # Edge table (edge_columns) for the given edges (all by default)
+    def edge_table(self, edges=None):
+        if edges is None:
+            edges = np.arange(self.n_edges)
+        return {'older_parentid': self.ids[self.older[edges]],
+                'newer_parentid': self.ids[self.newer[edges]],
+                'overlap_ac': self.overlap_ac[edges],
+                'older_in_newer_m': self.older_in_newer_m[edges],
+                'newer_in_older_m': self.newer_in_older_m[edges],
+                'year_gap': self.year_gap[edges]}
+
+    # Fires overlapping or bordering a fire: (parentids, edge numbers)
+    def neighbors(self, parentid, min_overlap_ac=None):
+        k = self.node(parentid)
+        nbr = self.adjacent[self.indptr[k]:self.indptr[k + 1]]
+        edges = self.adjacent_edge[self.indptr[k]:self.indptr[k + 1]]
+        if min_overlap_ac is not None:
+            keep = self.overlap_ac[edges] >= min_overlap_ac
+            nbr, edges = nbr[keep], edges[keep]
+        return self.ids[nbr], edges
+
+    # Fires sharing border with a fire without (more than max_overlap_ac
+    # of) overlap: where one fire stopped at the other
+    def borders(self, parentid, max_overlap_ac=0):
+        ids, edges = self.neighbors(parentid)
+        keep = (self.overlap_ac[edges] <= max_overlap_ac) & \
+               (self.older_in_newer_m[edges] + self.newer_in_older_m[edges] > 0)
+        return ids[keep], edges[keep]
+
+    # All fires within k steps of a fire: (parentids, steps), the fire
+    # itself at step 0
+    def k_hop(self, parentid, k):
+        return self._bfs(self.node(parentid), k, self.indptr, self.adjacent)
+
+    # Reburn chain from a fire: every later fire reached by stepping from
+    # older to newer over overlaps of at least min_overlap_ac. Returns
+    # (parentids, generation), the fire itself at generation 0; a fire
+    # reached along several paths gets its shortest.
+    def chain(self, parentid, min_overlap_ac=0, max_steps=None):
+        indptr, adjacent = self.fwd_indptr, self.fwd_adjacent
+        if min_overlap_ac > 0:
+            keep = self._overlapping(min_overlap_ac)
+            indptr, adjacent, _ = _csr(self.older[keep], self.newer[keep], np.flatnonzero(keep), len(self))
+        return self._bfs(self.node(parentid), max_steps, indptr, adjacent)
+
+    # Edges whose fires overlap by at least min_overlap_ac (and at all)
+    def _overlapping(self, min_overlap_ac):
+        return (self.overlap_ac > 0) & (self.overlap_ac >= min_overlap_ac)
+
+    # Breadth-first search over a CSR adjacency, one array step per level
+    def _bfs(self, start, max_steps, indptr, adjacent):
+        step = np.full(len(self), -1, dtype=np.int64)
+        step[start] = 0
+        frontier = np.array([start])
+        level = 0
+        while len(frontier) and (max_steps is None or level < max_steps):
+            level += 1
+            nbr = adjacent[ranges(indptr[frontier], indptr[frontier + 1])]
+            nbr = np.unique(nbr[step[nbr] < 0])
+            step[nbr] = level
+            frontier = nbr
+        found = np.flatnonzero(step >= 0)
+        found = found[np.argsort(step[found], kind='stable')]
+        return self.ids[found], step[found]
+
+    # Older/newer pair table for the pair scripts, from the edges
+    def pairs(self, min_overlap_ac=0, max_year_gap=None, same_year=False):
+        keep = self._overlapping(min_overlap_ac)
+        if max_year_gap is not None:
+            keep &= self.year_gap <= max_year_gap
+        if not same_year:
+            keep &= self.year_gap > 0
+        return self.edge_table(np.flatnonzero(keep))
+
+
+# ----------------- _csr ----------------------------------------------
+
+# Compressed sparse row adjacency of n nodes from edge lists
+
+def _csr(src, dst, edge, n):
+    order = np.argsort(src, kind='stable')
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+    return indptr, dst[order], edge[order]
+
+
+if __name__ == '__main__':
+
+    from ak_functions import write_table
+    from perimeter_io import read_perimeters
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\gis\\data"
+    file_in = "firePerimeters_1940_2016_gt1000ac_notPrescribed.shp"
+    path_out = "D:\\projects\\ak_fire\\data"
+    graph_out = "fire_graph.npz"
+    edges_out = "fire_graph_edges.csv"
+    # ********************************************************
+
+    ts0 = time.time()
+
+    fires = read_perimeters(os.path.join(path_in, file_in), ['parentid', 'FireYear', 'DiscDate'])
+    g = FireGraph.build(fires['parentid'], fires['geometry'],
+                        np.array(fires['DiscDate'], dtype='datetime64[D]'), fires['FireYear'])
+    g.save(os.path.join(path_out, graph_out))
+    write_table(os.path.join(path_out, edges_out), g.edge_table(), edge_columns)
+
+    print('Fires: ' + str(len(g)) + ', edges: ' + str(g.n_edges) +
+          ', overlapping: ' + str(int((g.overlap_ac > 0).sum())))
+    print('Done! Files written to: ')
+    print(os.path.join(path_out, graph_out))
+    print(os.path.join(path_out, edges_out))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
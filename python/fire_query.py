@@ -0,0 +1,231 @@
+# ---------------------------------------------------------------------------
+# fire_query.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# In-process query index for the fire, discrete polygon and pair tables
+# (firePerimeters_..._burn_data, processed_x.csv, processed_x_pairs<n>.csv),
+# so filters like "reburns within 10 years", "acres > 5" or "fires
+# discovered in June 2004" don't rescan the whole table each time.
+#
+# Two kinds of index are kept for a table:
+#
+#   range indexes    - for numeric/date columns (year, date, year_int,
+#                      acres...): the row order that sorts the column plus
+#                      the sorted values. A range query is two binary
+#                      searches, and its result is a slice of the row order.
+#   bitmap indexes   - for categorical columns (ecoreg1, size class,
+#                      reburn...): one packed bit array per value. Several
+#                      values/columns combine with bitwise or/and.
+#
+# A query names any number of conditions:
+#
+#   idx = TableIndex(x, ranges=['year', 'year_int', 'acres'], categories=['ecoreg1', 'size_class'])
+#   rows = idx.query(year_int=(None, 10))                        # reburns within 10 years
+#   rows = idx.query(year_int=(None, 10), ecoreg1='boreal', acres=(5, None))
+#   sub = idx.take(rows)                                        # table of just those rows
+#
+# Ranges are (lo, hi), inclusive at both ends; None leaves that end open.
+# Categories take a single value or a list of values.
+#
+# The narrowest range condition drives the query (its slice of the row
+# order), and the other conditions only check the rows in that slice, so
+# the cost grows with the result, not with the table.
+#
+# Notes:
+# - With a single range condition and nothing else, the row numbers
+#   returned are a view of the index (read-only; don't modify it)
+# - Rows come back in the order of the driving index (e.g., by year_int),
+#   not in table order
+# - NaN/NaT values sort last and never match a range
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+
+from ak_functions import read_table, parse_dates, assign_ecoregion
+
+# Fire size classes (acres), lower bounds
+size_breaks = [0, 1000, 10000, 100000]
+size_labels = ['lt1k', '1k_10k', '10k_100k', 'gt100k']
+
+
+# ----------------- size_class ----------------------------------------
+
+# Size class label of each row from its acreage
+
+def size_class(acres, breaks=size_breaks, labels=size_labels):
+    k = np.searchsorted(breaks, np.asarray(acres, dtype=np.float64), side='right') - 1
+    return np.array(labels, dtype=object)[np.clip(k, 0, len(labels) - 1)]
+
+
+# ----------------- RangeIndex ----------------------------------------
+
+class RangeIndex(object):
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.order = np.argsort(values, kind='stable')
+        self.order.setflags(write=False)
+        self.sorted = values[self.order]
+        if values.dtype.kind == 'M':
+            self.n_valid = len(values) - int(np.isnat(values).sum())
+        elif values.dtype.kind == 'f':
+            self.n_valid = len(values) - int(np.isnan(values).sum())
+        else:
+            self.n_valid = len(values)
+
+    # Positions [start, stop) in the sorted order of the values within
+    # lo..hi (inclusive)
+    def bounds(self, lo=None, hi=None):
+        valid = self.sorted[:self.n_valid]
+        start = 0 if lo is None else int(np.searchsorted(valid, lo, side='left'))
+        stop = self.n_valid if hi is None else int(np.searchsorted(valid, hi, side='right'))
+        return start, max(start, stop)
+
+    # Row numbers with values within lo..hi, as a view
+    def range(self, lo=None, hi=None):
+        start, stop = self.bounds(lo, hi)
+        return self.order[start:stop]
+
+
+# ----------------- BitmapIndex ---------------------------------------
+
+class BitmapIndex(object):
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.n = len(values)
+        keys, inverse = np.unique(_keys(values), return_inverse=True)
+        self.bitmaps = dict((key, np.packbits(inverse == k)) for k, key in enumerate(keys))
+        self.empty = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+
+    # Packed bitmap of the rows holding any of the given values
+    def bitmap(self, values):
+        if np.isscalar(values):
+            values = [values]
+        out = self.empty
+        for v in values:
+            out = out | self.bitmaps.get(_keys(np.array([v]))[0], self.empty)
+        return out
+
+    def values(self):
+        return sorted(self.bitmaps)
+
+
+# Bitmap keys: values as strings, with whole-number floats written as
+# integers, so 1, 1.0 and read_table's float columns give the same key
+
+def _keys(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        out = values.astype(str).astype(object)
+        whole = np.isfinite(values) & (values == np.round(values))
+        out[whole] = values[whole].astype(np.int64).astype(str)
+        return out.astype(str)
+    return values.astype(str)
+
+
+# Test rows against a packed bitmap
+
+def _bits(bitmap, rows):
+    return ((bitmap[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+
+# ----------------- TableIndex ----------------------------------------
+
+class TableIndex(object):
+
+    def __init__(self, table, ranges=(), categories=()):
+        self.table = table
+        self.n = len(next(iter(table.values())))
+        self.ranges = dict((name, RangeIndex(table[name])) for name in ranges)
+        self.categories = dict((name, BitmapIndex(table[name])) for name in categories)
+
+    # Row numbers matching all conditions (see the header for the syntax)
+    def query(self, **conditions):
+        range_conds, cat_conds = [], []
+        for name, cond in conditions.items():
+            if name in self.ranges:
+                lo, hi = cond
+                range_conds.append((name, lo, hi, self.ranges[name].bounds(lo, hi)))
+            elif name in self.categories:
+                cat_conds.append(self.categories[name].bitmap(cond))
+            else:
+                raise KeyError('no index on column: ' + name)
+
+        # Categories only: and the bitmaps
+        if not range_conds:
+            bitmap = np.full((self.n + 7) // 8, 255, dtype=np.uint8)
+            for b in cat_conds:
+                bitmap = bitmap & b
+            return np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+
+        # Narrowest range drives, the rest filter its rows
+        range_conds.sort(key=lambda c: c[3][1] - c[3][0])
+        name, lo, hi, (start, stop) = range_conds[0]
+        rows = self.ranges[name].order[start:stop]
+        if len(range_conds) == 1 and not cat_conds:
+            return rows
+
+        keep = np.ones(len(rows), dtype=bool)
+        for name, lo, hi, _ in range_conds[1:]:
+            values = np.asarray(self.table[name])[rows]
+            if lo is not None:
+                keep &= values >= lo
+            if hi is not None:
+                keep &= values <= hi
+        for b in cat_conds:
+            keep &= _bits(b, rows)
+        return rows[keep]
+
+    # Number of matching rows
+    def count(self, **conditions):
+        if len(conditions) == 1:
+            name, cond = list(conditions.items())[0]
+            if name in self.ranges:
+                start, stop = self.ranges[name].bounds(*cond)
+                return stop - start
+        return len(self.query(**conditions))
+
+    # The given rows of the table (or of some of its columns)
+    def take(self, rows, columns=None):
+        if columns is None:
+            columns = list(self.table.keys())
+        return dict((name, np.asarray(self.table[name])[rows]) for name in columns)
+
+
+if __name__ == '__main__':
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\data"
+    file_in = "processed_x.csv"
+    # ********************************************************
+
+    ts0 = time.time()
+
+    x = read_table(os.path.join(path_in, file_in))
+    x['date'] = parse_dates(x['date'])
+    x['size_class'] = size_class(x['acres'])
+    categories = ['size_class', 'reburn']
+    if 'boreal' in x:
+        x['ecoreg1'] = assign_ecoregion(x)
+        categories.append('ecoreg1')
+    idx = TableIndex(x, ranges=['year', 'date', 'year_int', 'acres'], categories=categories)
+    print('Index built for ' + str(idx.n) + ' polygon burns in ' + str(time.time() - ts0) + ' seconds')
+
+    queries = [{'year_int': (None, 10)},
+               {'year_int': (None, 10), 'acres': (5, None)},
+               {'year_int': (None, 10), 'reburn': 1},
+               {'date': (np.datetime64('2004-06-01'), np.datetime64('2004-06-30')), 'size_class': ['10k_100k', 'gt100k']}]
+    for q in queries:
+        t0 = time.time()
+        rows = idx.query(**q)
+        print(str(q) + ': ' + str(len(rows)) + ' rows, ' + str((time.time() - t0) * 1000) + ' ms')
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,219 @@
+# ---------------------------------------------------------------------------
+# fire_time_series.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Annual fire statistics and moving averages, replacing the padTimeSeries +
+# zoo::rollapply steps in process_ak_burn_data.R.
+#
+# The burn table is aggregated once into a year x group x metric array
+# (the "cube"). Missing years are simply rows of zeros, so there is no
+# separate padding step. Rolling sums, counts and means for any window
+# length then come from a single cumulative sum along the year axis:
+#
+#   sum over window [t-w+1, t] = S[t] - S[t-w]
+#
+# which is O(n) however long the window, rather than recomputing each
+# window from scratch as rollapply does. Several window lengths can be
+# swept using the same cumulative sums.
+#
+# NaN cells are treated as missing (R: na.rm = TRUE): they add nothing to
+# the sum, are not counted, and the mean is the sum over the count of valid
+# years in the window.
+#
+# Input files:
+#
+# 1.  firePerimeters_1940_2016_burn_data_plus_ecoregions_w_perimeter_R.csv
+#     (see process_ak_burn_data.R for a description of the columns)
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1.  ak_fire_moving_averages.csv - one row per year/group, e.g.,
+#
+# year reburn n_fires  bor_ac  mar_ac  tun_ac  all_ac  n_fires_10yrMove  bor_ac_10yrMove ...
+# 1949   0      3      ...                               2.1                ...
+#
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+
+from ak_functions import read_table, write_table, assign_ecoregion
+
+# Square meter to acres conversion: m^2 * 0.000247105 ac/m^2
+sqm2ac = 0.000247105
+
+# Default metrics: acreage of each level 1 ecoregion, plus total.
+# Each metric is a list of (column, multiplier) terms that are summed.
+ecoreg1_metrics = [('bor_ac', [('boreal', sqm2ac)]),
+                   ('mar_ac', [('maritime', sqm2ac)]),
+                   ('tun_ac', [('tundra', sqm2ac)]),
+                   ('all_ac', [('boreal', sqm2ac), ('maritime', sqm2ac), ('tundra', sqm2ac)])]
+
+
+# ----------------- AnnualCube ----------------------------------------
+
+# Year x group x metric array plus the labels for each axis
+
+class AnnualCube(object):
+
+    def __init__(self, values, years, groups, group_fields, metrics):
+        self.values = values
+        self.years = years
+        self.groups = groups
+        self.group_fields = group_fields
+        self.metrics = metrics
+        self._csum = None
+
+    def metric(self, name):
+        return self.values[:, :, self.metrics.index(name)]
+
+    # Cumulative sums of values and of valid (non-NaN) cells, with a
+    # leading row of zeros so that window sums are a single subtraction.
+    # Computed once and reused for every window length.
+    def cumulative(self):
+        if self._csum is None:
+            valid = ~np.isnan(self.values)
+            shape = (1,) + self.values.shape[1:]
+            self._csum = (np.concatenate([np.zeros(shape), np.cumsum(np.where(valid, self.values, 0), axis=0)]),
+                          np.concatenate([np.zeros(shape, dtype=np.int64), np.cumsum(valid, axis=0)]))
+        return self._csum
+
+    # Right-aligned rolling statistics. Windows that do not yet span
+    # 'window' years (the first window - 1 years) are NaN, as with
+    # rollapply(..., fill = NA). Windows with fewer than min_periods
+    # valid years are also NaN.
+    def rolling(self, window, min_periods=1):
+        csum, ccount = self.cumulative()
+        n = self.values.shape[0]
+        total = np.full(self.values.shape, np.nan)
+        count = np.zeros(self.values.shape, dtype=np.int64)
+        if window <= n:
+            total[window - 1:] = csum[window:] - csum[:n - window + 1]
+            count[window - 1:] = ccount[window:] - ccount[:n - window + 1]
+        enough = count >= max(min_periods, 1)
+        total[~enough] = np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(enough, total / count, np.nan)
+        return {'sum': total, 'count': count, 'mean': mean}
+
+    # Rolling statistics for several window lengths at once
+    def sweep(self, windows, min_periods=1):
+        return dict((w, self.rolling(w, min_periods)) for w in windows)
+
+
+# ----------------- build_annual_cube ---------------------------------
+
+# Aggregate a burn table into an AnnualCube.
+#
+# group_fields - list of columns to split on (e.g., ['reburn'],
+#                ['ecoreg1'] or both); [] for no split
+# metrics      - list of (name, [(column, multiplier), ...]) summed per
+#                year/group
+# count_field  - if given, an 'n_fires' metric counting the distinct values
+#                of this column (parentid) per year/group is added first
+
+def build_annual_cube(x, start_yr, end_yr, group_fields=(), metrics=ecoreg1_metrics,
+                      count_field='parentid'):
+    years = np.arange(start_yr, end_yr + 1)
+    in_range = (x['year'] >= start_yr) & (x['year'] <= end_yr)
+    year_idx = (x['year'][in_range] - start_yr).astype(np.int64)
+    n_years = len(years)
+
+    # Combine the group fields into one group index
+    group_idx = np.zeros(len(year_idx), dtype=np.int64)
+    levels = []
+    for f in group_fields:
+        labels, inv = np.unique(np.asarray(x[f])[in_range], return_inverse=True)
+        group_idx = group_idx * len(labels) + inv.ravel()
+        levels.append(labels)
+    used, group_idx = np.unique(group_idx, return_inverse=True)
+    group_idx = group_idx.ravel()
+    n_groups = max(len(used), 1)
+
+    # Label of each group, one array per group field
+    groups = {}
+    for f, labels in reversed(list(zip(group_fields, levels))):
+        groups[f] = labels[used % len(labels)]
+        used = used // len(labels)
+    cell = year_idx * n_groups + group_idx
+
+    names = []
+    layers = []
+
+    # Number of distinct fires in each year/group
+    if count_field is not None:
+        fire = np.asarray(x[count_field])[in_range]
+        _, fire_idx = np.unique(fire, return_inverse=True)
+        distinct = np.unique(np.column_stack([cell, fire_idx.ravel()]), axis=0)
+        layers.append(np.bincount(distinct[:, 0], minlength=n_years * n_groups).astype(np.float64))
+        names.append('n_fires')
+
+    for name, terms in metrics:
+        weights = np.zeros(len(cell))
+        for column, mult in terms:
+            weights = weights + np.asarray(x[column], dtype=np.float64)[in_range] * mult
+        layers.append(np.bincount(cell, weights=weights, minlength=n_years * n_groups))
+        names.append(name)
+
+    values = np.stack(layers, axis=-1).reshape(n_years, n_groups, len(names))
+    return AnnualCube(values, years, groups, list(group_fields), names)
+
+
+# ----------------- cube_to_table -------------------------------------
+
+# Flatten a cube (and optionally rolling means) to long format: one row per
+# year/group, one column per metric, plus <metric>_<w>yrMove columns
+
+def cube_to_table(cube, rolled=None, stat='mean'):
+    n_years, n_groups, _ = cube.values.shape
+    out = {'year': np.repeat(cube.years, n_groups).astype(np.float64)}
+    for field in cube.group_fields:
+        out[field] = np.tile(cube.groups[field], n_years)
+    for k, name in enumerate(cube.metrics):
+        out[name] = cube.values[:, :, k].ravel()
+    columns = ['year'] + cube.group_fields + cube.metrics
+    for w in sorted(rolled or {}):
+        for k, name in enumerate(cube.metrics):
+            col = name + '_' + str(w) + 'yrMove'
+            out[col] = rolled[w][stat][:, :, k].ravel()
+            columns.append(col)
+    return out, columns
+
+
+if __name__ == '__main__':
+
+    from assign_burn_order import assign_burn_order
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\data"
+    file_in = "firePerimeters_1940_2016_burn_data_plus_ecoregions_w_perimeter_R.csv"
+    file_out = "ak_fire_moving_averages.csv"
+
+    # Local variables
+    start_yr = 1940
+    end_yr = 2016
+    group_fields = ['reburn']  # e.g., [], ['reburn'], ['ecoreg1'], ['reburn', 'ecoreg1']
+    windows = [10]             # moving average window lengths (years)
+    # ********************************************************
+
+    ts0 = time.time()
+
+    x = read_table(os.path.join(path_in, file_in))
+    x = assign_burn_order(x)
+    x['ecoreg1'] = assign_ecoregion(x)
+
+    cube = build_annual_cube(x, start_yr, end_yr, group_fields)
+    out, columns = cube_to_table(cube, cube.sweep(windows))
+    write_table(os.path.join(path_in, file_out), out, columns)
+
+    print('Done! File written to: ')
+    print(os.path.join(path_in, file_out))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,221 @@
+# ---------------------------------------------------------------------------
+# geometry_store.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Persistent store of fire perimeters as flat arrays, so a single fire can
+# be pulled out in microseconds instead of SelectLayerByAttribute +
+# CopyFeatures_management to in_memory and back for every pair.
+#
+# All perimeters are kept as multipolygons in one set of arrays:
+#
+#   coords        (n_coords, 2) float64  x, y of every vertex
+#   ring_offsets  (n_rings + 1)          ring i = coords[ring_offsets[i]:ring_offsets[i + 1]]
+#   part_offsets  (n_parts + 1)          part j = rings part_offsets[j]:part_offsets[j + 1]
+#                                        (first ring exterior, the rest holes)
+#   geom_offsets  (n_fires + 1)          fire k = parts geom_offsets[k]:geom_offsets[k + 1]
+#   ids           (n_fires,)             parentid of each fire, sorted
+#   bounds        (n_fires, 4)           xmin, ymin, xmax, ymax
+#
+# plus any attribute columns (year, date, acres...). Each array is its own
+# .npy file in the store directory and is opened memory-mapped, so:
+#
+# - opening the store costs nothing, whatever its size
+# - a fire's coordinates are a slice of the memory map (no copy)
+# - worker processes that open the same store share one copy of the
+#   statewide geometry through the OS page cache; passing a store to a
+#   multiprocessing pool just reopens it in the worker
+#
+# Usage:
+#
+#   GeometryStore.build("D:\\projects\\ak_fire\\data\\perimeter_store", fires['parentid'], fires['geometry'],
+#                       year=fires['FireYear'])
+#   store = GeometryStore.open("D:\\projects\\ak_fire\\data\\perimeter_store")
+#   xy = store.coords(660)          # zero-copy view, all vertices of fire 660
+#   poly = store.geometry(660)      # shapely geometry, when one is needed
+#
+# -----------------------------------------------------------------------
+
+import json
+import os
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import ranges
+
+core_arrays = ['coords', 'ring_offsets', 'part_offsets', 'geom_offsets', 'ids', 'bounds']
+
+
+# ----------------- GeometryStore -------------------------------------
+
+class GeometryStore(object):
+
+    def __init__(self, path, arrays, attributes):
+        self.path = path
+        self.arrays = arrays
+        self.attributes = attributes
+        for name in core_arrays[1:]:
+            setattr(self, name, arrays[name])
+
+    # Write a new store. ids need not be sorted; geometries may be
+    # Polygons or MultiPolygons. Extra keyword arrays are stored as
+    # attributes in the same (sorted) order.
+    @classmethod
+    def build(cls, path, ids, geoms, **attributes):
+        ids = np.asarray(ids)
+        order = np.argsort(ids, kind='stable')
+        ids = ids[order]
+        if len(ids) > 1 and (ids[1:] == ids[:-1]).any():
+            raise ValueError('GeometryStore ids must be unique')
+        geoms = np.asarray(geoms, dtype=object)[order]
+        geom_type, coords, offsets = shapely.to_ragged_array(geoms)
+        if geom_type == shapely.GeometryType.POLYGON:
+            ring_offsets, part_offsets = offsets
+            geom_offsets = np.arange(len(geoms) + 1)
+        else:
+            ring_offsets, part_offsets, geom_offsets = offsets
+
+        arrays = {'coords': coords,
+                  'ring_offsets': ring_offsets.astype(np.int64),
+                  'part_offsets': part_offsets.astype(np.int64),
+                  'geom_offsets': geom_offsets.astype(np.int64),
+                  'ids': ids,
+                  'bounds': shapely.bounds(geoms)}
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), arr)
+        for name, arr in attributes.items():
+            arr = np.asarray(arr)[order]
+            if arr.dtype == object:
+                arr = arr.astype(str)
+            np.save(os.path.join(path, 'attr_' + name + '.npy'), arr)
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump({'n_fires': int(len(ids)), 'n_coords': int(len(coords)),
+                       'attributes': sorted(attributes)}, f, indent=1)
+        return cls.open(path)
+
+    # Open an existing store, memory-mapped
+    @classmethod
+    def open(cls, path, mmap_mode='r'):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        arrays = dict((name, np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode))
+                      for name in core_arrays)
+        attributes = dict((name, np.load(os.path.join(path, 'attr_' + name + '.npy'), mmap_mode=mmap_mode))
+                          for name in manifest['attributes'])
+        return cls(path, arrays, attributes)
+
+    # Pickle as a path, so worker processes reopen the memory map rather
+    # than receiving a copy of the arrays
+    def __reduce__(self):
+        return (GeometryStore.open, (self.path,))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Position(s) of one or more parentids in the store (KeyError if any
+    # are missing)
+    def index_of(self, parentid):
+        parentid = np.asarray(parentid)
+        idx = np.searchsorted(self.ids, parentid)
+        idx_c = np.minimum(idx, len(self.ids) - 1)
+        if not np.all(self.ids[idx_c] == parentid):
+            raise KeyError('parentid not in store: ' + str(parentid))
+        return idx_c
+
+    # Ring offsets (into coords) of a fire, as a view
+    def ring_range(self, parentid):
+        k = self.index_of(parentid)
+        p0, p1 = self.geom_offsets[k], self.geom_offsets[k + 1]
+        r0, r1 = self.part_offsets[p0], self.part_offsets[p1]
+        return self.ring_offsets[r0:r1 + 1]
+
+    # All vertices of a fire, as a zero-copy view of the store
+    def coords(self, parentid):
+        rings = self.ring_range(parentid)
+        return self.coords_array[rings[0]:rings[-1]]
+
+    @property
+    def coords_array(self):
+        return self.arrays['coords']
+
+    # Each ring of a fire as a view: list of (part number, is_exterior, xy)
+    def rings(self, parentid):
+        k = self.index_of(parentid)
+        out = []
+        for j in range(self.geom_offsets[k], self.geom_offsets[k + 1]):
+            for r in range(self.part_offsets[j], self.part_offsets[j + 1]):
+                xy = self.coords_array[self.ring_offsets[r]:self.ring_offsets[r + 1]]
+                out.append((j - self.geom_offsets[k], r == self.part_offsets[j], xy))
+        return out
+
+    # Shapely geometry of one fire (this does copy the coordinates)
+    def geometry(self, parentid):
+        k = int(self.index_of(parentid))
+        return self.geometries_at(np.array([k]))[0]
+
+    # Shapely geometries of the fires at the given store positions (all of
+    # them by default)
+    def geometries_at(self, idx=None):
+        if idx is None:
+            idx = np.arange(len(self))
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(idx) == 0:
+            return np.empty(0, dtype=object)
+
+        # Renumber the offsets of the selected fires so they start at 0
+        p0, p1 = self.geom_offsets[idx], self.geom_offsets[idx + 1]
+        parts = ranges(p0, p1)
+        r0, r1 = self.part_offsets[parts], self.part_offsets[parts + 1]
+        rings = ranges(r0, r1)
+        c0, c1 = self.ring_offsets[rings], self.ring_offsets[rings + 1]
+        coords = np.asarray(self.coords_array)[ranges(c0, c1)]
+
+        geom_offsets = np.concatenate([[0], np.cumsum(p1 - p0)])
+        part_offsets = np.concatenate([[0], np.cumsum(r1 - r0)])
+        ring_offsets = np.concatenate([[0], np.cumsum(c1 - c0)])
+        return shapely.from_ragged_array(shapely.GeometryType.MULTIPOLYGON, coords,
+                                         (ring_offsets, part_offsets, geom_offsets))
+
+    def geometries(self, parentids):
+        return self.geometries_at(self.index_of(parentids))
+
+    # Attribute value(s) for the given parentids
+    def attribute(self, name, parentids):
+        return self.attributes[name][self.index_of(parentids)]
+
+    # Number of vertices of each fire
+    def vertex_counts(self):
+        parts_end = self.part_offsets[self.geom_offsets]
+        return np.diff(self.ring_offsets[parts_end])
+
+
+if __name__ == '__main__':
+
+    from perimeter_io import read_perimeters
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\gis\\data"
+    file_in = "firePerimeters_1940_2016_gt1000ac_notPrescribed.shp"
+    store_path = "D:\\projects\\ak_fire\\data\\perimeter_store"
+    # ********************************************************
+
+    ts0 = time.time()
+
+    fires = read_perimeters(os.path.join(path_in, file_in), ['parentid', 'FireYear', 'CalcAcres', 'DiscDate'])
+    store = GeometryStore.build(store_path, fires['parentid'], fires['geometry'],
+                                year=fires['FireYear'], acres=fires['CalcAcres'],
+                                date=np.array(fires['DiscDate'], dtype='datetime64[D]'))
+
+    print('Stored ' + str(len(store)) + ' perimeters, ' + str(len(store.coords_array)) + ' vertices')
+    print('Done! Store written to: ')
+    print(store_path)
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
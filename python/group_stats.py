@@ -0,0 +1,162 @@
+# ---------------------------------------------------------------------------
+# group_stats.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Grouped quantiles, ranks and threshold flags over table columns, for any
+# set of key columns, in one sort of the table. Replaces the
+#
+#   top5 <- ave(x$acres, x$reburn, x$year, FUN = function(y) y > quantile(y, prob = 0.95))
+#
+# pattern of process_CAN_burn_data.R, which calls a closure (and sorts) once
+# per group and once per probability. Here the rows are sorted once by
+# (keys, value); every group is then a contiguous run of sorted values, so
+# its quantiles for all probabilities are two gathers and an interpolation,
+# done for all groups at once.
+#
+#   top5, top10 = group_flags(x['acres'], [x['reburn'], x['year']], [0.95, 0.90])
+#
+# Quantiles are R's default (type 7): for n sorted values and probability
+# p, h = (n - 1) * p and q = x[floor(h)] + (h - floor(h)) * (x[floor(h) + 1] - x[floor(h)]).
+# Ranks are R's rank() with ties averaged.
+#
+# Notes:
+# - NaN values are left out of their group (like na.rm = TRUE); their
+#   quantile columns are still filled, their ranks are NaN and their flags
+#   are 0
+# - A group with no non-NaN values gets NaN quantiles
+# -----------------------------------------------------------------------
+
+import numpy as np
+
+from ak_functions import group_starts
+
+
+# ----------------- group_sort ----------------------------------------
+
+# Row order sorting by keys (first key slowest) and then value, NaN values
+# last in their group. Returns (order, group of each sorted row, start of
+# each group in sorted order, number of non-NaN values in each group).
+
+def group_sort(values, keys):
+    values = np.asarray(values, dtype=np.float64)
+    keys = [np.asarray(k) for k in keys]
+    order = np.lexsort([values] + keys[::-1])
+    if keys:
+        is_start = group_starts(*[k[order] for k in keys])
+    else:
+        is_start = np.arange(len(values)) == 0
+    starts = np.flatnonzero(is_start)
+    group = np.cumsum(is_start) - 1
+    valid = np.bincount(group, weights=~np.isnan(values[order]), minlength=len(starts)).astype(np.int64)
+    return order, group, starts, valid
+
+
+# ----------------- group_quantiles -----------------------------------
+
+# Quantiles (R type 7) of values within each group of keys, for each of
+# probs. Returns (index of the first row of each group, (n_groups, n_probs)
+# quantiles); keys[k][first] gives the group keys.
+
+def group_quantiles(values, keys, probs):
+    values = np.asarray(values, dtype=np.float64)
+    order, group, starts, valid = group_sort(values, keys)
+    return order[starts], _quantiles(values[order], starts, valid, probs)
+
+
+def _quantiles(sorted_values, starts, valid, probs):
+    probs = np.atleast_1d(np.asarray(probs, dtype=np.float64))
+    if len(starts) == 0:
+        return np.empty((0, len(probs)))
+    h = (np.maximum(valid, 1) - 1)[:, None] * probs[None, :]
+    lo = np.floor(h).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(valid, 1)[:, None] - 1)
+    # Empty groups read a value of the next group; masked below
+    x_lo = sorted_values[np.minimum(starts[:, None] + lo, len(sorted_values) - 1)]
+    x_hi = sorted_values[np.minimum(starts[:, None] + hi, len(sorted_values) - 1)]
+    q = x_lo + (h - lo) * (x_hi - x_lo)
+    q[valid == 0] = np.nan
+    return q
+
+
+# ----------------- group_quantile_rows -------------------------------
+
+# Quantiles of each row's group, one row per input row: the (n, n_probs)
+# array ave(values, keys, FUN = quantile) would give
+
+def group_quantile_rows(values, keys, probs):
+    values = np.asarray(values, dtype=np.float64)
+    order, group, starts, valid = group_sort(values, keys)
+    q = _quantiles(values[order], starts, valid, probs)
+    out = np.empty_like(q, shape=(len(values), q.shape[1]))
+    out[order] = q[group]
+    return out
+
+
+# ----------------- group_flags ---------------------------------------
+
+# 0/1 flags, one array per probability, for values strictly above their
+# group's quantile (R: ave(values, keys, FUN = function(y) y > quantile(y, p)))
+
+def group_flags(values, keys, probs):
+    values = np.asarray(values, dtype=np.float64)
+    q = group_quantile_rows(values, keys, probs)
+    above = values[:, None] > q
+    return [above[:, j].astype(np.int64) for j in range(q.shape[1])]
+
+
+# ----------------- group_ranks ---------------------------------------
+
+# Rank of each value within its group, 1 = smallest, ties averaged (R:
+# ave(values, keys, FUN = rank)). Set descending for 1 = largest.
+
+def group_ranks(values, keys, descending=False):
+    values = np.asarray(values, dtype=np.float64)
+    order, group, starts, valid = group_sort(-values if descending else values, keys)
+    sorted_values = values[order]
+    pos = np.arange(len(values)) - starts[group]
+
+    # Runs of tied values within a group share the mean of their positions
+    tie_start = group_starts(group, sorted_values)
+    tie = np.cumsum(tie_start) - 1
+    first = np.flatnonzero(tie_start)
+    last = np.append(first[1:], len(values)) - 1
+    ranks = (pos[first] + pos[last]) / 2.0 + 1
+
+    out = np.empty(len(values))
+    out[order] = np.where(np.isnan(sorted_values), np.nan, ranks[tie])
+    return out
+
+
+if __name__ == '__main__':
+
+    import os
+    import time
+
+    from ak_functions import read_table, write_table
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\Fire_AK_reburn\\data\\canada"
+    file_in = "NFDB_poly_20160712_processed_x.csv"  # partitioned_reburns.py
+    file_out = "NFDB_poly_20160712_processed_x_top.csv"
+
+    # Local variables
+    probs = [0.95, 0.90]
+    flag_names = ['top5', 'top10']
+    # ********************************************************
+
+    ts0 = time.time()
+
+    x = read_table(os.path.join(path_in, file_in))
+    for name, flag in zip(flag_names, group_flags(x['acres'], [x['reburn'], x['year']], probs)):
+        x[name] = flag
+    x['rank_in_year'] = group_ranks(x['acres'], [x['reburn'], x['year']], descending=True)
+    write_table(os.path.join(path_in, file_out), x)
+
+    print('Done! Files written to: ')
+    print(os.path.join(path_in, file_out))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,219 @@
+# ---------------------------------------------------------------------------
+# modis_footprint.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# True ground footprint of MODIS active fire detections, and class*
+# (EVT 30-m pixel count) columns as fractions, for the FRP tables.
+# process_ak_frp_data_pixelArea.R treats every detection as a nominal
+# 1-km pixel (max_landsat_pixels = 1111 30-m pixels), but the footprint
+# grows from 1 x 1 km at nadir to about 2 x 4.8 km at the swath edge.
+#
+# Footprint geometry after Ichoku & Kaufman (2005, IEEE TGRS 43:2636-2649):
+# satellite height h = 705 km, earth radius Re = 6378.137 km, r = Re + h,
+# s = p / h for the nadir pixel size p = 1 km, 1354 samples per scan line
+# with the centre at 676.5, and for sample i the scan angle
+#
+#   theta        = s * (i - 676.5)
+#   along scan   = Re * s * (cos(theta) / sqrt((Re / r)^2 - sin(theta)^2) - 1)
+#   along track  = r * s * (cos(theta) - sqrt((Re / r)^2 - sin(theta)^2))
+#
+# The footprint is oriented by the ground track, whose azimuth depends on
+# latitude (orbit inclination 98.2 degrees); along scan is perpendicular to
+# it. Area and shape are computed once for every sample and latitude band
+# (FootprintTable) and detections are looked up in it by index, so
+# hundreds of thousands of detections cost one gather.
+#
+#   footprint = footprint_lookup(x['sample'], x['latitude'])
+#   frac = class_fractions(x, class_columns(x))
+#
+# Input files:
+#
+# 1.  mxd14a1_gee_<yyyy>_plus_fires_compact.csv  (detection_join.py)
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. mxd14a1_gee_<yyyy>_plus_fires_footprint.csv - the input columns with
+#    each class* column replaced by its fraction (frac_class*), plus
+#
+# scan_angle_deg  along_scan_km  along_track_km  area_km2  track_azimuth_deg  evt_coverage
+#      32.1           1.42           1.17          1.66        -19.4             0.98
+#
+#    evt_coverage: total of the class* 30-m pixel counts over the 1111
+#    pixels of the nominal 1-km pixel
+#
+# Notes:
+# - Detections without a sample number are given the nadir footprint
+# - The track azimuth ignores the earth's rotation (under a degree of
+#   error at Alaskan latitudes)
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+
+# MODIS scan geometry (Ichoku & Kaufman 2005)
+sat_height_km = 705.0
+earth_radius_km = 6378.137
+n_samples = 1354
+centre_sample = 676.5
+nadir_pixel_km = 1.0
+inclination_deg = 98.2
+
+# The class* columns are counts of 30-m (Landsat EVT) pixels. Nominal
+# 1-km pixel of process_ak_frp_data_pixelArea.R: max_landsat_pixels = 1111
+nominal_pixels = 1111
+landsat_pixel_m2 = 900.0
+
+footprint_columns = ['scan_angle_deg', 'along_scan_km', 'along_track_km', 'area_km2', 'track_azimuth_deg']
+
+# FootprintTables already built, by band width
+_tables = {}
+
+
+# ----------------- scan_footprint ------------------------------------
+
+# Scan angle (radians) and along-scan and along-track footprint size (km)
+# of samples i (0-based)
+
+def scan_footprint(i):
+    s = nadir_pixel_km / sat_height_km
+    r = earth_radius_km + sat_height_km
+    theta = s * (np.asarray(i, dtype=np.float64) - centre_sample)
+    root = np.sqrt((earth_radius_km / r) ** 2 - np.sin(theta) ** 2)
+    along_scan = earth_radius_km * s * (np.cos(theta) / root - 1)
+    along_track = r * s * (np.cos(theta) - root)
+    return theta, along_scan, along_track
+
+
+# ----------------- track_azimuth -------------------------------------
+
+# Azimuth of the ground track (degrees from north) at latitude lat, for an
+# ascending pass; for a descending pass it is 180 minus this
+
+def track_azimuth(lat):
+    ratio = np.cos(np.radians(inclination_deg)) / np.cos(np.radians(np.asarray(lat, dtype=np.float64)))
+    return np.degrees(np.arcsin(np.clip(ratio, -1, 1)))
+
+
+# ----------------- FootprintTable ------------------------------------
+
+# Footprint of every (sample, latitude band) combination
+
+class FootprintTable(object):
+
+    def __init__(self, band_width=1.0):
+        self.band_width = band_width
+        self.n_bands = int(np.ceil(180.0 / band_width))
+        band_lat = -90 + (np.arange(self.n_bands) + 0.5) * band_width
+
+        theta, along_scan, along_track = scan_footprint(np.arange(n_samples))
+        shape = (n_samples, self.n_bands)
+        self.columns = {
+            'scan_angle_deg': np.broadcast_to(np.degrees(theta)[:, None], shape).ravel(),
+            'along_scan_km': np.broadcast_to(along_scan[:, None], shape).ravel(),
+            'along_track_km': np.broadcast_to(along_track[:, None], shape).ravel(),
+            'area_km2': np.broadcast_to((along_scan * along_track)[:, None], shape).ravel(),
+            'track_azimuth_deg': np.broadcast_to(track_azimuth(band_lat)[None, :], shape).ravel()}
+
+    # Row of the table for each (sample, latitude); missing or out of range
+    # samples get the nadir row
+    def key(self, sample, lat):
+        sample = np.asarray(sample, dtype=np.float64)
+        valid = np.isfinite(sample) & (sample >= 0) & (sample < n_samples)
+        i = np.where(valid, sample, np.floor(centre_sample)).astype(np.int64)
+        lat = np.nan_to_num(np.asarray(lat, dtype=np.float64))
+        band = np.clip(((lat + 90) // self.band_width).astype(np.int64), 0, self.n_bands - 1)
+        return i * self.n_bands + band
+
+    def lookup(self, sample, lat):
+        k = self.key(sample, lat)
+        return dict((name, col[k]) for name, col in self.columns.items())
+
+
+# ----------------- footprint_lookup ----------------------------------
+
+# Footprint columns (footprint_columns) for detections at the given
+# sample numbers and latitudes
+
+def footprint_lookup(sample, lat, band_width=1.0):
+    if band_width not in _tables:
+        _tables[band_width] = FootprintTable(band_width)
+    return _tables[band_width].lookup(sample, lat)
+
+
+# ----------------- class_fractions -----------------------------------
+
+# Names of the class* columns of a table
+
+def class_columns(table):
+    return [c for c in table if c.startswith('class')]
+
+
+# Class pixel counts as fractions, (n_rows, n_classes):
+#   'total'     - of the classes' total in each row (rows sum to 1)
+#   'nominal'   - of the 1111 30-m pixels in the nominal 1-km pixel (the R
+#                 max_evt_prop / 100)
+#   'footprint' - of the 30-m pixels in the true footprint (area_km2 of
+#                 each row)
+
+def class_fractions(table, columns, denominator='total', area_km2=None):
+    counts = np.column_stack([np.nan_to_num(np.asarray(table[c], dtype=np.float64)) for c in columns])
+    if denominator == 'total':
+        d = counts.sum(axis=1)
+    elif denominator == 'nominal':
+        d = np.full(len(counts), float(nominal_pixels))
+    elif denominator == 'footprint':
+        d = np.asarray(area_km2, dtype=np.float64) * 1e6 / landsat_pixel_m2
+    else:
+        raise ValueError('denominator must be total, nominal or footprint: ' + str(denominator))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return counts / d[:, None]
+
+
+if __name__ == '__main__':
+
+    from ak_functions import read_table, write_table
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\data"
+
+    # Local variables
+    years = range(2002, 2017)
+    sample_column = 'sample'  # MxD14A1 'sample' band; nadir footprint if missing
+    band_width = 1.0  # degrees of latitude per lookup band
+    # ********************************************************
+
+    ts0 = time.time()
+
+    for year in years:
+        file_in = os.path.join(path_in, "mxd14a1_gee_" + str(year) + "_plus_fires_compact.csv")
+        if not os.path.exists(file_in):
+            continue
+        x = read_table(file_in)
+        classes = class_columns(x)
+        sample = x[sample_column] if sample_column in x else np.full(len(x['latitude']), np.nan)
+
+        fp = footprint_lookup(sample, x['latitude'], band_width)
+        frac = class_fractions(x, classes)
+        coverage = class_fractions(x, classes, 'nominal').sum(axis=1)
+
+        out = dict((c, v) for c, v in x.items() if c not in classes)
+        for j, c in enumerate(classes):
+            out['frac_' + c] = frac[:, j]
+        out.update(fp)
+        out['evt_coverage'] = coverage
+        file_out = file_in.replace("_compact.csv", "_footprint.csv")
+        write_table(file_out, out, [c for c in x if c not in classes] + ['frac_' + c for c in classes] +
+                    footprint_columns + ['evt_coverage'])
+        print(str(year) + ': ' + str(len(x['latitude'])) + ' detections')
+
+    print('Done! Files written to: ')
+    print(path_in)
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
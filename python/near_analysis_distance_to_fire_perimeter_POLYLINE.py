@@ -44,6 +44,10 @@
 
 # ----------------------------------------------------------
 #  Output:   D:\\projects\\Fire_AK_reburn\\data\\temp
+#  reburns_x2_near_analysis_summary.csv  (output_mode = 'summary')
+#    one row per pair: count, mean, max, quantiles and a histogram of
+#    NEAR_DIST (see distance_summary.py); the points are not kept
+#  or, with output_mode = 'points':
 #  reburns_x2_near_analysis_.shp
 #
 # Process:
@@ -55,7 +59,8 @@
 # - Intersect reburn with older fire to get reburn perimeter in newer fire only
 # - Convert reburn polygon to polyline
 # - Get portion of reburn perimeter that excludes intersected perimeter portion
-# - Generate points along that perimeter
+# - Generate points at a fixed spacing along that perimeter (densify.py), so
+#   the number of points depends on its length, not on its vertices
 # - Calculate distance of each point to line within newer fire (i.e., the
 #   shortest distance from one "side" of the reburn polygon to the other)
 
@@ -74,6 +79,9 @@
 # Import arcpy module
 import arcpy, os, time
 from arcpy import env
+from pair_telemetry import PairTelemetry, arc_vertex_count
+from distance_summary import SummaryTable
+from densify import densify, arc_line_coords
 
 # Set to overwrite
 arcpy.env.overwriteOutput = True
@@ -86,8 +94,16 @@ ws = os.path.join(arcpy.env.workspace, "temp")
 
 # Local variables
 reburn_num = 2  # reburn number of interest (will look for this and n-1)
+point_spacing = 500  # m between points along the remaining reburn perimeter
+max_points = None  # cap on points per pair (spacing is widened past it); None for no cap
+output_mode = 'summary'  # 'summary': per-pair distance summaries; 'points': also merge every point
+summary_probs = (0.5, 0.9, 0.95)  # quantiles in the summary
+bin_width = 100  # m, histogram bins in the summary
+n_bins = 50  # last bin holds everything beyond (n_bins - 1) * bin_width
 filename_add = "_allfids"  # tag for filename
 out_shp_name = "reburns_x" + str(reburn_num) + "_near_analysis" + filename_add + ".shp"
+summary_name = "reburns_x" + str(reburn_num) + "_near_analysis" + filename_add + "_summary.csv"
+telemetry_name = "reburns_x" + str(reburn_num) + "_near_analysis" + filename_add + "_telemetry.jsonl"
 # ********************************************************
 
 pt_file = "processed_x.shp"
@@ -112,8 +128,10 @@ fcs_list = []
 # Initialize counter
 n_poly = 0
 
-# Start the clock
+# Start the clock; per-stage and per-pair times go to the telemetry log
 ts0 = time.time()
+telemetry = PairTelemetry(os.path.join(ws, telemetry_name))
+summaries = SummaryTable(os.path.join(ws, summary_name), summary_probs, bin_width, n_bins)
 
 # Step through all rows in the POINTS layer
 cursor = arcpy.SearchCursor("pt_lyr")
@@ -142,42 +160,55 @@ for row in cursor:
                 sql_both_polys = '"parentid" = ' + str(older_parent_id) + ' OR "parentid" = ' + str(newer_parent_id)
                 print '----------------------------------'
                 print 'Processing fire FIDs ' + str(older_parent_id) + ' and ' + str(newer_parent_id)
+                telemetry.start_pair(n_poly, older_parent_id, newer_parent_id)
 
             # Older fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
 
             # Newer fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                telemetry.add_vertices(arc_vertex_count("in_memory/older_fc") + arc_vertex_count("in_memory/newer_fc"))
 
             # Intersect older and newer fire polygons to get overlapping sections (reburn areas)
-                arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_poly", "ALL")
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_poly", "ALL")
 
             # Intersect older fire and reburn area to get perimeter of older fire within newer burn
                 shared_line = os.path.join(ws, "shared_line" + str(n_poly) + ".shp")
-                arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/reburn_poly"], shared_line, "ALL", "#", "LINE")
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/reburn_poly"], shared_line, "ALL", "#", "LINE")
 
             # Convert reburn polygon to polyline
-                arcpy.PolygonToLine_management("in_memory/reburn_poly", "in_memory/reburn_line")
+                with telemetry.stage('lines'):
+                    arcpy.PolygonToLine_management("in_memory/reburn_poly", "in_memory/reburn_line")
 
             # Get section of reburn perimeter that excludes previously id'd shared line
                 inverse_line = os.path.join(ws, "inverse_line" + str(n_poly) + ".shp")
-                arcpy.SymDiff_analysis("in_memory/reburn_line", shared_line, inverse_line)
+                with telemetry.stage('lines'):
+                    arcpy.SymDiff_analysis("in_memory/reburn_line", shared_line, inverse_line)
 
-            # Generate points along the inverse intersection line
+            # Generate points every point_spacing m along the inverse intersection line
                 print 'generating points'
                 inverse_pts = os.path.join(ws, "inverse_pts" + str(n_poly) + ".shp")
-                arcpy.GeneratePointsAlongLines_management(inverse_line, inverse_pts, 'DISTANCE', Distance='500 meters')
+                with telemetry.stage('points'):
+                    coords, offsets = arc_line_coords(inverse_line)
+                    points, _ = densify(coords, offsets, point_spacing, max_points=max_points)
+                    arcpy.CreateFeatureclass_management(ws, os.path.basename(inverse_pts), "POINT",
+                                                        spatial_reference=inverse_line)
+                    with arcpy.da.InsertCursor(inverse_pts, ["SHAPE@XY"]) as pts_cursor:
+                        for xy in points:
+                            pts_cursor.insertRow([(xy[0], xy[1])])
 
             # Get distance from each point on the line to the intersected line. This is the distance of newer fire within older
                 print 'getting distance'
-                arcpy.Near_analysis(inverse_pts, shared_line, "#", "LOCATION", "ANGLE")
-
-            # Add id fields (older, newer fire IDs) to each point.  Otherwise no way to tell
-            # which points are associated with which fires
-                arcpy.AddField_management(inverse_pts, "parentid1", "LONG")
-                arcpy.AddField_management(inverse_pts, "parentid2", "LONG")
+                with telemetry.stage('near'):
+                    arcpy.Near_analysis(inverse_pts, shared_line, "#", "LOCATION", "ANGLE")
 
             # Get parent ids from intersected line shapefile
                 newrows = arcpy.SearchCursor(shared_line)
@@ -185,24 +216,44 @@ for row in cursor:
                     parent_id1 = newrow.getValue("parentid")
                     parent_id2 = newrow.getValue("parentid_2")
 
-            # Populate fields in points shapefile
-                arcpy.CalculateField_management(inverse_pts, "parentid1", "\"" + str(parent_id1) + "\"", "PYTHON")
-                arcpy.CalculateField_management(inverse_pts, "parentid2", "\"" + str(parent_id2) + "\"", "PYTHON")
-
-            # Add perimeter shapefile to list
-                fcs_list.append(os.path.join(ws, inverse_pts))
+            # Summarize the distances of this pair as they are read
+                with telemetry.stage('summary'):
+                    summary = summaries.summary()
+                    for pt in arcpy.da.SearchCursor(inverse_pts, ['NEAR_DIST']):
+                        if pt[0] >= 0:  # -1: no line found
+                            summary.add(pt[0])
+                    summaries.write(parent_id1, parent_id2, summary)
+
+                if output_mode == 'points':
+                # Add id fields (older, newer fire IDs) to each point.  Otherwise no way to tell
+                # which points are associated with which fires
+                    with telemetry.stage('write'):
+                        arcpy.AddField_management(inverse_pts, "parentid1", "LONG")
+                        arcpy.AddField_management(inverse_pts, "parentid2", "LONG")
+
+                # Populate fields in points shapefile
+                    with telemetry.stage('write'):
+                        arcpy.CalculateField_management(inverse_pts, "parentid1", "\"" + str(parent_id1) + "\"", "PYTHON")
+                        arcpy.CalculateField_management(inverse_pts, "parentid2", "\"" + str(parent_id2) + "\"", "PYTHON")
+
+                # Add perimeter shapefile to list
+                    fcs_list.append(os.path.join(ws, inverse_pts))
+                else:
+                    arcpy.Delete_management(inverse_pts)
 
             # Clean up
                 print 'Deleting memory...'
                 arcpy.Delete_management('in_memory')
                 arcpy.Delete_management(shared_line)
                 arcpy.Delete_management(inverse_line)
+                telemetry.end_pair()
 
-    except:
+    except Exception as e:
         print ' ** Could not save polygon ' + str(poly_id)
         ts1 = time.time()
         print 'Time elapsed is: ' + str(ts1 - ts0)
         print arcpy.GetMessages()
+        telemetry.fail_pair(arcpy.GetMessages(2) or e)
         continue
 
 
@@ -211,18 +262,21 @@ print ' ====================================================='
 print ' ====================================================='
 print 'Total number of processed polygons ' + str(n_poly)
 
-# Merge shapes
-print 'Merging all shapes...'
+summaries.close()
+
+if output_mode == 'points':
+    # Merge shapes
+    print 'Merging all shapes...'
 
-# Populate list with copy of first shapefile
-sample_fcs = fcs_list[0]
-arcpy.CopyFeatures_management(sample_fcs, os.path.join(ws, out_shp_name))
+    # Populate list with copy of first shapefile
+    sample_fcs = fcs_list[0]
+    arcpy.CopyFeatures_management(sample_fcs, os.path.join(ws, out_shp_name))
 
-# Iterate through all but the 1st element
-iterfcs = iter(fcs_list)
-next(iterfcs)
-for fc in iterfcs:
-    arcpy.Append_management([fc], os.path.join(ws, out_shp_name), "NO_TEST")
+    # Iterate through all but the 1st element
+    iterfcs = iter(fcs_list)
+    next(iterfcs)
+    for fc in iterfcs:
+        arcpy.Append_management([fc], os.path.join(ws, out_shp_name), "NO_TEST")
 
 # Clean up
 print 'Deleting files...'
@@ -232,10 +286,13 @@ for fc in fcs_list:
     arcpy.Delete_management(fc)
 
 print 'Done! Files written to: '
-print os.path.join(ws, out_shp_name)
+print os.path.join(ws, summary_name)
+if output_mode == 'points':
+    print os.path.join(ws, out_shp_name)
 
 ts1 = time.time()
 print 'Time elapsed: ' + str(ts1 - ts0) + ' seconds'
 
-
-
+telemetry.print_summary()
+telemetry.close()
+print 'Telemetry written to: ' + os.path.join(ws, telemetry_name)
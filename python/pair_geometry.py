@@ -0,0 +1,120 @@
+# ---------------------------------------------------------------------------
+# pair_geometry.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Shapely versions of the per-pair geometry steps in the pair scripts, so
+# they can be run (and timed) without an Arc session. Each function takes
+# the older and newer fire polygons of one burn/reburn pair:
+#
+#   union_pieces    - union_fire_pairs.py: older-only, newer-only and
+#                     reburn pieces
+#   shared_edge     - shared_edges_SHAPEFILE.py: older fire border within
+#                     the newer fire
+#   shared_edge_lengths - shared_edges_TABLE.py (length_only): length of
+#                     each fire's border within the other, for many pairs
+#   core_area       - core_areas_BUFFERED.py: reburn beyond an inward
+#                     buffer of the older fire
+#   near_distances  - near_analysis_distance_to_fire_perimeter_POLYLINE.py:
+#                     distance from points along the remaining reburn
+#                     perimeter to the shared border
+#
+# Geometries are assumed to be in a projected coordinate system in meters
+# (NAD 1983 Alaska Albers).
+# -----------------------------------------------------------------------
+
+import numpy as np
+import shapely
+
+from densify import densify
+
+# Square meters to acres
+sqm2ac = 0.000247105
+
+
+# ----------------- union_pieces --------------------------------------
+
+# Union of the two fires as separate pieces, like Union_analysis. Returns
+# a list of (status, geometry) for the non-empty pieces:
+#   'burn'   - older fire only
+#   'newer'  - newer fire only
+#   'reburn' - both fires
+
+def union_pieces(older, newer):
+    pieces = [('burn', older.difference(newer)),
+              ('newer', newer.difference(older)),
+              ('reburn', older.intersection(newer))]
+    return [(status, geom) for status, geom in pieces if not geom.is_empty and geom.area > 0]
+
+
+# ----------------- shared_edge ---------------------------------------
+
+# Border of the older fire inside the newer fire (line geometry)
+
+def shared_edge(older, newer):
+    return shapely.line_merge(older.boundary.intersection(newer))
+
+
+# ----------------- shared_edge_lengths -------------------------------
+
+# Length (m) of the older fire border inside the newer fire, and of the
+# newer fire border inside the older fire. older and newer may be arrays
+# of polygons (one pair per element); no line geometry is kept.
+
+def shared_edge_lengths(older, newer):
+    older_in_newer = shapely.length(shapely.intersection(shapely.boundary(older), newer))
+    newer_in_older = shapely.length(shapely.intersection(shapely.boundary(newer), older))
+    return older_in_newer, newer_in_older
+
+
+# ----------------- core_area -----------------------------------------
+
+# Reburn area more than abs(buffer_size) m inside the older fire.
+# buffer_size is negative for an inward buffer, as in core_areas_BUFFERED.py
+
+def core_area(older, newer, buffer_size=-500):
+    reburn = older.intersection(newer)
+    return older.buffer(buffer_size).intersection(reburn)
+
+
+# ----------------- near_distances ------------------------------------
+
+# Distances that the newer fire penetrated into the older one. Points are
+# placed every 'spacing' m along the reburn perimeter that is not shared
+# with the older fire border (at most max_points of them, see densify.py),
+# and the distance from each point to the shared border is returned along
+# with the points.
+
+def near_distances(older, newer, spacing=500, max_points=None):
+    reburn = older.intersection(newer)
+    shared_line = older.boundary.intersection(reburn)
+    if reburn.is_empty or shared_line.is_empty:
+        return np.empty((0, 2)), np.empty(0)
+
+    inverse_line = reburn.boundary.difference(shared_line)
+    points = points_along_lines(inverse_line, spacing, max_points)
+    dist = shapely.distance(shapely.points(points), shared_line)
+    return points, dist
+
+
+# ----------------- points_along_lines --------------------------------
+
+# Points every 'spacing' m along each part of a (multi)line, starting at the
+# beginning of each part (GeneratePointsAlongLines, 'DISTANCE'). With
+# max_points, the spacing is widened so there are no more than that.
+
+def points_along_lines(lines, spacing, max_points=None):
+    parts = shapely.get_parts(lines)
+    parts = parts[shapely.get_type_id(parts) == 1]
+    if len(parts) == 0:
+        return np.empty((0, 2))
+    offsets = np.concatenate([[0], np.cumsum(shapely.get_num_coordinates(parts))])
+    points, _ = densify(shapely.get_coordinates(parts), offsets, spacing, max_points=max_points)
+    return points
+
+
+# ----------------- count_vertices ------------------------------------
+
+def count_vertices(*geoms):
+    return int(sum(shapely.get_num_coordinates(g) for g in geoms))
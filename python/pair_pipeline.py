@@ -0,0 +1,247 @@
+# ---------------------------------------------------------------------------
+# pair_pipeline.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Runs the per-pair loop as a three-stage pipeline so reading the next
+# pairs' fires and writing the last pairs' results overlap with the
+# geometry work on the current pair:
+#
+#   reader thread   read(item) for the upcoming items -> bounded queue
+#   main thread     compute(item, data) -> bounded queue
+#   writer thread   write(item, result)
+#
+# Most of the time of a serial pair loop on a network share (D:\\projects,
+# J:\\Base_data) is spent waiting on reads; with the pipeline the wait for
+# pair n + 1 happens while pair n computes. The queues are bounded (depth),
+# so the reader never gets more than 'depth' pairs ahead and memory stays
+# flat however many pairs there are.
+#
+# Usage:
+#
+#   stats = run_pipeline(pairs, read_pair, compute_pair, write_pair, depth=8)
+#
+# Errors: if read or compute fails for an item, on_error(item, exception)
+# is called (if given) and the item is skipped, like the try/except in
+# the pair scripts; without on_error the exception stops the run. A failure
+# in write always stops the run. Either way the threads are shut down
+# before run_pipeline returns or raises.
+#
+# Notes:
+# - Pure python with no dependencies, so it runs under ArcMap's python 2.7
+#   as well as python 3. arcpy calls are not thread safe: keep them all in
+#   one of the three functions (normally compute)
+# - Threads (not processes) are the right tool here: the reader and writer
+#   spend their time in I/O, which releases the GIL, and so do the GEOS
+#   calls in compute
+# -----------------------------------------------------------------------
+
+from __future__ import print_function, division
+
+import os
+import threading
+import time
+
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
+
+# Queue markers
+_DONE = object()
+_FAILED = object()
+
+
+# ----------------- run_pipeline --------------------------------------
+
+# Run read -> compute -> write over items. Returns a dict of counts and of
+# the time the main thread spent waiting for input and for the writer.
+
+def run_pipeline(items, read, compute, write, depth=8, on_error=None):
+    inbox = queue.Queue(maxsize=depth)
+    outbox = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    reader_error = []
+    writer_error = []
+
+    # Errors from read() go to compute with their item; an error from
+    # iterating items ends the input and is raised to the caller
+    def reader():
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                try:
+                    data = read(item)
+                except Exception as e:
+                    data = (_FAILED, e)
+                _put(inbox, (item, data), stop)
+        except Exception as e:
+            reader_error.append(e)
+        finally:
+            _put(inbox, _DONE, stop)
+
+    def writer():
+        while True:
+            msg = outbox.get()
+            if msg is _DONE:
+                return
+            try:
+                write(*msg)
+            except Exception as e:
+                writer_error.append(e)
+                stop.set()
+                return
+
+    threads = [threading.Thread(target=reader), threading.Thread(target=writer)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+
+    stats = {'items': 0, 'failed': 0, 'wait_read_s': 0.0, 'compute_s': 0.0, 'wait_write_s': 0.0}
+    try:
+        while not stop.is_set():
+            t0 = time.time()
+            msg = inbox.get()
+            stats['wait_read_s'] += time.time() - t0
+            if msg is _DONE:
+                break
+            item, data = msg
+            stats['items'] += 1
+
+            t0 = time.time()
+            try:
+                if isinstance(data, tuple) and len(data) == 2 and data[0] is _FAILED:
+                    raise data[1]
+                result = compute(item, data)
+            except Exception as e:
+                stats['failed'] += 1
+                if on_error is None:
+                    raise
+                on_error(item, e)
+                continue
+            finally:
+                stats['compute_s'] += time.time() - t0
+
+            t0 = time.time()
+            if not _put(outbox, (item, result), stop):
+                break
+            stats['wait_write_s'] += time.time() - t0
+    finally:
+        # Stop the reader, let the writer flush what it has, wait for both
+        stop.set()
+        _drain(inbox)
+        while threads[1].is_alive():
+            try:
+                outbox.put(_DONE, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        for t in threads:
+            t.join()
+
+    if reader_error:
+        raise reader_error[0]
+    if writer_error:
+        raise writer_error[0]
+    return stats
+
+
+# Put that gives up when the pipeline is stopping. Returns False if it
+# gave up.
+
+def _put(q, msg, stop):
+    while True:
+        try:
+            q.put(msg, timeout=0.1)
+            return True
+        except queue.Full:
+            if stop.is_set():
+                return False
+
+
+def _drain(q):
+    while True:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            return
+
+
+if __name__ == '__main__':
+
+    import csv
+
+    import numpy as np
+
+    from ak_functions import read_table
+    from geometry_store import GeometryStore
+    from pair_geometry import union_pieces, shared_edge_lengths, sqm2ac
+    from pair_telemetry import PairTelemetry
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\data"
+    pairs_in = "processed_x_pairs2.csv"
+    store_path = "D:\\projects\\ak_fire\\data\\perimeter_store"  # geometry_store.py
+    out_csv = "reburns_x2_pair_summary.csv"
+
+    # Local variables
+    depth = 8  # pairs read ahead / waiting to be written
+    # ********************************************************
+
+    ts0 = time.time()
+
+    pairs = read_table(os.path.join(path_in, pairs_in))
+    store = GeometryStore.open(store_path)
+    telemetry = PairTelemetry(os.path.join(path_in, out_csv.replace(".csv", "_telemetry.jsonl")))
+    items = list(zip(range(len(pairs['polyid'])), pairs['polyid'].astype(np.int64),
+                     pairs['older_parentid'].astype(np.int64), pairs['newer_parentid'].astype(np.int64)))
+
+    # Reader: both fires of the pair
+    def read_pair(item):
+        n, polyid, older_id, newer_id = item
+        return store.geometry(older_id), store.geometry(newer_id)
+
+    # Main thread: union pieces and shared border lengths
+    def compute_pair(item, data):
+        n, polyid, older_id, newer_id = item
+        older, newer = data
+        telemetry.start_pair(n, older_id, newer_id)
+        with telemetry.stage('union'):
+            areas = dict((status, geom.area * sqm2ac) for status, geom in union_pieces(older, newer))
+        with telemetry.stage('lines'):
+            older_in_newer, newer_in_older = shared_edge_lengths(older, newer)
+        telemetry.end_pair()
+        return [polyid, older_id, newer_id, areas.get('burn', 0), areas.get('newer', 0),
+                areas.get('reburn', 0), older_in_newer, newer_in_older]
+
+    f = open(os.path.join(path_in, out_csv), 'w')
+    out = csv.writer(f, lineterminator='\n')
+    out.writerow(['polyid', 'older_parentid', 'newer_parentid', 'burn_ac', 'newer_ac', 'reburn_ac',
+                  'older_in_newer_m', 'newer_in_older_m'])
+
+    # Writer: one csv row per pair
+    def write_pair(item, row):
+        out.writerow(row)
+
+    def skip_pair(item, e):
+        print(' ** Could not process pair ' + str(item[2]) + '/' + str(item[3]) + ': ' + str(e))
+        if telemetry.pair is None:  # failed in read_pair
+            telemetry.start_pair(*item[0:1] + item[2:])
+        telemetry.fail_pair(e)
+
+    stats = run_pipeline(items, read_pair, compute_pair, write_pair, depth, skip_pair)
+    f.close()
+
+    print('Pairs: ' + str(stats['items']) + ', failed: ' + str(stats['failed']))
+    print('Waiting on reads: ' + str(stats['wait_read_s']) + ' s, computing: ' + str(stats['compute_s']) +
+          ' s, waiting on writes: ' + str(stats['wait_write_s']) + ' s')
+    telemetry.print_summary()
+    telemetry.close()
+    print('Done! Files written to: ')
+    print(os.path.join(path_in, out_csv))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,192 @@
+# ---------------------------------------------------------------------------
+# pair_telemetry.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Lightweight timing and failure records for the pair scripts. Wall and
+# CPU time are recorded per stage (select, copy, intersect, union, buffer,
+# near, write) and per pair, together with vertex counts and the reason a
+# pair failed. Records are written as JSON lines as they happen, so a run
+# that dies part way still leaves a usable log, and a summary with latency
+# percentiles is printed at the end.
+#
+# Usage (see union_fire_pairs.py):
+#
+#   telemetry = PairTelemetry(os.path.join(ws, "union_telemetry.jsonl"))
+#   ...
+#   telemetry.start_pair(n_poly, older_parent_id, newer_parent_id)
+#   with telemetry.stage('union'):
+#       arcpy.Union_analysis(...)
+#   telemetry.add_vertices(n)
+#   telemetry.end_pair()             # or telemetry.fail_pair(reason)
+#   ...
+#   telemetry.print_summary()
+#   telemetry.close()
+#
+# Each line of the log is one record:
+#
+# {"type": "stage", "pair": 12, "stage": "union", "wall_s": 0.84, "cpu_s": 0.31, "ok": true}
+# {"type": "pair", "pair": 12, "older": 660, "newer": 1040, "wall_s": 3.2, "cpu_s": 1.1,
+#  "vertices": 5120, "status": "ok", "error": null}
+#
+# Notes:
+# - Pure python with no dependencies so it runs under ArcMap's python 2.7
+#   as well as python 3
+# -----------------------------------------------------------------------
+
+from __future__ import print_function, division
+
+import json
+import time
+from contextlib import contextmanager
+
+# CPU time of this process; time.clock is the python 2 equivalent
+try:
+    _cpu_time = time.process_time
+except AttributeError:
+    _cpu_time = time.clock
+
+
+# ----------------- percentile ----------------------------------------
+
+# Linearly interpolated percentile (0-100) of a list of numbers
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+# ----------------- PairTelemetry -------------------------------------
+
+class PairTelemetry(object):
+
+    def __init__(self, log_file=None, echo=False):
+        self.log = open(log_file, 'a') if log_file else None
+        self.echo = echo
+        self.stage_times = {}   # stage -> list of wall times
+        self.stage_cpu = {}     # stage -> list of cpu times
+        self.pairs = []         # pair records
+        self.failures = {}      # reason -> count
+        self.pair = None
+        self.t_start = time.time()
+
+    def _write(self, record):
+        if self.log:
+            self.log.write(json.dumps(record) + '\n')
+            self.log.flush()
+
+    # Start timing a pair. Any pair still open is closed as ok first.
+    def start_pair(self, pair_id, older=None, newer=None):
+        if self.pair is not None:
+            self.end_pair()
+        self.pair = {'type': 'pair', 'pair': pair_id, 'older': older, 'newer': newer,
+                     'vertices': 0, 'status': 'ok', 'error': None,
+                     '_t0': time.time(), '_c0': _cpu_time()}
+
+    def add_vertices(self, n):
+        if self.pair is not None:
+            self.pair['vertices'] += int(n)
+
+    # Time the enclosed block as one stage of the current pair. Exceptions
+    # are recorded against the stage and re-raised.
+    @contextmanager
+    def stage(self, name):
+        t0, c0 = time.time(), _cpu_time()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            wall, cpu = time.time() - t0, _cpu_time() - c0
+            self.stage_times.setdefault(name, []).append(wall)
+            self.stage_cpu.setdefault(name, []).append(cpu)
+            pair_id = self.pair['pair'] if self.pair else None
+            self._write({'type': 'stage', 'pair': pair_id, 'stage': name,
+                         'wall_s': wall, 'cpu_s': cpu, 'ok': ok})
+            if self.pair is not None and not ok:
+                self.pair['stage_failed'] = name
+
+    def end_pair(self, status='ok', error=None):
+        if self.pair is None:
+            return
+        p = self.pair
+        self.pair = None
+        p['wall_s'] = time.time() - p.pop('_t0')
+        p['cpu_s'] = _cpu_time() - p.pop('_c0')
+        p['status'] = status
+        p['error'] = error
+        self.pairs.append(p)
+        self._write(p)
+        if self.echo:
+            print('  pair ' + str(p['pair']) + ': ' + status + ' in %.2f s' % p['wall_s'])
+
+    # Close the current pair as failed. The reason is the first line of the
+    # error (e.g., str(exception) or arcpy.GetMessages(2)).
+    def fail_pair(self, reason):
+        reason = str(reason).strip().split('\n')[0] or 'unknown error'
+        if self.pair is not None and 'stage_failed' in self.pair:
+            reason = self.pair['stage_failed'] + ': ' + reason
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+        self.end_pair('failed', reason)
+
+    def summary(self, n_slowest=10):
+        ok = [p for p in self.pairs if p['status'] == 'ok']
+        pair_wall = [p['wall_s'] for p in self.pairs]
+        stages = {}
+        for name, times in self.stage_times.items():
+            stages[name] = {'n': len(times), 'total_s': sum(times), 'cpu_s': sum(self.stage_cpu[name]),
+                            'p50_s': percentile(times, 50), 'p90_s': percentile(times, 90),
+                            'p99_s': percentile(times, 99), 'max_s': max(times)}
+        slowest = sorted(self.pairs, key=lambda p: p['wall_s'], reverse=True)[:n_slowest]
+        return {'elapsed_s': time.time() - self.t_start,
+                'n_pairs': len(self.pairs), 'n_ok': len(ok), 'n_failed': len(self.pairs) - len(ok),
+                'pair_p50_s': percentile(pair_wall, 50), 'pair_p90_s': percentile(pair_wall, 90),
+                'pair_p99_s': percentile(pair_wall, 99),
+                'stages': stages, 'failures': self.failures,
+                'slowest': [(p['pair'], p['older'], p['newer'], p['wall_s'], p['vertices']) for p in slowest]}
+
+    def print_summary(self, n_slowest=10):
+        s = self.summary(n_slowest)
+        self._write(dict(type='summary', **s))
+        print(' =====================================================')
+        print('Pairs: ' + str(s['n_pairs']) + ' (' + str(s['n_failed']) + ' failed)  '
+              'elapsed %.1f s' % s['elapsed_s'])
+        if s['n_pairs']:
+            print('Pair latency  p50 %.2f s  p90 %.2f s  p99 %.2f s' % (s['pair_p50_s'], s['pair_p90_s'], s['pair_p99_s']))
+        print('%-10s %7s %10s %10s %8s %8s %8s %8s' % ('stage', 'n', 'total_s', 'cpu_s', 'p50_s', 'p90_s', 'p99_s', 'max_s'))
+        for name, st in sorted(s['stages'].items(), key=lambda kv: -kv[1]['total_s']):
+            print('%-10s %7d %10.1f %10.1f %8.2f %8.2f %8.2f %8.2f' % (
+                name, st['n'], st['total_s'], st['cpu_s'], st['p50_s'], st['p90_s'], st['p99_s'], st['max_s']))
+        if s['slowest']:
+            print('Slowest pairs (pair, older, newer, s, vertices):')
+            for row in s['slowest']:
+                print('  %s %s %s %.2f %d' % row)
+        if s['failures']:
+            print('Failures:')
+            for reason, n in sorted(s['failures'].items(), key=lambda kv: -kv[1]):
+                print('  %5d  %s' % (n, reason))
+
+    def close(self):
+        if self.pair is not None:
+            self.end_pair()
+        if self.log:
+            self.log.close()
+            self.log = None
+
+
+# ----------------- arc_vertex_count ----------------------------------
+
+# Total number of vertices in an Arc feature class or layer
+
+def arc_vertex_count(fc):
+    import arcpy
+    with arcpy.da.SearchCursor(fc, ["SHAPE@"]) as cursor:
+        return sum(row[0].pointCount for row in cursor if row[0] is not None)
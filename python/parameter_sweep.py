@@ -0,0 +1,360 @@
+# ---------------------------------------------------------------------------
+# parameter_sweep.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Runs the pair analyses for a grid of parameter combinations in one
+# process, in place of editing the INPUT REQUIRED HERE block (reburn_num,
+# buffer_size, filename_add...) and starting a new interpreter, which reads
+# every perimeter again, for each configuration.
+#
+# The perimeters (geometry_store.py) are opened and the point table is
+# read and put in burn order once. Every combination of the grid is then
+# run in this process (the default) or on a pool of workers (processes >
+# 1); workers get the burn-ordered table once, when they start, and reopen
+# the memory-mapped store rather than copying it.
+#
+# Each stage only depends on some of the parameters, and it is run once
+# per distinct combination of those: with reburn_num [2, 3] and
+# buffer_size [-250, -500], 'union' runs twice and 'core_area' four times.
+#
+# With a cache_dir (stage_cache.py), the burn order and every stage run
+# are stored under a key from the store and point files, the stage's
+# parameters and the source of the modules that compute it. A later sweep
+# that changes only buffer_size reruns only core_area; the other stages,
+# and anything computed before with the same parameters, are read back.
+#
+# Usage:
+#
+#   python parameter_sweep.py sweep.json
+#   python parameter_sweep.py sweep.json --set buffer_size=-250,-500,-1000 --processes 4
+#
+# sweep.json:
+#
+#   {"store": "D:\\projects\\ak_fire\\data\\perimeter_store",
+#    "points": "D:\\projects\\ak_fire\\data\\firePerimeters_1940_2016_dates_for_each_burn.csv",
+#    "out_dir": "D:\\projects\\ak_fire\\data\\sweep",
+#    "stages": ["pairs", "union", "shared_edges", "core_area", "near"],
+#    "grid": {"reburn_num": [2, 3], "buffer_size": [-250, -500], "spacing": [500]},
+#    "processes": 4,
+#    "cache_dir": "D:\\projects\\ak_fire\\cache"}
+#
+# Parameters missing from the grid take their defaults (default_params).
+#
+# ----------------------------------------------------------
+#  Output: in out_dir, one csv per stage and parameter combination, named
+#  from the stage and the parameters it uses, sorted by name:
+#
+#   core_area__buffer_size_-500__reburn_num_2.csv
+#   near__max_points_None__reburn_num_2__spacing_500.csv
+#
+#  plus sweep_runs.csv listing every run (stage, parameters, file, pairs,
+#  failed pairs, seconds, whether it came from the cache).
+#
+# Notes:
+# - A pair that fails (invalid geometry, fire missing from the store) is
+#   left out of its stage's output and counted in sweep_runs.csv
+# -----------------------------------------------------------------------
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import read_table, write_table
+from assign_burn_order import assign_burn_order, get_reburn_pairs, pair_columns
+from distance_summary import DistanceSummary, summary_columns
+from geometry_store import GeometryStore
+from pair_geometry import union_pieces, shared_edge_lengths, near_distances, sqm2ac
+from stage_cache import StageCache
+
+default_params = {'reburn_num': 2, 'min_acres': 5, 'buffer_size': -500, 'spacing': 500, 'max_points': None}
+
+run_columns = ['stage', 'params', 'file', 'pairs', 'failed', 'seconds', 'cached']
+
+# Set in each worker (or in this process for serial runs)
+_worker = {}
+
+
+# ----------------- stages --------------------------------------------
+#
+# Each stage takes the pair table, the older and newer fire geometries of
+# every pair (arrays) and the parameters, and returns (table, columns,
+# number of failed pairs).
+
+def pairs_stage(pairs, older, newer, params):
+    return pairs, pair_columns, 0
+
+
+# Area (acres) of the older-only, newer-only and reburn pieces
+# (union_fire_pairs.py)
+def union_stage(pairs, older, newer, params):
+    out = dict((name, []) for name in ['burn_ac', 'newer_ac', 'reburn_ac'])
+    ok = np.zeros(len(older), dtype=bool)
+    for k in range(len(older)):
+        try:
+            areas = dict((status, geom.area * sqm2ac) for status, geom in union_pieces(older[k], newer[k]))
+        except Exception:
+            continue
+        ok[k] = True
+        out['burn_ac'].append(areas.get('burn', 0))
+        out['newer_ac'].append(areas.get('newer', 0))
+        out['reburn_ac'].append(areas.get('reburn', 0))
+    return _with_keys(pairs, ok, out), _key_columns + ['burn_ac', 'newer_ac', 'reburn_ac'], int((~ok).sum())
+
+
+# Length (m) of each fire's border within the other (shared_edges_TABLE.py)
+def shared_edges_stage(pairs, older, newer, params):
+    older_in_newer, newer_in_older = shared_edge_lengths(older, newer)
+    ok = np.ones(len(older), dtype=bool)
+    out = {'older_in_newer_m': older_in_newer, 'newer_in_older_m': newer_in_older}
+    return _with_keys(pairs, ok, out), _key_columns + ['older_in_newer_m', 'newer_in_older_m'], 0
+
+
+# Reburn area beyond an inward buffer of the older fire
+# (core_areas_BUFFERED.py)
+def core_area_stage(pairs, older, newer, params):
+    reburn = shapely.intersection(older, newer)
+    core = shapely.intersection(shapely.buffer(older, params['buffer_size']), reburn)
+    ok = np.ones(len(older), dtype=bool)
+    out = {'reburn_ac': shapely.area(reburn) * sqm2ac, 'core_ac': shapely.area(core) * sqm2ac}
+    return _with_keys(pairs, ok, out), _key_columns + ['reburn_ac', 'core_ac'], 0
+
+
+# Summary of the distances the newer fire penetrated into the older one
+# (near_analysis_distance_to_fire_perimeter_POLYLINE.py, summary output)
+def near_stage(pairs, older, newer, params):
+    columns = summary_columns()
+    out = dict((name, []) for name in columns)
+    ok = np.zeros(len(older), dtype=bool)
+    for k in range(len(older)):
+        try:
+            _, dist = near_distances(older[k], newer[k], params['spacing'], params['max_points'])
+        except Exception:
+            continue
+        ok[k] = True
+        summary = DistanceSummary()
+        summary.extend(dist.tolist())
+        for name, value in zip(columns, summary.row()):
+            out[name].append(np.nan if value is None else value)
+    return _with_keys(pairs, ok, out), _key_columns + columns, int((~ok).sum())
+
+
+# Stage name -> (function, parameters it depends on)
+stages = {'pairs': (pairs_stage, ['reburn_num', 'min_acres']),
+          'union': (union_stage, ['reburn_num', 'min_acres']),
+          'shared_edges': (shared_edges_stage, ['reburn_num', 'min_acres']),
+          'core_area': (core_area_stage, ['reburn_num', 'min_acres', 'buffer_size']),
+          'near': (near_stage, ['reburn_num', 'min_acres', 'spacing', 'max_points'])}
+
+_key_columns = ['polyid', 'older_parentid', 'newer_parentid']
+
+
+def _with_keys(pairs, ok, out):
+    table = dict((name, np.asarray(pairs[name])[ok]) for name in _key_columns)
+    table.update((name, np.asarray(values)) for name, values in out.items())
+    return table
+
+
+# ----------------- sweep_tasks ---------------------------------------
+
+# Distinct (stage, parameters) runs for a grid {name: [values]}: the
+# combinations of the parameters each stage depends on
+
+def sweep_tasks(stage_names, grid):
+    grid = dict((name, list(values)) for name, values in grid.items())
+    tasks = []
+    for stage in stage_names:
+        if stage not in stages:
+            raise ValueError('Unknown stage: ' + stage + ' (one of ' + ', '.join(sorted(stages)) + ')')
+        used = stages[stage][1]
+        names = [n for n in used if n in grid]
+        for values in itertools.product(*[grid[n] for n in names]):
+            params = dict((n, default_params[n]) for n in used)
+            params.update(zip(names, values))
+            if (stage, params) not in tasks:
+                tasks.append((stage, params))
+    return tasks
+
+
+# File name of a run: the stage and its parameters, sorted by name
+
+def run_name(stage, params):
+    return '__'.join([stage] + [name + '_' + str(params[name]) for name in sorted(params)]) + '.csv'
+
+
+# ----------------- run_sweep -----------------------------------------
+
+# Run every task on the burn-ordered point table x and the store, writing
+# each result to out_dir. Returns the sweep_runs table.
+#
+# With a StageCache, tasks already in it are read back rather than run,
+# and the others are stored as they finish; inputs are the files the
+# results depend on (the store and the point table). The cache is only
+# touched from this process.
+
+def run_sweep(tasks, x, store, out_dir, processes=1, cache=None, inputs=()):
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    code = stage_code()
+    todo = [t for t in tasks if cache is None or not cache.cached(t[0], inputs, t[1], code)]
+
+    # Cached runs first, before storing new ones can evict them
+    runs = {}
+    for task in tasks:
+        if task in todo:
+            continue
+        t0 = time.time()
+        result = cache.run(task[0], None, inputs, task[1], code)
+        _write_run(out_dir, task, result)
+        runs[run_name(*task)] = _run_record(task, result, time.time() - t0, True)
+    for task, (run, result) in zip(todo, _map_tasks(todo, x, store, processes)):
+        if cache is not None:
+            cache.run(task[0], lambda: result, inputs, task[1], code)
+        _write_run(out_dir, task, result)
+        runs[run_name(*task)] = run
+
+    runs = [runs[run_name(*task)] for task in tasks]
+    table = dict((name, [r[name] for r in runs]) for name in run_columns)
+    write_table(os.path.join(out_dir, 'sweep_runs.csv'), table, run_columns)
+    return table
+
+
+# Modules whose source is part of every stage's cache key
+def stage_code():
+    return [sys.modules[name] for name in (__name__, 'assign_burn_order', 'pair_geometry', 'densify',
+                                           'distance_summary')]
+
+
+# (run record, result) of each task, in order, from this process or a pool
+def _map_tasks(tasks, x, store, processes):
+    if not tasks:
+        return
+    if processes in (None, 1) or len(tasks) == 1:
+        _init_worker(x, store)
+        for task in tasks:
+            yield _run_task(task)
+        return
+    pool = multiprocessing.Pool(processes, _init_worker, (x, store))
+    try:
+        for out in pool.imap(_run_task, tasks, chunksize=1):
+            yield out
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _init_worker(x, store):
+    _worker.clear()
+    _worker.update(x=x, store=store, pairs={})
+
+
+# Pair table and fire geometries for reburn_num/min_acres, kept for the
+# next task with the same ones
+def _pair_data(reburn_num, min_acres):
+    key = (reburn_num, min_acres)
+    if key not in _worker['pairs']:
+        store = _worker['store']
+        pairs = get_reburn_pairs(_worker['x'], reburn_num, min_acres)
+        older_id = pairs['older_parentid'].astype(np.int64)
+        newer_id = pairs['newer_parentid'].astype(np.int64)
+        # Pairs with a fire missing from the store can't be run
+        found = np.isin(older_id, store.ids) & np.isin(newer_id, store.ids)
+        pairs = dict((name, col[found]) for name, col in pairs.items())
+        older = shapely.make_valid(store.geometries(older_id[found]))
+        newer = shapely.make_valid(store.geometries(newer_id[found]))
+        _worker['pairs'][key] = (pairs, older, newer, int((~found).sum()))
+    return _worker['pairs'][key]
+
+
+# Result of a task: (table, columns, pairs, failed pairs)
+def _run_task(task):
+    stage, params = task
+    t0 = time.time()
+    pairs, older, newer, missing = _pair_data(params['reburn_num'], params['min_acres'])
+    table, columns, failed = stages[stage][0](pairs, older, newer, params)
+    result = (table, columns, len(older), failed + missing)
+    return _run_record(task, result, time.time() - t0, False), result
+
+
+def _run_record(task, result, seconds, cached):
+    stage, params = task
+    return {'stage': stage, 'params': json.dumps(params, sort_keys=True), 'file': run_name(stage, params),
+            'pairs': result[2], 'failed': result[3], 'seconds': seconds, 'cached': int(cached)}
+
+
+def _write_run(out_dir, task, result):
+    file_name = run_name(*task)
+    write_table(os.path.join(out_dir, file_name), result[0], result[1])
+    print('  ' + file_name + ': ' + str(result[2]) + ' pairs')
+
+
+# ----------------- main ----------------------------------------------
+
+# --set name=v1,v2 -> (name, [v1, v2]), values parsed as json where they
+# can be (numbers, null)
+def _parse_set(text):
+    name, values = text.split('=', 1)
+    out = []
+    for v in values.split(','):
+        try:
+            out.append(json.loads(v))
+        except ValueError:
+            out.append(v)
+    return name, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the pair analyses over a grid of parameters')
+    parser.add_argument('config', help='json file with store, points, out_dir, stages, grid, processes')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=V1,V2',
+                        help='replace one parameter of the grid')
+    parser.add_argument('--processes', type=int, help='worker processes (default 1: run here)')
+    parser.add_argument('--dry-run', action='store_true', help='list the runs without doing them')
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = json.load(f)
+    grid = dict(config.get('grid', {}))
+    grid.update(_parse_set(s) for s in args.set)
+    unknown = [name for name in grid if name not in default_params]
+    if unknown:
+        raise ValueError('Unknown parameters: ' + ', '.join(unknown))
+    tasks = sweep_tasks(config.get('stages', sorted(stages)), grid)
+    processes = args.processes if args.processes is not None else config.get('processes')
+
+    print(str(len(tasks)) + ' runs')
+    if args.dry_run:
+        for stage, params in tasks:
+            print('  ' + run_name(stage, params))
+        return
+
+    ts0 = time.time()
+    cache = StageCache(config['cache_dir']) if config.get('cache_dir') else None
+    store = GeometryStore.open(config['store'])
+    if cache is not None:
+        x = cache.run('burn_order', lambda: assign_burn_order(read_table(config['points'])), [config['points']],
+                      code=[sys.modules['assign_burn_order'], sys.modules['ak_functions']])
+    else:
+        x = assign_burn_order(read_table(config['points']))
+    print('Loaded ' + str(len(store)) + ' perimeters and ' + str(len(x['polyid'])) + ' polygon burns in ' +
+          str(time.time() - ts0) + ' seconds')
+
+    runs = run_sweep(tasks, x, store, config['out_dir'], processes, cache, [config['store'], config['points']])
+    print('Failed pairs: ' + str(sum(runs['failed'])) + ', runs from the cache: ' + str(sum(runs['cached'])))
+    print('Done! Files written to: ')
+    print(config['out_dir'])
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+# ---------------------------------------------------------------------------
+# partitioned_reburns.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Discrete (non-overlapping) polygon and reburn pair processing for fire
+# databases too big to do in one piece, e.g., the Canadian NFDB, which is
+# about ten times the size of the AICC perimeters and had to be made
+# non-overlapping by hand in ArcMap for process_CAN_burn_data.R.
+#
+# The study area is split into partitions: square tiles of a fixed size or
+# any set of polygons (provinces). Each partition is processed on its own,
+# on a process pool:
+#
+# 1. every fire touching the partition is clipped to it
+# 2. the clipped boundaries are noded and polygonized into faces, and each
+#    face gets the sorted list of fires covering it (faces covered by no
+#    fire are gaps and are dropped)
+#
+# Fires that straddle a partition border are handled the same way in
+# every partition they touch, so the pieces on either side of the border
+# meet exactly. At the end, pieces touching a partition border are
+# stitched: pieces with the same list of fires are unioned and split into
+# connected parts. Pieces away from the borders are kept as they are.
+# Polygon ids are assigned after stitching, in order of fire list and
+# location, so they don't depend on how the data were partitioned or on the
+# order in which the partitions finished.
+#
+# Work per partition depends on the partition size and fire density, not
+# on the size of the whole dataset; only the stitching step sees all
+# partitions, and it handles border pieces only.
+#
+# Input files:
+#
+# 1.  NFDB_poly_20160712.shp   (Canadian National Fire Database perimeters)
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. NFDB_poly_dates_for_each_burn.csv  - one row per polygon burn, columns
+#    in the order process_CAN_burn_data.R expects (x/y in place of
+#    lat/long, in the coordinates of the perimeters):
+#
+# ptid polyid  acres   y          x          date        outdate     parentid parentac name
+#
+# 2. NFDB_poly_processed_x.csv, NFDB_poly_processed_x_pairs<n>.csv
+#    (assign_burn_order.py on the table above)
+#
+# Notes:
+# - 'Covering' is decided from a point inside each face, so faces have to be
+#   exact (they are: the faces come from the noded fire boundaries
+#   themselves)
+# - Geometries are assumed to be in a projected coordinate system in meters
+# -----------------------------------------------------------------------
+
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import shapely
+
+# Square meters to acres
+sqm2ac = 0.000247105
+
+point_columns = ['ptid', 'polyid', 'acres', 'y', 'x', 'date', 'outdate', 'parentid', 'parentac', 'name']
+
+# Set in each worker (or in this process for serial runs)
+_worker = {}
+
+
+# ----------------- grid_partitions -----------------------------------
+
+# Square tiles of tile_size (m) covering bounds, snapped to multiples of
+# tile_size so the same tiles come out for any subset of the data
+
+def grid_partitions(bounds, tile_size):
+    x0 = np.floor(bounds[0] / tile_size) * tile_size
+    y0 = np.floor(bounds[1] / tile_size) * tile_size
+    xs = np.arange(x0, bounds[2], tile_size)
+    ys = np.arange(y0, bounds[3], tile_size)
+    gx, gy = np.meshgrid(xs, ys)
+    return shapely.box(gx.ravel(), gy.ravel(), gx.ravel() + tile_size, gy.ravel() + tile_size)
+
+
+# ----------------- polygonal -----------------------------------------
+
+# Polygonal parts of each geometry. make_valid, or clipping a fire with an
+# edge on the clip border, can give a GeometryCollection (polygons plus
+# line slivers), whose boundary shapely does not take; each collection
+# becomes the multipolygon of its polygons.
+
+def polygonal(geoms):
+    geoms = np.array(geoms, dtype=object)
+    for i in np.flatnonzero(shapely.get_type_id(geoms) == 7):
+        parts = shapely.get_parts(shapely.get_parts(geoms[i]))
+        geoms[i] = shapely.multipolygons(parts[shapely.get_type_id(parts) == 3])
+    return geoms
+
+
+# ----------------- discrete_polygons ---------------------------------
+
+# Non-overlapping faces of a set of (possibly overlapping) polygons,
+# optionally clipped to 'clip'. Returns (faces, offsets, fires): the fires
+# covering face i are fires[offsets[i]:offsets[i + 1]] (positions in geoms,
+# ascending).
+
+def discrete_polygons(geoms, clip=None):
+    geoms = polygonal(geoms)
+    idx = np.arange(len(geoms))
+    if clip is not None:
+        geoms = polygonal(shapely.intersection(geoms, clip))
+        keep = shapely.area(geoms) > 0
+        geoms, idx = geoms[keep], idx[keep]
+    if len(geoms) == 0:
+        return np.empty(0, dtype=object), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    noded = shapely.union_all(shapely.boundary(geoms))
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(noded)))
+    faces = faces[shapely.area(faces) > 0]
+
+    face_idx, fire_idx = shapely.STRtree(geoms).query(shapely.point_on_surface(faces), predicate='within')
+    order = np.lexsort((idx[fire_idx], face_idx))
+    face_idx, fire_idx = face_idx[order], idx[fire_idx[order]]
+
+    # Drop gaps and renumber
+    covered = np.unique(face_idx)
+    counts = np.bincount(face_idx, minlength=len(faces))[covered]
+    return faces[covered], np.concatenate([[0], np.cumsum(counts)]), fire_idx
+
+
+# ----------------- partitioned_discrete_polygons ---------------------
+
+# discrete_polygons over partitions, run on a pool and stitched. Returns
+# the same (faces, offsets, fires), ordered by fire list and location.
+
+def partitioned_discrete_polygons(geoms, partitions, processes=None):
+    geoms = np.asarray(geoms, dtype=object)
+    partitions = np.asarray(partitions, dtype=object)
+    tasks = list(range(len(partitions)))
+
+    if processes == 1:
+        _init_worker(geoms, partitions)
+        results = [_run_partition(p) for p in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, (geoms, partitions))
+        try:
+            results = pool.map(_run_partition, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    faces = np.concatenate([r[0] for r in results])
+    keys = [k for r in results for k in r[1]]
+    border = np.concatenate([r[2] for r in results])
+
+    # Stitch: union border pieces with the same fire list
+    out_faces = list(faces[~border])
+    out_keys = [k for k, b in zip(keys, border) if not b]
+    groups = {}
+    for i in np.flatnonzero(border):
+        groups.setdefault(keys[i], []).append(i)
+    for key in sorted(groups):
+        merged = shapely.union_all(faces[groups[key]])
+        for part in shapely.get_parts(merged):
+            out_faces.append(part)
+            out_keys.append(key)
+
+    # Deterministic order: fire list, then location
+    out_faces = np.array(out_faces, dtype=object)
+    c = np.round(shapely.get_coordinates(shapely.centroid(out_faces)))
+    key_rank = np.unique(np.array([';'.join(map(str, k)) for k in out_keys], dtype=object),
+                         return_inverse=True)[1]
+    order = np.lexsort((c[:, 0], c[:, 1], key_rank))
+    out_faces = out_faces[order]
+    out_keys = [out_keys[i] for i in order]
+
+    counts = np.array([len(k) for k in out_keys], dtype=np.int64)
+    fires = np.concatenate([np.array(k, dtype=np.int64) for k in out_keys]) if out_keys \
+        else np.empty(0, dtype=np.int64)
+    return out_faces, np.concatenate([[0], np.cumsum(counts)]), fires
+
+
+def _init_worker(geoms, partitions):
+    _worker.clear()
+    _worker.update(geoms=geoms, partitions=partitions, tree=shapely.STRtree(geoms))
+
+
+# Pieces of one partition: (faces, fire lists as tuples of global
+# positions, touches-the-partition-border flags)
+
+def _run_partition(p):
+    clip = _worker['partitions'][p]
+    idx = np.sort(_worker['tree'].query(clip, predicate='intersects'))
+    faces, offsets, fires = discrete_polygons(_worker['geoms'][idx], clip)
+    keys = [tuple(idx[fires[offsets[i]:offsets[i + 1]]].tolist()) for i in range(len(faces))]
+    border = shapely.intersects(faces, shapely.boundary(clip)) if len(faces) else np.zeros(0, dtype=bool)
+    return faces, keys, border
+
+
+# ----------------- point_table ---------------------------------------
+
+# One row per polygon burn (point_columns) from the discrete polygons and a
+# fires table with 'parentid', 'date', 'outdate', 'acres' and 'name'
+
+def point_table(faces, offsets, fires, fire_table):
+    counts = np.diff(offsets)
+    polyid = np.repeat(np.arange(len(faces)), counts)
+    xy = shapely.get_coordinates(shapely.point_on_surface(faces))
+    return {'ptid': np.arange(len(fires)),
+            'polyid': polyid,
+            'acres': np.repeat(shapely.area(faces) * sqm2ac, counts),
+            'y': np.repeat(xy[:, 1], counts),
+            'x': np.repeat(xy[:, 0], counts),
+            'date': np.asarray(fire_table['date'])[fires],
+            'outdate': np.asarray(fire_table['outdate'])[fires],
+            'parentid': np.asarray(fire_table['parentid'])[fires],
+            'parentac': np.asarray(fire_table['acres'])[fires],
+            'name': np.asarray(fire_table['name'])[fires]}
+
+
+if __name__ == '__main__':
+
+    from ak_functions import write_table
+    from assign_burn_order import assign_burn_order, get_reburn_pairs, burn_columns, pair_columns
+    from perimeter_io import read_perimeters
+    from stage_cache import StageCache
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\Fire_AK_reburn\\data\\canada"
+    file_in = "NFDB_poly_20160712.shp"
+    partition_file = None  # e.g., provinces shapefile; None for square tiles
+    cache_dir = "D:\\projects\\Fire_AK_reburn\\cache"  # stage_cache.py; None to always recompute
+
+    # Local variables
+    tile_size = 200000  # m, when partition_file is None
+    processes = 4
+    reburn_num = 2
+    # ********************************************************
+
+    name_out = file_in.replace(".shp", "")
+
+    ts0 = time.time()
+
+    nfdb = read_perimeters(os.path.join(path_in, file_in), ['FIRE_ID', 'FIRENAME', 'REP_DATE', 'OUT_DATE', 'SIZE_HA'])
+    fires = {'parentid': np.arange(len(nfdb['geometry'])),
+             'name': nfdb['FIRENAME'],
+             'date': np.array(nfdb['REP_DATE'], dtype='datetime64[D]'),
+             'outdate': np.array(nfdb['OUT_DATE'], dtype='datetime64[D]'),
+             'acres': nfdb['SIZE_HA'] * 2.47105}
+    geoms = shapely.make_valid(nfdb['geometry'])
+
+    if partition_file:
+        partitions = read_perimeters(partition_file, [])['geometry']
+    else:
+        partitions = grid_partitions(shapely.total_bounds(geoms), tile_size)
+    print('Processing ' + str(len(geoms)) + ' fires in ' + str(len(partitions)) + ' partitions...')
+
+    # Discrete polygons don't depend on processes or reburn_num: reuse them
+    # from the cache when only those change
+    inputs = [os.path.join(path_in, file_in)] + ([partition_file] if partition_file else [])
+    params = {'tile_size': None if partition_file else tile_size}
+    if cache_dir:
+        faces, offsets, fire_idx = StageCache(cache_dir).run(
+            'discrete_polygons', lambda: partitioned_discrete_polygons(geoms, partitions, processes), inputs, params,
+            code=[__file__])
+    else:
+        faces, offsets, fire_idx = partitioned_discrete_polygons(geoms, partitions, processes)
+    pts = point_table(faces, offsets, fire_idx, fires)
+    write_table(os.path.join(path_in, name_out + "_dates_for_each_burn.csv"), pts, point_columns)
+
+    x = assign_burn_order(pts)
+    write_table(os.path.join(path_in, name_out + "_processed_x.csv"), x,
+                burn_columns + [c for c in x if c not in burn_columns])
+    pairs = get_reburn_pairs(x, reburn_num)
+    write_table(os.path.join(path_in, name_out + "_processed_x_pairs" + str(reburn_num) + ".csv"), pairs, pair_columns)
+
+    print('Discrete polygons: ' + str(len(faces)) + ', polygon burns: ' + str(len(pts['ptid'])) +
+          ', reburn pairs: ' + str(len(pairs['polyid'])))
+    print('Done! Files written to: ')
+    print(path_in)
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,74 @@
+# ---------------------------------------------------------------------------
+# perimeter_io.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Move fire perimeters between Arc feature classes and shapely geometry
+# arrays, for the python scripts that do their geometry work outside Arc.
+# Perimeters are held the same way as the tables in ak_functions.py: a
+# dict of column arrays, with the shapes in a 'geometry' column.
+#
+# Notes:
+# - arcpy is imported only when a feature class is actually read or
+#   written, so the geometry scripts can also run on synthetic data
+#   (synthetic_fires.py) without an Arc license
+# -----------------------------------------------------------------------
+
+import numpy as np
+import shapely
+
+
+# ----------------- read_perimeters -----------------------------------
+
+# Read a polygon feature class into a dict of column arrays plus
+# 'geometry'. Rows are sorted by the first field (usually parentid).
+
+def read_perimeters(fc, fields=('parentid',), where_clause=None):
+    import arcpy
+
+    fields = list(fields)
+    rows = []
+    with arcpy.da.SearchCursor(fc, ['SHAPE@WKB'] + fields, where_clause) as cursor:
+        for row in cursor:
+            rows.append(row)
+
+    out = {'geometry': shapely.from_wkb(np.array([bytes(r[0]) if r[0] else None for r in rows], dtype=object))}
+    for i, name in enumerate(fields):
+        out[name] = np.array([r[i + 1] for r in rows])
+    if fields:
+        order = np.argsort(out[fields[0]], kind='stable')
+        out = dict((name, col[order]) for name, col in out.items())
+    return out
+
+
+# ----------------- write_perimeters ----------------------------------
+
+# Write a dict of column arrays plus 'geometry' to a new polygon feature
+# class. The spatial reference is copied from 'template' (e.g., the input
+# perimeters). Numeric columns become DOUBLE fields, all others TEXT.
+
+def write_perimeters(out_fc, table, fields, template):
+    import arcpy
+    import os
+
+    sr = arcpy.Describe(template).spatialReference
+    arcpy.CreateFeatureclass_management(os.path.dirname(out_fc), os.path.basename(out_fc),
+                                        "POLYGON", spatial_reference=sr)
+    for name in fields:
+        kind = np.asarray(table[name]).dtype.kind
+        arcpy.AddField_management(out_fc, name, "DOUBLE" if kind in 'iuf' else "TEXT")
+
+    wkb = shapely.to_wkb(table['geometry'])
+    with arcpy.da.InsertCursor(out_fc, ['SHAPE@'] + list(fields)) as cursor:
+        for i in range(len(wkb)):
+            shape = arcpy.FromWKB(bytearray(wkb[i]), sr) if wkb[i] is not None else None
+            cursor.insertRow([shape] + [_to_python(table[name][i]) for name in fields])
+
+
+def _to_python(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
@@ -0,0 +1,145 @@
+# ---------------------------------------------------------------------------
+# raster_grid.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# A fixed raster grid (NAD 1983 Alaska Albers, square cells) and a polygon
+# rasterizer that works on plain numpy arrays, for the raster products that
+# are built outside Arc (burn history, tiled statewide grids).
+#
+# Rows run north to south from ymax, columns west to east from xmin. A cell
+# is inside a polygon when its center is (even-odd rule, so holes and
+# multipolygons work), the same rule as PolygonToRaster_conversion with
+# CELL_CENTER.
+#
+#   grid = Grid.from_bounds(shapely.total_bounds(fires['geometry']), 250)
+#   cells = polygon_cells(poly, grid)     # flat indices into grid.shape
+#
+# Notes:
+# - polygon_cells is a vectorized scanline fill: every boundary segment is
+#   crossed with the row centers it spans, the crossings are sorted per
+#   row, and pairs of crossings give runs of columns
+# - write_raster needs arcpy, which is imported only when it's called
+# -----------------------------------------------------------------------
+
+import numpy as np
+import shapely
+
+from ak_functions import ranges
+
+
+# ----------------- Grid ----------------------------------------------
+
+class Grid(object):
+
+    def __init__(self, xmin, ymax, cell, nrows, ncols):
+        self.xmin = float(xmin)
+        self.ymax = float(ymax)
+        self.cell = float(cell)
+        self.nrows = int(nrows)
+        self.ncols = int(ncols)
+
+    # Smallest grid of the given cell size covering the bounds, snapped to
+    # multiples of the cell size so grids of the same cell size line up
+    @classmethod
+    def from_bounds(cls, bounds, cell):
+        xmin = np.floor(bounds[0] / cell) * cell
+        ymin = np.floor(bounds[1] / cell) * cell
+        xmax = np.ceil(bounds[2] / cell) * cell
+        ymax = np.ceil(bounds[3] / cell) * cell
+        return cls(xmin, ymax, cell, round((ymax - ymin) / cell), round((xmax - xmin) / cell))
+
+    @property
+    def shape(self):
+        return (self.nrows, self.ncols)
+
+    @property
+    def size(self):
+        return self.nrows * self.ncols
+
+    @property
+    def ymin(self):
+        return self.ymax - self.nrows * self.cell
+
+    @property
+    def xmax(self):
+        return self.xmin + self.ncols * self.cell
+
+    @property
+    def bounds(self):
+        return (self.xmin, self.ymin, self.xmax, self.ymax)
+
+    # Sub-grid of rows r0:r1, columns c0:c1 (may run past the edges)
+    def window(self, r0, r1, c0, c1):
+        return Grid(self.xmin + c0 * self.cell, self.ymax - r0 * self.cell, self.cell, r1 - r0, c1 - c0)
+
+    def __repr__(self):
+        return 'Grid(xmin=%g, ymax=%g, cell=%g, nrows=%d, ncols=%d)' % (
+            self.xmin, self.ymax, self.cell, self.nrows, self.ncols)
+
+
+# ----------------- polygon_cells -------------------------------------
+
+# Flat indices (row * ncols + col) of the grid cells whose centers fall
+# inside a polygon or multipolygon. Parts outside the grid are ignored.
+
+def polygon_cells(geom, grid):
+    rows, c0, c1 = polygon_runs(geom, grid)
+    if len(rows) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.repeat(rows * grid.ncols, c1 - c0) + ranges(c0, c1)
+
+
+# Runs of cells inside a polygon: row, first column, last column + 1
+
+def polygon_runs(geom, grid):
+    empty = (np.empty(0, dtype=np.int64),) * 3
+    if geom is None or geom.is_empty:
+        return empty
+
+    # Boundary segments of all rings
+    rings = shapely.get_rings(shapely.get_parts(geom))
+    xy, ring_idx = shapely.get_coordinates(rings, return_index=True)
+    same = ring_idx[1:] == ring_idx[:-1]
+    x0, y0 = xy[:-1][same, 0], xy[:-1][same, 1]
+    x1, y1 = xy[1:][same, 0], xy[1:][same, 1]
+
+    # Rows whose center y lies in [ylo, yhi) of each segment
+    ylo, yhi = np.minimum(y0, y1), np.maximum(y0, y1)
+    r_first = np.floor((grid.ymax - yhi) / grid.cell - 0.5).astype(np.int64) + 1
+    r_last = np.floor((grid.ymax - ylo) / grid.cell - 0.5).astype(np.int64)
+    r_first = np.maximum(r_first, 0)
+    r_last = np.minimum(r_last, grid.nrows - 1)
+    n = np.maximum(r_last - r_first + 1, 0)
+    if n.sum() == 0:
+        return empty
+
+    seg = np.repeat(np.arange(len(x0)), n)
+    rows = ranges(r_first, r_first + n)
+    yc = grid.ymax - (rows + 0.5) * grid.cell
+    xc = x0[seg] + (yc - y0[seg]) * (x1[seg] - x0[seg]) / (y1[seg] - y0[seg])
+
+    # Sort crossings along each row and pair them up
+    order = np.lexsort((xc, rows))
+    rows, xc = rows[order], xc[order]
+    rows = rows[0::2]
+    c0 = np.ceil((xc[0::2] - grid.xmin) / grid.cell - 0.5).astype(np.int64)
+    c1 = np.ceil((xc[1::2] - grid.xmin) / grid.cell - 0.5).astype(np.int64)
+    c0 = np.clip(c0, 0, grid.ncols)
+    c1 = np.clip(c1, 0, grid.ncols)
+    keep = c1 > c0
+    return rows[keep], c0[keep], c1[keep]
+
+
+# ----------------- write_raster --------------------------------------
+
+# Save a 2d array as an Arc raster (e.g., .tif) on the grid
+
+def write_raster(path, array, grid, nodata=None, spatial_reference=None):
+    import arcpy
+
+    ras = arcpy.NumPyArrayToRaster(array, arcpy.Point(grid.xmin, grid.ymin), grid.cell, grid.cell, nodata)
+    if spatial_reference is not None:
+        arcpy.DefineProjection_management(ras, spatial_reference)
+    ras.save(path)
@@ -0,0 +1,157 @@
+# ---------------------------------------------------------------------------
+# raster_tiles.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Tiled, out-of-core execution of raster tools over big grids (statewide
+# at 30 m is ~1.7 billion cells). The grid is cut into fixed-size tiles;
+# each tile is computed on its own (optionally with a halo of extra cells
+# around it, for tools that look at neighboring cells), and the tile's
+# core is written straight into memory-mapped .npy files on disk. Tiles run
+# on a process pool. Only one tile per worker is ever in memory, so peak
+# memory depends on the tile size, not on the extent or resolution.
+#
+# A tile function takes the tile's grid (raster_grid.Grid, halo included)
+# and a dict of shared inputs, and returns a dict:
+#
+#   - arrays named in 'layers' (shape = the tile grid's shape) are cropped
+#     to the core and written to <out_dir>/<name>.npy
+#   - anything else is sent back to the caller, one dict per tile (for
+#     small per-tile results such as tabulated areas)
+#
+#   layers, extras = run_tiles(burn_history_tile, grid, shared, layers=history_layers,
+#                              out_dir="D:\\projects\\ak_fire\\gis\\data\\burn_history_30m",
+#                              tile_size=2048, processes=4)
+#
+# The shared inputs are sent to each worker once (pool initializer), and a
+# tile function may cache things it builds from them (e.g., an STRtree) in
+# the same dict.
+#
+# Notes:
+# - Tile functions must be module-level functions so they can be pickled
+# - Each worker writes only the cells of its own tile cores, which never
+#   overlap, so no locking is needed
+# - open_tiles reopens a finished run (manifest.json + .npy files)
+# -----------------------------------------------------------------------
+
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from raster_grid import Grid
+
+# Set in each worker (or in this process for serial runs)
+_worker = {}
+
+
+# ----------------- Tile ----------------------------------------------
+
+# Core rows/columns r0:r1, c0:c1 and, with the halo, hr0:hr1, hc0:hc1
+# (clipped to the grid)
+
+class Tile(object):
+
+    def __init__(self, r0, r1, c0, c1, hr0, hr1, hc0, hc1):
+        self.r0, self.r1, self.c0, self.c1 = r0, r1, c0, c1
+        self.hr0, self.hr1, self.hc0, self.hc1 = hr0, hr1, hc0, hc1
+
+    # Core of the tile within its halo window
+    @property
+    def core(self):
+        return (slice(self.r0 - self.hr0, self.r1 - self.hr0),
+                slice(self.c0 - self.hc0, self.c1 - self.hc0))
+
+    def __repr__(self):
+        return 'Tile(rows %d:%d, cols %d:%d)' % (self.r0, self.r1, self.c0, self.c1)
+
+
+# ----------------- make_tiles ----------------------------------------
+
+def make_tiles(grid, tile_size, halo=0):
+    tiles = []
+    for r0 in range(0, grid.nrows, tile_size):
+        r1 = min(r0 + tile_size, grid.nrows)
+        for c0 in range(0, grid.ncols, tile_size):
+            c1 = min(c0 + tile_size, grid.ncols)
+            tiles.append(Tile(r0, r1, c0, c1,
+                              max(r0 - halo, 0), min(r1 + halo, grid.nrows),
+                              max(c0 - halo, 0), min(c1 + halo, grid.ncols)))
+    return tiles
+
+
+# ----------------- create_layers / open_tiles ------------------------
+
+# Create the on-disk output arrays (and manifest) of a tiled run.
+# layers: list of (name, dtype, nodata).
+
+def create_layers(out_dir, grid, layers):
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    for name, dtype, nodata in layers:
+        np.lib.format.open_memmap(os.path.join(out_dir, name + '.npy'), mode='w+',
+                                  dtype=dtype, shape=grid.shape)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump({'grid': [grid.xmin, grid.ymax, grid.cell, grid.nrows, grid.ncols],
+                   'layers': [[name, np.dtype(dtype).name, nodata] for name, dtype, nodata in layers]},
+                  f, indent=1)
+
+
+# Reopen the output of a tiled run: (grid, dict of memory-mapped layers)
+
+def open_tiles(out_dir, mode='r'):
+    with open(os.path.join(out_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    grid = Grid(*manifest['grid'])
+    layers = dict((name, np.load(os.path.join(out_dir, name + '.npy'), mmap_mode=mode))
+                  for name, _, _ in manifest['layers'])
+    return grid, layers
+
+
+# ----------------- run_tiles -----------------------------------------
+
+# Run func over all tiles of grid. Returns the memory-mapped output layers
+# and the list of per-tile extras (in tile order).
+
+def run_tiles(func, grid, shared, layers=(), out_dir=None, tile_size=2048, halo=0, processes=None):
+    layers = list(layers)
+    if layers:
+        create_layers(out_dir, grid, layers)
+    tiles = make_tiles(grid, tile_size, halo)
+    init_args = (func, grid, shared, out_dir, [name for name, _, _ in layers])
+
+    if processes == 1:
+        _init_worker(*init_args)
+        results = [_run_tile(t) for t in tiles]
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, init_args)
+        try:
+            results = pool.map(_run_tile, tiles, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    out = open_tiles(out_dir)[1] if layers else {}
+    return out, results
+
+
+def _init_worker(func, grid, shared, out_dir, layer_names):
+    _worker.clear()
+    _worker.update(func=func, grid=grid, shared=shared, out_dir=out_dir,
+                   layer_names=layer_names, outputs={})
+
+
+def _run_tile(tile):
+    grid = _worker['grid']
+    window = grid.window(tile.hr0, tile.hr1, tile.hc0, tile.hc1)
+    result = _worker['func'](window, _worker['shared'])
+
+    outputs = _worker['outputs']
+    for name in _worker['layer_names']:
+        if name not in outputs:
+            outputs[name] = np.load(os.path.join(_worker['out_dir'], name + '.npy'), mmap_mode='r+')
+        outputs[name][tile.r0:tile.r1, tile.c0:tile.c1] = result.pop(name)[tile.core]
+        outputs[name].flush()
+    return result
@@ -0,0 +1,254 @@
+# ---------------------------------------------------------------------------
+# shape_indices.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Shape indices for the burn/reburn polygons, and the nearest-key join that
+# attaches the non-reburned perimeter to each reburn polygon. Python
+# version of calc_indices and the noburn_perim merge in
+# process_intersected_pairs_shape_indices.R.
+#
+# The indices are plain array expressions over the whole table. The R merge
+# scanned the whole non-reburn table for every reburn row (apply + which.min,
+# quadratic in the number of rows). Here the non-reburn table is sorted once
+# by (parentid, burn_ac) and every reburn row is located with a single
+# binary search, so the join is O(n log n).
+#
+# Input files:
+#
+# 1.  union_polygon_results.csv
+#
+# Merged output of union_fire_pairs.py; 2-3 polygons per pair:
+#
+# FID parentid FireYear parentid_1 FireYear_1 pairid  ac        perim_m
+#  0    660     1950       0                    1    21450.54  72242.81   <- older fire only
+#  1    0                  1040     1997        1     2495.20  29787.90   <- newer fire only
+#  2    660     1950      1040      1997        1    12357.66  39645.59   <- reburn
+#
+# 2.  intersect_unburned_areas.csv, intersected_polys_1940_2016.csv
+#
+# Non-reburned and reburned polygons from the older intersect-based
+# workflow (see process_intersected_pairs_shape_indices.R)
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. union_polygon_shape_indices.csv - union pieces plus status, year_int
+#    and the indices (area_m2, para, p2a, shape, shape2, eac_perim, frac)
+#
+# 2. intersected_shape_indices.csv - for the intersect workflow, the reburn
+#    and non-reburned polygon of each pair (status 'reburn', 'burn') with
+#    the same indices; the non-reburned perimeter comes from
+#    attach_noburn_perim. Written when both files of input 2 are found.
+#
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+
+from ak_functions import read_table, write_table
+
+# Acres to square meters
+ac2sqm = 4046.86
+
+index_columns = ['area_cir', 'area_m2', 'para', 'p2a', 'shape', 'shape2', 'r', 'eac_perim', 'frac']
+
+
+# ----------------- calc_indices --------------------------------------
+
+# Add the shape indices to a table with acreage and perimeter (m) columns
+
+def calc_indices(df, ac_field='ac', perim_field='perim'):
+    perim = np.asarray(df[perim_field], dtype=np.float64)
+    area_m2 = np.asarray(df[ac_field], dtype=np.float64) * ac2sqm
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['area_cir'] = perim ** 2 / (4 * np.pi)
+        df['area_m2'] = area_m2
+        df['para'] = perim / area_m2
+        df['p2a'] = perim ** 2 / area_m2
+        df['shape'] = perim / (2 * np.sqrt(np.pi * area_m2))  # Schumaker 1996
+        df['shape2'] = np.sqrt(area_m2 / df['area_cir'])
+        df['r'] = np.sqrt(area_m2 / np.pi)
+        df['eac_perim'] = 2 * np.pi * df['r']
+        df['frac'] = 2 * np.log(perim) / np.log(area_m2)
+    return df
+
+
+# ----------------- nearest_key_join ----------------------------------
+
+# For each (id, value) on the left, find the row on the right with the same
+# id and the nearest value. Returns the matching right row index for each
+# left row, -1 where the id does not occur on the right.
+#
+# The right side is sorted by (id, value); ids are replaced by their rank
+# and shifted apart by more than the range of values, so one searchsorted on
+# the combined key lands each left row inside its own id's block.
+
+def nearest_key_join(left_id, left_value, right_id, right_value):
+    left_id = np.asarray(left_id)
+    left_value = np.asarray(left_value, dtype=np.float64)
+    right_id = np.asarray(right_id)
+    right_value = np.asarray(right_value, dtype=np.float64)
+
+    match = np.full(len(left_id), -1, dtype=np.int64)
+    if len(right_id) == 0 or len(left_id) == 0:
+        return match
+
+    order = np.lexsort((right_value, right_id))
+    ids = np.unique(right_id)
+    lo = min(right_value.min(), np.nanmin(left_value))
+    span = 2 * (max(right_value.max(), np.nanmax(left_value)) - lo) + 1
+
+    right_key = np.searchsorted(ids, right_id[order]) * span + (right_value[order] - lo)
+
+    rank = np.searchsorted(ids, left_id)
+    found = (rank < len(ids)) & (ids[np.minimum(rank, len(ids) - 1)] == left_id) & ~np.isnan(left_value)
+    left_key = rank * span + (left_value - lo)
+
+    # Candidates either side of the insertion point, kept only if they
+    # belong to the same id
+    pos = np.searchsorted(right_key, left_key)
+    below = np.clip(pos - 1, 0, len(order) - 1)
+    above = np.clip(pos, 0, len(order) - 1)
+    sorted_id = right_id[order]
+    d_below = np.where(sorted_id[below] == left_id, np.abs(right_key[below] - left_key), np.inf)
+    d_above = np.where(sorted_id[above] == left_id, np.abs(right_key[above] - left_key), np.inf)
+    best = np.where(d_above < d_below, above, below)
+
+    match[found] = order[best[found]]
+    return match
+
+
+# ----------------- read_intersected ----------------------------------
+
+# Reburn polygons of the intersect workflow (intersected_polys_1940_2016.csv),
+# one row per polygon: the two rows of each polygon (one per parent fire,
+# matched by acres) are sorted by year, and the newer fire's row is kept
+# with the interval since the older one. Polygons whose parent has less
+# than 1 acre left unreburned are dropped, as in the R.
+
+def read_intersected(path):
+    y = read_table(path, ['FID', 'FireYear', 'CalcAcres', 'parentid', 'ac', 'perim'])
+    order = np.lexsort((y['FireYear'], y['ac']))
+    n = len(order) // 2
+    fire1, fire2 = order[0:2 * n:2], order[1:2 * n:2]
+    out = {'fid': y['FID'][fire2], 'year': y['FireYear'][fire2], 'parentac': y['CalcAcres'][fire2],
+           'parentid': y['parentid'][fire2], 'burn_ac': y['ac'][fire2], 'burn_perim': y['perim'][fire2],
+           'year_int': y['FireYear'][fire2] - y['FireYear'][fire1]}
+    out['noburn_ac'] = out['parentac'] - out['burn_ac']
+    keep = out['noburn_ac'] > 1
+    keep = np.flatnonzero(keep)[np.argsort(out['fid'][keep], kind='stable')]
+    return dict((name, col[keep]) for name, col in out.items())
+
+
+# Non-reburned polygons of the intersect workflow (intersect_unburned_areas.csv)
+
+def read_unburned(path):
+    x = read_table(path, ['FID', 'FireYear', 'CalcAcres', 'parentid', 'acres', 'perim'])
+    return {'fid': x['FID'], 'year': x['FireYear'], 'parentac': x['CalcAcres'], 'parentid': x['parentid'],
+            'noburn_ac': x['acres'], 'noburn_perim': x['perim']}
+
+
+# Long table of the reburn ('reburn') and matching non-reburned ('burn')
+# polygon of each pair, with the shape indices (R: xy.long)
+
+def intersected_indices(y, x):
+    y = attach_noburn_perim(y, x)
+    n = len(y['fid'])
+    out = dict((name, np.concatenate([y[name], y[name]])) for name in ['fid', 'parentid', 'year', 'parentac',
+                                                                       'year_int'])
+    out['status'] = np.repeat(np.array(['reburn', 'burn'], dtype=object), n)
+    out['ac'] = np.concatenate([y['burn_ac'], y['noburn_ac']])
+    out['perim'] = np.concatenate([y['burn_perim'], y['noburn_perim']])
+    order = np.lexsort((out['status'], out['year_int'], out['parentid']))
+    out = dict((name, col[order]) for name, col in out.items())
+    return calc_indices(out, 'ac', 'perim')
+
+
+# ----------------- read_union_pieces ---------------------------------
+
+# Read the union output and label each piece:
+#   'reburn' - in both fires
+#   'burn'   - older fire only (burned once)
+#   'newer'  - newer fire only
+# year_int is taken from the reburn piece of each pair
+
+def read_union_pieces(path):
+    u = read_table(path, ['pairid', 'parentid', 'FireYear', 'parentid_1', 'FireYear_1', 'ac', 'perim_m'])
+    older = u['FireYear'] > 0
+    newer = u['FireYear_1'] > 0
+    status = np.where(older & newer, 'reburn', np.where(older, 'burn', 'newer')).astype(object)
+    u['status'] = status
+
+    both = np.flatnonzero(status == 'reburn')
+    both = both[np.argsort(u['pairid'][both], kind='stable')]
+    pos = np.clip(np.searchsorted(u['pairid'][both], u['pairid']), 0, max(len(both) - 1, 0))
+    year_int = np.full(len(status), np.nan)
+    if len(both):
+        hit = u['pairid'][both][pos] == u['pairid']
+        year_int[hit] = (u['FireYear_1'] - u['FireYear'])[both][pos[hit]]
+    u['year_int'] = year_int
+    return u
+
+
+# ----------------- attach_noburn_perim -------------------------------
+
+# Attach the perimeter of the matching non-reburned polygon to each reburn
+# polygon (R: transform(y, noburn_perim = apply(...))).
+#
+# y - reburn polygons with parentid, burn_ac
+# x - non-reburned polygons with parentid, parentac, noburn_ac, noburn_perim
+#
+# The match needs the same parentid and takes the nearest burn_ac within
+# it; a reburn polygon whose parentid has no non-reburned polygon gets NaN.
+# The R code took the nearest (parentid, burn_ac) in 2-D, so such a row
+# picked up a polygon of a neighbouring parentid there.
+
+def attach_noburn_perim(y, x):
+    x_burn_ac = x['parentac'] - x['noburn_ac']
+    match = nearest_key_join(y['parentid'], y['burn_ac'], x['parentid'], x_burn_ac)
+    noburn_perim = np.full(len(match), np.nan)
+    noburn_perim[match >= 0] = x['noburn_perim'][match[match >= 0]]
+    y['noburn_perim'] = noburn_perim
+    return y
+
+
+if __name__ == '__main__':
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\data"
+    file_in = "union_polygon_results.csv"
+    file_out = "union_polygon_shape_indices.csv"
+    unburned_in = "intersect_unburned_areas.csv"
+    intersected_in = "intersected_polys_1940_2016.csv"
+    intersected_out = "intersected_shape_indices.csv"
+    # ********************************************************
+
+    ts0 = time.time()
+
+    u = read_union_pieces(os.path.join(path_in, file_in))
+    u = calc_indices(u, 'ac', 'perim_m')
+
+    columns = ['pairid', 'status', 'parentid', 'FireYear', 'parentid_1', 'FireYear_1',
+               'year_int', 'ac', 'perim_m'] + index_columns
+    write_table(os.path.join(path_in, file_out), u, columns)
+
+    print('Total number of pieces ' + str(len(u['pairid'])))
+
+    if os.path.exists(os.path.join(path_in, unburned_in)) and os.path.exists(os.path.join(path_in, intersected_in)):
+        xy = intersected_indices(read_intersected(os.path.join(path_in, intersected_in)),
+                                 read_unburned(os.path.join(path_in, unburned_in)))
+        write_table(os.path.join(path_in, intersected_out), xy,
+                    ['fid', 'parentid', 'parentac', 'year', 'year_int', 'status', 'ac', 'perim'] + index_columns)
+        print('Intersected pairs ' + str(len(xy['fid']) // 2) + ', without a non-reburned polygon ' +
+              str(int(np.isnan(xy['perim']).sum())))
+    print('Done! Files written to: ')
+    print(path_in)
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
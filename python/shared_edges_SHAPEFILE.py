@@ -74,6 +74,7 @@
 # Import arcpy module
 import arcpy, os, time
 from arcpy import env
+from pair_telemetry import PairTelemetry, arc_vertex_count
 
 # Set to overwrite
 arcpy.env.overwriteOutput = True
@@ -88,6 +89,7 @@ ws = os.path.join(arcpy.env.workspace, "temp")
 reburn_num = 2  # reburn number of interest (will look for this and n-1)
 filename_add = "_all"  # tag for filename
 out_shp_name = "reburns_x" + str(reburn_num) + "_shared_edges" + filename_add + ".shp"
+telemetry_name = "reburns_x" + str(reburn_num) + "_shared_edges" + filename_add + "_telemetry.jsonl"
 # ********************************************************
 
 pt_file = "processed_x.shp"
@@ -115,8 +117,9 @@ fcs_list = []
 # initialize counter
 n_poly = 0
 
-# start the clock
+# start the clock; per-stage and per-pair times go to the telemetry log
 ts0 = time.time()
+telemetry = PairTelemetry(os.path.join(ws, telemetry_name))
 
 # step through all rows in the POINTS layer
 for row in cursor:
@@ -144,21 +147,29 @@ for row in cursor:
                 sql_both_polys = '"parentid" = ' + str(older_parent_id) + ' OR "parentid" = ' + str(newer_parent_id)  # sql to get both older, newer burn polys
                 print '----------------------------------'
                 print 'Processing fire FIDs ' + str(older_parent_id) + ' and ' + str(newer_parent_id)
+                telemetry.start_pair(n_poly, older_parent_id, newer_parent_id)
 
                 # Prior fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
 
                 # Reburn fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                telemetry.add_vertices(arc_vertex_count("in_memory/older_fc") + arc_vertex_count("in_memory/newer_fc"))
 
             # Intersect prior fire and newer fire polygons to get the overlapping sections (reburn areas)
-                arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_fc", "ALL")
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_fc", "ALL")
 
             # Intersect prior fire and reburn area to get perimeter of prior fire within newer burn
                 shared_line = os.path.join(ws, "line" + str(n_poly) + ".shp")
-                arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/reburn_fc"], shared_line, "ALL", "#", "LINE")
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/reburn_fc"], shared_line, "ALL", "#", "LINE")
 
             # Add perimeter shapefile to list
                 fcs_list.append(os.path.join(ws, shared_line))
@@ -166,12 +177,14 @@ for row in cursor:
                 # clean up
                 print 'Deleting memory...'
                 arcpy.Delete_management('in_memory')
+                telemetry.end_pair()
 
-    except:
+    except Exception as e:
         print ' ** Could not save polygon ' + str(poly_id)
         ts1 = time.time()
         print 'Time elapsed is: ' + str(ts1 - ts0)
         print arcpy.GetMessages()
+        telemetry.fail_pair(arcpy.GetMessages(2) or e)
         continue
 
 
@@ -206,5 +219,6 @@ print os.path.join(ws, out_shp_name)
 ts1 = time.time()
 print 'Time elapsed: ' + str(ts1 - ts0) + ' seconds'
 
-
-
+telemetry.print_summary()
+telemetry.close()
+print 'Telemetry written to: ' + os.path.join(ws, telemetry_name)
@@ -60,6 +60,16 @@
 # - Write table to dbf
 #
 # - Merge all tables
+#
+# With length_only = True the Intersect/Merge/PolygonNeighbors chain is
+# skipped. Both fires are read as geometry objects, and
+# - the older fire's boundary is clipped to the newer fire, and
+# - the newer fire's boundary is clipped to the older fire;
+# the two lengths are written straight to the output table, one row per
+# pair:
+#
+# polyid  older_parentid  newer_parentid  older_in_newer_m  newer_in_older_m
+#   11        660             1040             18213.4           9921.0
 
 
 # Notes:
@@ -77,6 +87,7 @@
 # Import arcpy module
 import arcpy, os, time
 from arcpy import env
+from pair_telemetry import PairTelemetry, arc_vertex_count
 
 # Set to overwrite
 arcpy.env.overwriteOutput = True
@@ -91,6 +102,8 @@ ws = os.path.join(arcpy.env.workspace, "temp")
 reburn_num = 2  # reburn number of interest (will look for this and n-1)
 filename_add = "_JUNKTEST"  # tag for filename
 out_tbl_name = "reburns_x" + str(reburn_num) + "_shared_edges" + filename_add + ".dbf"
+length_only = False  # True to write the two shared lengths directly instead of the PolygonNeighbors table
+telemetry_name = "reburns_x" + str(reburn_num) + "_shared_edges" + filename_add + "_telemetry.jsonl"
 # ********************************************************
 
 pt_file = "processed_x.shp"
@@ -115,11 +128,20 @@ cursor = arcpy.SearchCursor("pt_lyr")
 # initialize lists to hold consolidated feature classes/tables
 tbl_list = []
 
+# length-only output table, filled one row per pair
+length_fields = ['polyid', 'older_parentid', 'newer_parentid', 'older_in_newer_m', 'newer_in_older_m']
+if length_only:
+    arcpy.CreateTable_management(ws, out_tbl_name)
+    for field in length_fields:
+        arcpy.AddField_management(os.path.join(ws, out_tbl_name), field, "DOUBLE")
+    length_cursor = arcpy.da.InsertCursor(os.path.join(ws, out_tbl_name), length_fields)
+
 # initialize counter
 n_poly = 0
 
-# start the clock
+# start the clock; per-stage and per-pair times go to the telemetry log
 ts0 = time.time()
+telemetry = PairTelemetry(os.path.join(ws, telemetry_name))
 
 # step through all rows in the POINTS layer
 for row in cursor:
@@ -147,18 +169,50 @@ for row in cursor:
                 sql_both_polys = '"parentid" = ' + str(older_parent_id) + ' OR "parentid" = ' + str(newer_parent_id)  # sql to get both current, previous burns polys
                 print '----------------------------------'
                 print 'Processing fire FIDs ' + str(older_parent_id) + ' and ' + str(newer_parent_id)
+                telemetry.start_pair(n_poly, older_parent_id, newer_parent_id)
+
+                if length_only:
+                    # Both perimeters as geometry objects, no feature classes
+                    with telemetry.stage('select'):
+                        shapes = {}
+                        with arcpy.da.SearchCursor(original_polys, [parent_id_field, 'SHAPE@'], sql_both_polys) as poly_cursor:
+                            # a fire stored as several features is the union of them
+                            for poly_row in poly_cursor:
+                                if poly_row[0] in shapes:
+                                    shapes[poly_row[0]] = shapes[poly_row[0]].union(poly_row[1])
+                                else:
+                                    shapes[poly_row[0]] = poly_row[1]
+                        older_shape = shapes[older_parent_id]
+                        newer_shape = shapes[newer_parent_id]
+                    telemetry.add_vertices(older_shape.pointCount + newer_shape.pointCount)
+
+                    # Border of each fire inside the other (dimension 2 = polyline result)
+                    with telemetry.stage('lines'):
+                        older_in_newer = older_shape.boundary().intersect(newer_shape, 2).length
+                        newer_in_older = newer_shape.boundary().intersect(older_shape, 2).length
+
+                    with telemetry.stage('write'):
+                        length_cursor.insertRow([poly_id, older_parent_id, newer_parent_id, older_in_newer, newer_in_older])
+                    telemetry.end_pair()
+                    continue
 
                 # Prior fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_older_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/older_fc")
 
                 # Reburn fire
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_newer_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/newer_fc")
+                telemetry.add_vertices(arc_vertex_count("in_memory/older_fc") + arc_vertex_count("in_memory/newer_fc"))
 
             # Intersect prior fire and reburn fire to get the overlapping sections (reburn areas)
                 intsct_poly = os.path.join(ws, "reburn_poly" + str(n_poly) + ".shp")
-                arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_fc", "ALL")
+                with telemetry.stage('intersect'):
+                    arcpy.Intersect_analysis(["in_memory/older_fc", "in_memory/newer_fc"], "in_memory/reburn_fc", "ALL")
 
             # Calculate length of shared perimeter between reburn and prior burn
             #   = portion of the prior burn perimeter within the later burn
@@ -177,11 +231,13 @@ for row in cursor:
 
                 # Merge original fire poly with reburn poly; cannot calculate shared perimeter if they're in separate feature classes
                 #merged_polys = os.path.join(ws, "merged_polys" + str(n_poly) + ".shp") #"in_memory/merged_polys"
-                arcpy.Merge_management(["in_memory/older_fc", "in_memory/reburn_fc"], "in_memory/merged_polys", fieldMappings)
+                with telemetry.stage('merge'):
+                    arcpy.Merge_management(["in_memory/older_fc", "in_memory/reburn_fc"], "in_memory/merged_polys", fieldMappings)
 
                 # Get length of shared boundary between original fire and reburn area
                 shared_table = os.path.join(ws, "table" + str(n_poly) + ".dbf")
-                arcpy.PolygonNeighbors_analysis("in_memory/merged_polys", shared_table, ['FireName', 'FireName_1', 'acres', 'acres_1', 'parentid', 'parentid_1'], "NO_AREA_OVERLAP", "NO_BOTH_SIDES", "#", "METERS")
+                with telemetry.stage('neighbors'):
+                    arcpy.PolygonNeighbors_analysis("in_memory/merged_polys", shared_table, ['FireName', 'FireName_1', 'acres', 'acres_1', 'parentid', 'parentid_1'], "NO_AREA_OVERLAP", "NO_BOTH_SIDES", "#", "METERS")
 
                # Add boundary length table to list
                 tbl_list.append(os.path.join(ws, shared_table))
@@ -189,12 +245,14 @@ for row in cursor:
                 # clean up
                 print 'Deleting memory...'
                 arcpy.Delete_management('in_memory')
+                telemetry.end_pair()
 
-    except:
+    except Exception as e:
         print ' ** Could not save polygon ' + str(poly_id)
         ts1 = time.time()
         print 'Time elapsed is: ' + str(ts1 - ts0)
         print arcpy.GetMessages()
+        telemetry.fail_pair(arcpy.GetMessages(2) or e)
         continue
 
 
@@ -204,13 +262,16 @@ print ' ====================================================='
 print 'Total number of processed polygons ' + str(n_poly)
 
 # Merge tables
-print 'Merging all tables...'
+if length_only:
+    del length_cursor
+else:
+    print 'Merging all tables...'
 
-sample_tbl = tbl_list[0]
-arcpy.CreateTable_management(ws, out_tbl_name, sample_tbl)
+    sample_tbl = tbl_list[0]
+    arcpy.CreateTable_management(ws, out_tbl_name, sample_tbl)
 
-for tbl in tbl_list:
-    arcpy.Append_management([tbl], os.path.join(ws, out_tbl_name), "NO_TEST")
+    for tbl in tbl_list:
+        arcpy.Append_management([tbl], os.path.join(ws, out_tbl_name), "NO_TEST")
 
 # Clean up
 print 'Deleting files...'
@@ -225,5 +286,6 @@ print os.path.join(ws, out_tbl_name)
 ts1 = time.time()
 print 'Time elapsed: ' + str(ts1 - ts0) + ' seconds'
 
-
-
+telemetry.print_summary()
+telemetry.close()
+print 'Telemetry written to: ' + os.path.join(ws, telemetry_name)
@@ -0,0 +1,191 @@
+# ---------------------------------------------------------------------------
+# simplify_perimeters.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Optional preprocessing step that thins out the very dense AICC perimeters
+# before any pair processing. Every Union/Intersect/Buffer in the pair
+# scripts pays for each vertex, and most of them are far closer together
+# than the perimeters are accurate.
+#
+# Two things are done, both optional:
+#
+# 1. Coordinates are snapped to a fixed precision grid (e.g., 1 m).
+# 2. Boundaries are simplified (Douglas-Peucker) with a given tolerance in
+#    a way that keeps shared boundaries between neighboring fires
+#    identical. Simplifying each fire on its own would move a shared edge
+#    differently in each fire and open slivers/overlaps between them.
+#
+# For 2., all fire boundaries are noded together and broken into arcs that
+# run between junctions, so an edge shared by several fires is a single
+# arc. Each arc is simplified once with its end points fixed, the arcs are
+# polygonized back into faces, and each fire is rebuilt from the faces that
+# lie inside it.
+#
+# The maximum error introduced is reported for each fire: the area that
+# changed (symmetric difference), the change in acreage and perimeter, and
+# the largest distance any boundary moved (Hausdorff distance), so the
+# error in 'ac'/'perim_m' downstream is known and bounded.
+#
+# Input files:
+#
+# 1.  firePerimeters_1940_2016_gt1000ac_notPrescribed.shp
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. firePerimeters_1940_2016_gt1000ac_notPrescribed_simplified<tol>m.shp
+# 2. firePerimeters_1940_2016_gt1000ac_notPrescribed_simplified<tol>m_errors.csv
+#
+# parentid n_vert n_vert_simpl  acres    acres_simpl  area_err_ac  perim_m  perim_m_simpl  perim_err_m  max_shift_m
+#   660     4102     388       33808.2   33807.9      1.84        98213    97870          343          9.7
+#
+# Notes:
+# - Fires that collapse entirely at the given tolerance keep their own,
+#   individually simplified outline and are flagged in the error table
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import write_table
+
+# Square meters to acres
+sqm2ac = 0.000247105
+
+error_columns = ['parentid', 'n_vert', 'n_vert_simpl', 'acres', 'acres_simpl', 'area_err_ac',
+                 'perim_m', 'perim_m_simpl', 'perim_err_m', 'max_shift_m', 'shared']
+
+
+# ----------------- snap_to_grid --------------------------------------
+
+# Round all coordinates to a multiple of grid_size (m), fixing any topology
+# errors that rounding creates
+
+def snap_to_grid(geoms, grid_size):
+    return shapely.make_valid(shapely.set_precision(geoms, grid_size))
+
+
+# ----------------- shared_arcs ---------------------------------------
+
+# Node all boundaries together and return the arcs between junctions. An
+# edge shared by several fires comes out as one arc.
+
+def shared_arcs(geoms):
+    noded = shapely.union_all(shapely.boundary(geoms))
+    merged = shapely.line_merge(noded)
+    return shapely.get_parts(merged)
+
+
+# ----------------- simplify_shared -----------------------------------
+
+# Topology-preserving simplification of a set of polygons. Returns the
+# simplified polygons (same order) and a boolean array flagging those that
+# were rebuilt from shared arcs (False: collapsed and simplified alone).
+
+def simplify_shared(geoms, tolerance):
+    arcs = shapely.simplify(shared_arcs(geoms), tolerance, preserve_topology=True)
+
+    # Simplified arcs can cross where they didn't before, so node again
+    noded = shapely.union_all(arcs)
+    faces = shapely.get_parts(shapely.polygonize(shapely.get_parts(noded)))
+    faces = faces[shapely.area(faces) > 0]
+
+    # Which fires each face belongs to: those covering most of it. (A
+    # single interior point isn't enough; faces shift slightly and a point
+    # near the edge of a face can land in a neighbor.)
+    tree = shapely.STRtree(geoms)
+    face_idx, fire_idx = tree.query(faces, predicate='intersects')
+    overlap = shapely.area(shapely.intersection(faces[face_idx], geoms[fire_idx]))
+    inside = overlap > 0.5 * shapely.area(faces[face_idx])
+    face_idx, fire_idx = face_idx[inside], fire_idx[inside]
+
+    out = np.array(geoms, dtype=object, copy=True)
+    shared = np.zeros(len(geoms), dtype=bool)
+    order = np.argsort(fire_idx, kind='stable')
+    fire_idx, face_idx = fire_idx[order], face_idx[order]
+    bounds = np.flatnonzero(np.r_[True, fire_idx[1:] != fire_idx[:-1], True])
+    for s, e in zip(bounds[:-1], bounds[1:]):
+        out[fire_idx[s]] = shapely.coverage_union_all(faces[face_idx[s:e]])
+        shared[fire_idx[s]] = True
+
+    # Anything that lost all its faces is simplified on its own
+    lost = ~shared
+    out[lost] = shapely.simplify(geoms[lost], tolerance, preserve_topology=True)
+    return out, shared
+
+
+# ----------------- simplification_errors -----------------------------
+
+# Per-fire error introduced by snapping/simplification
+
+def simplification_errors(before, after):
+    return {'n_vert': shapely.get_num_coordinates(before).astype(np.float64),
+            'n_vert_simpl': shapely.get_num_coordinates(after).astype(np.float64),
+            'acres': shapely.area(before) * sqm2ac,
+            'acres_simpl': shapely.area(after) * sqm2ac,
+            'area_err_ac': shapely.area(shapely.symmetric_difference(before, after)) * sqm2ac,
+            'perim_m': shapely.length(before),
+            'perim_m_simpl': shapely.length(after),
+            'perim_err_m': np.abs(shapely.length(after) - shapely.length(before)),
+            'max_shift_m': shapely.hausdorff_distance(shapely.boundary(before), shapely.boundary(after))}
+
+
+# ----------------- simplify_perimeters -------------------------------
+
+# Snap (if grid_size) and simplify (if tolerance) a set of perimeters.
+# Returns the new geometries and the error table.
+
+def simplify_perimeters(geoms, grid_size=None, tolerance=None):
+    geoms = np.asarray(geoms, dtype=object)
+    out = geoms
+    if grid_size:
+        out = snap_to_grid(out, grid_size)
+    shared = np.ones(len(geoms), dtype=bool)
+    if tolerance:
+        out, shared = simplify_shared(out, tolerance)
+    errors = simplification_errors(geoms, out)
+    errors['shared'] = shared.astype(np.int64)
+    return out, errors
+
+
+if __name__ == '__main__':
+
+    from perimeter_io import read_perimeters, write_perimeters
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_in = "D:\\projects\\ak_fire\\gis\\data"
+    file_in = "firePerimeters_1940_2016_gt1000ac_notPrescribed.shp"
+
+    # Local variables
+    grid_size = 1.0   # m; None to skip snapping
+    tolerance = 10.0  # m; None to skip simplification
+    # ********************************************************
+
+    name_out = file_in.replace(".shp", "_simplified" + str(int(tolerance or 0)) + "m")
+    fc_in = os.path.join(path_in, file_in)
+
+    ts0 = time.time()
+
+    fires = read_perimeters(fc_in, ['parentid', 'FireName', 'FireYear', 'CalcAcres', 'DiscDate'])
+    print('Simplifying ' + str(len(fires['geometry'])) + ' perimeters...')
+    fires['geometry'], errors = simplify_perimeters(fires['geometry'], grid_size, tolerance)
+    errors['parentid'] = fires['parentid']
+
+    write_perimeters(os.path.join(path_in, name_out + ".shp"), fires,
+                     ['parentid', 'FireName', 'FireYear', 'CalcAcres', 'DiscDate'], fc_in)
+    write_table(os.path.join(path_in, name_out + "_errors.csv"), errors, error_columns)
+
+    print('Vertices: ' + str(int(errors['n_vert'].sum())) + ' -> ' + str(int(errors['n_vert_simpl'].sum())))
+    print('Max area error (ac): ' + str(errors['area_err_ac'].max()))
+    print('Max perimeter error (m): ' + str(errors['perim_err_m'].max()))
+    print('Done! Files written to: ')
+    print(os.path.join(path_in, name_out + ".shp"))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
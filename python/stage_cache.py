@@ -0,0 +1,253 @@
+# ---------------------------------------------------------------------------
+# stage_cache.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Content-addressed cache of pipeline stage outputs, so rerunning a script
+# with one parameter changed (buffer_size, reburn_num, cell size...) only
+# redoes the stages that parameter affects.
+#
+# Each stage result is stored under a key hashed from
+#   - the stage name and cache_version
+#   - the contents of its input files (for a shapefile, all of its
+#     .shp/.shx/.dbf/.prj files; for a directory, such as a geometry
+#     store, every file in it)
+#   - its parameters (anything json can write)
+#   - the source of the code that computes it (modules or .py files)
+# so a rerun with the same inputs, parameters and code finds the stored
+# result whatever the file names or timestamps, and any change to them
+# gives a new key. A stage downstream of another one passes the upstream
+# key as a parameter, so it is invalidated along with it.
+#
+#   cache = StageCache("D:\\projects\\ak_fire\\cache", max_gb=20)
+#   x = cache.run('burn_order', lambda: assign_burn_order(read_table(f)), inputs=[f],
+#                 params={'min_acres': 0.1}, code=[assign_burn_order])
+#   out_dir = cache.run_files('union', run_union, inputs=[pt_file, polys], params={'reburn_num': 2})
+#
+# run() pickles the returned object; run_files() gives the stage function
+# an empty directory to write its files (shapefiles, tables) into and
+# returns that directory.
+#
+# The cache directory holds one subdirectory per entry plus manifest.json,
+# which lists every entry with its stage, parameters, input files, size,
+# and when it was created and last used. When the total size goes over
+# max_gb, the least recently used entries are removed.
+#
+#   python stage_cache.py D:\\projects\\ak_fire\\cache            # list entries
+#   python stage_cache.py D:\\projects\\ak_fire\\cache --clear    # empty the cache
+#
+# Notes:
+# - Pure python, so the arcpy scripts can use it under python 2.7 too
+# - File hashes are remembered in the manifest by path, size and
+#   modification time, so unchanged big inputs are not re-read every run
+# - Entries are written to a temporary directory and renamed into place, so
+#   a run that dies part way never leaves a half-written entry
+# -----------------------------------------------------------------------
+
+from __future__ import print_function, division
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+# Part of every key: bump when the way results are stored changes
+cache_version = 1
+
+# Files that belong with a shapefile
+shapefile_parts = ['.shp', '.shx', '.dbf', '.prj', '.cpg', '.sbn', '.sbx']
+
+
+# ----------------- StageCache ----------------------------------------
+
+class StageCache(object):
+
+    def __init__(self, path, max_gb=20.0):
+        self.path = path
+        self.max_bytes = int(max_gb * 1024 ** 3)
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.manifest_path = os.path.join(path, 'manifest.json')
+        self.manifest = {'entries': {}, 'file_hashes': {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    # Cache key of a stage run
+    def key(self, stage, inputs=(), params=None, code=()):
+        h = hashlib.sha256()
+        h.update((stage + '/' + str(cache_version)).encode('utf-8'))
+        h.update(json.dumps(params or {}, sort_keys=True, default=str).encode('utf-8'))
+        for path in inputs:
+            for part in _input_files(path):
+                h.update(self.file_hash(part).encode('utf-8'))
+        for source in code:
+            h.update(self.file_hash(_source_file(source)).encode('utf-8'))
+        return stage + '_' + h.hexdigest()[:24]
+
+    # sha256 of a file's contents, remembered by path/size/mtime
+    def file_hash(self, path):
+        st = os.stat(path)
+        memo_key = os.path.abspath(path)
+        memo = self.manifest['file_hashes'].get(memo_key)
+        if memo and memo['size'] == st.st_size and memo['mtime'] == st.st_mtime:
+            return memo['sha256']
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        self.manifest['file_hashes'][memo_key] = {'size': st.st_size, 'mtime': st.st_mtime,
+                                                  'sha256': h.hexdigest()}
+        return h.hexdigest()
+
+    # Whether a stage run is in the cache
+    def cached(self, stage, inputs=(), params=None, code=()):
+        key = self.key(stage, inputs, params, code)
+        return key in self.manifest['entries'] and os.path.isdir(os.path.join(self.path, key))
+
+    # Result of compute(), from the cache if there is one
+    def run(self, stage, compute, inputs=(), params=None, code=()):
+        def store(entry_dir):
+            result = compute()
+            with open(os.path.join(entry_dir, 'result.pkl'), 'wb') as f:
+                pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+            return result
+
+        key, hit, result = self._entry(stage, inputs, params, code, store)
+        if hit:
+            with open(os.path.join(self.path, key, 'result.pkl'), 'rb') as f:
+                return pickle.load(f)
+        return result
+
+    # Directory holding the files compute(out_dir) writes, from the cache
+    # if there is one
+    def run_files(self, stage, compute, inputs=(), params=None, code=()):
+        key, _, _ = self._entry(stage, inputs, params, code, compute)
+        return os.path.join(self.path, key)
+
+    # (key, found in cache, store() result if it was not)
+    def _entry(self, stage, inputs, params, code, store):
+        key = self.key(stage, inputs, params, code)
+        entry = self.manifest['entries'].get(key)
+        entry_dir = os.path.join(self.path, key)
+        if entry and os.path.isdir(entry_dir):
+            entry['last_used'] = _now()
+            entry['hits'] += 1
+            self._save()
+            return key, True, None
+
+        tmp_dir = entry_dir + '.tmp'
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        result = store(tmp_dir)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.rename(tmp_dir, entry_dir)
+
+        self.manifest['entries'][key] = {
+            'stage': stage, 'params': json.loads(json.dumps(params or {}, default=str)),
+            'inputs': [os.path.abspath(p) for p in inputs],
+            'code': [os.path.basename(_source_file(c)) for c in code], 'bytes': _dir_size(entry_dir),
+            'created': _now(), 'last_used': _now(), 'hits': 0}
+        self.evict(keep=key)
+        self._save()
+        return key, False, result
+
+    # Remove least recently used entries until the cache fits max_bytes
+    # (never the entry just written)
+    def evict(self, keep=None):
+        entries = self.manifest['entries']
+        total = sum(e['bytes'] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries[key]['bytes']
+            self.remove(key, save=False)
+
+    def remove(self, key, save=True):
+        entry_dir = os.path.join(self.path, key)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        self.manifest['entries'].pop(key, None)
+        if save:
+            self._save()
+
+    def clear(self):
+        for key in list(self.manifest['entries']):
+            self.remove(key, save=False)
+        self._save()
+
+    def entries(self):
+        return sorted(self.manifest['entries'].items(), key=lambda kv: kv[1]['last_used'], reverse=True)
+
+    def _save(self):
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+        os.rename(tmp, self.manifest_path)
+
+
+# ----------------- helpers -------------------------------------------
+
+# The files making up an input: a shapefile's parts, every file under a
+# directory, or the file itself
+def _input_files(path):
+    if os.path.isdir(path):
+        return sorted(os.path.join(root, name) for root, _, files in os.walk(path) for name in files)
+    stem, ext = os.path.splitext(path)
+    if ext.lower() == '.shp':
+        return [p for p in sorted(glob.glob(stem + '.*')) if os.path.splitext(p)[1].lower() in shapefile_parts]
+    return [path]
+
+
+# Source file of a module (or a path given as is)
+def _source_file(source):
+    path = getattr(source, '__file__', source)
+    return path[:-1] if path.endswith('.pyc') else path
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List or clear a stage cache')
+    parser.add_argument('path')
+    parser.add_argument('--clear', action='store_true')
+    args = parser.parse_args(argv)
+
+    cache = StageCache(args.path)
+    if args.clear:
+        cache.clear()
+        print('Cache cleared: ' + args.path)
+        return
+
+    entries = cache.entries()
+    print('%-40s %-20s %10s %5s  %s' % ('key', 'last_used', 'MB', 'hits', 'params'))
+    for key, e in entries:
+        print('%-40s %-20s %10.1f %5d  %s' % (key, e['last_used'][:19], e['bytes'] / 1024.0 ** 2, e['hits'],
+                                              json.dumps(e['params'], sort_keys=True)))
+    print(str(len(entries)) + ' entries, ' +
+          '%.1f MB' % (sum(e['bytes'] for _, e in entries) / 1024.0 ** 2))
+
+
+if __name__ == '__main__':
+    main()
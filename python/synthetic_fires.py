@@ -0,0 +1,196 @@
+# ---------------------------------------------------------------------------
+# synthetic_fires.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Seeded generator of synthetic fire perimeters over the Alaska Albers
+# extent, for benchmarking the pair pipeline at sizes the AICC data can't
+# reach (1k, 10k, 100k fires).
+#
+# Fires are irregular star-shaped polygons with lognormal sizes (all over
+# 1000 ac, like firePerimeters_1940_2016_gt1000ac_notPrescribed). Fires are
+# generated in date order; a share of them are placed on top of an earlier
+# fire, which may itself be a reburn, so multi-generation reburns and chains
+# of overlapping fires occur. The same seed always gives the same fires.
+#
+# Output:
+#
+# 1. <name>_perimeters.npz - WKB perimeters plus parentid, date, acres
+# 2. <name>_processed_x.csv - processed_x-style point table:
+#
+# ptid polyid  acres    date        parentid burn_num
+#   0    0    5123.2  1941-06-28      0        1
+#  ...
+#  812  410    311.9  1950-07-02     205       1
+#  813  410    311.9  1973-06-11     388       2
+#
+# Notes:
+# - polyids in the point table are the pairwise overlaps of fires plus one
+#   per fire for its own area, not a full planar overlay; the pair lists
+#   (burn_num 1 and 2 at each polyid) are exact, higher-order overlaps are
+#   not numbered beyond 2
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import write_table
+
+# Square meter to acres conversion
+sqm2ac = 0.000247105
+
+# Rough extent of Alaska in NAD 1983 Alaska Albers (m): xmin, ymin, xmax, ymax
+ak_albers_extent = (-2200000.0, 400000.0, 1500000.0, 2400000.0)
+
+point_columns = ['ptid', 'polyid', 'acres', 'date', 'parentid', 'burn_num']
+
+
+# ----------------- generate_fires ------------------------------------
+
+# Returns a dict with 'geometry' (shapely polygons), 'parentid', 'date',
+# 'year' and 'acres', all ordered by date.
+#
+# vertices        - vertices per perimeter
+# reburn_fraction - share of fires placed on top of an earlier fire
+# median_acres    - median fire size; sizes are lognormal, floored at 1000 ac
+
+def generate_fires(n_fires, seed=0, vertices=64, reburn_fraction=0.35, median_acres=5000,
+                   start_yr=1940, end_yr=2016, extent=ak_albers_extent):
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = extent
+
+    # Dates, in order
+    years = np.sort(rng.integers(start_yr, end_yr + 1, n_fires))
+    doy = rng.integers(140, 240, n_fires)
+    dates = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]') + doy
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+
+    # Sizes
+    acres = np.maximum(1000.0, median_acres * np.exp(rng.normal(0, 1.0, n_fires)))
+    radius = np.sqrt(acres / sqm2ac / np.pi)
+
+    # Centers. Reburns are offset from an earlier fire by less than the sum
+    # of the two radii, so they (almost always) overlap it.
+    is_reburn = rng.random(n_fires) < reburn_fraction
+    is_reburn[0] = False
+    earlier = np.floor(rng.random(n_fires) * np.arange(n_fires)).astype(np.int64)
+    offset = rng.uniform(0.2, 1.1, n_fires) * radius
+    angle = rng.uniform(0, 2 * np.pi, n_fires)
+    cx = rng.uniform(xmin, xmax, n_fires)
+    cy = rng.uniform(ymin, ymax, n_fires)
+    for i in np.flatnonzero(is_reburn):
+        j = earlier[i]
+        d = offset[i] + radius[j] * rng.uniform(0.0, 0.9)
+        cx[i] = cx[j] + d * np.cos(angle[i])
+        cy[i] = cy[j] + d * np.sin(angle[i])
+
+    # Irregular outlines: radius modulated by a few low harmonics
+    theta = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    r = np.ones((n_fires, vertices))
+    for k in range(2, 6):
+        amp = rng.uniform(0, 0.25 / (k - 1), (n_fires, 1))
+        phase = rng.uniform(0, 2 * np.pi, (n_fires, 1))
+        r = r + amp * np.cos(k * theta + phase)
+    r = np.maximum(r, 0.3) * radius[:, None]
+
+    coords = np.empty((n_fires, vertices + 1, 2))
+    coords[:, :-1, 0] = cx[:, None] + r * np.cos(theta)
+    coords[:, :-1, 1] = cy[:, None] + r * np.sin(theta)
+    coords[:, -1] = coords[:, 0]
+    geoms = shapely.polygons(coords)
+
+    return {'geometry': geoms,
+            'parentid': np.arange(n_fires),
+            'date': dates,
+            'year': years[order].astype(np.float64),
+            'acres': shapely.area(geoms) * sqm2ac}
+
+
+# ----------------- overlapping_pairs ---------------------------------
+
+# All (older, newer) index pairs of fires that overlap, from one STRtree
+# query. Pairs that only touch are dropped.
+
+def overlapping_pairs(geoms, min_area=0.0):
+    tree = shapely.STRtree(geoms)
+    a, b = tree.query(geoms, predicate='intersects')
+    keep = a < b
+    a, b = a[keep], b[keep]
+    overlap = shapely.area(shapely.intersection(geoms[a], geoms[b]))
+    keep = overlap > min_area
+    return a[keep], b[keep], overlap[keep]
+
+
+# ----------------- make_point_table ----------------------------------
+
+# processed_x-style point table for a set of fires (see header)
+
+def make_point_table(fires, min_area=0.0):
+    n = len(fires['geometry'])
+    older, newer, overlap = overlapping_pairs(fires['geometry'], min_area)
+    n_pairs = len(older)
+
+    # One polyid per fire for its own area, one per pairwise overlap
+    polyid = np.concatenate([np.arange(n), np.repeat(n + np.arange(n_pairs), 2)])
+    parentid = np.concatenate([fires['parentid'], np.column_stack([older, newer]).ravel()])
+    burn_num = np.concatenate([np.ones(n), np.tile([1.0, 2.0], n_pairs)])
+    acres = np.concatenate([fires['acres'], np.repeat(overlap * sqm2ac, 2)])
+    date = fires['date'][parentid]
+
+    return {'ptid': np.arange(len(polyid)),
+            'polyid': polyid,
+            'acres': acres,
+            'date': date,
+            'parentid': parentid,
+            'burn_num': burn_num}
+
+
+# ----------------- save_fires / load_fires ---------------------------
+
+def save_fires(path, fires):
+    wkb = shapely.to_wkb(fires['geometry'])
+    lengths = np.array([len(w) for w in wkb], dtype=np.int64)
+    np.savez(path,
+             wkb=np.frombuffer(b''.join(wkb), dtype=np.uint8),
+             wkb_offsets=np.concatenate([[0], np.cumsum(lengths)]),
+             parentid=fires['parentid'], date=fires['date'],
+             year=fires['year'], acres=fires['acres'])
+
+
+def load_fires(path):
+    f = np.load(path)
+    buf, offsets = f['wkb'].tobytes(), f['wkb_offsets']
+    wkb = np.array([buf[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)], dtype=object)
+    return {'geometry': shapely.from_wkb(wkb),
+            'parentid': f['parentid'], 'date': f['date'],
+            'year': f['year'], 'acres': f['acres']}
+
+
+if __name__ == '__main__':
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    path_out = "D:\\projects\\ak_fire\\data\\synthetic"
+
+    # Local variables
+    sizes = [1000, 10000, 100000]  # number of fires
+    seed = 0
+    vertices = 64
+    # ********************************************************
+
+    if not os.path.exists(path_out):
+        os.makedirs(path_out)
+
+    for n_fires in sizes:
+        ts0 = time.time()
+        name = "synthetic_" + str(n_fires) + "_seed" + str(seed)
+        fires = generate_fires(n_fires, seed, vertices)
+        save_fires(os.path.join(path_out, name + "_perimeters.npz"), fires)
+        write_table(os.path.join(path_out, name + "_processed_x.csv"), make_point_table(fires), point_columns)
+        ts1 = time.time()
+        print(name + ' written. Time elapsed: ' + str(ts1 - ts0) + ' seconds')
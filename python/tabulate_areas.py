@@ -0,0 +1,146 @@
+# ---------------------------------------------------------------------------
+# tabulate_areas.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Tiled version of tabulate_ecoregions.py (TabulateArea at 30 m) that runs
+# outside Arc in bounded memory: area of each ecoregion class inside each
+# fire polygon. The zones (fire polygons) and classes (ecoregion polygons)
+# are rasterized one tile at a time (raster_tiles.py) and the cell counts
+# of every zone/class combination are summed over the tiles.
+#
+# Input files:
+#
+# 1.  firePerimeters_1940_2016_individual_polys.shp
+# 2.  akecoregions.shp
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. firePerimeters_1940_2016_akecoregions_lvl1.csv
+# 2. firePerimeters_1940_2016_akecoregions_lvl2.csv
+#
+# FID   <class 1>  <class 2> ...     (area in square meters, like TabulateArea)
+#  11   50009700   0
+#
+# Notes:
+# - Cells are counted where their center falls (raster_grid.polygon_cells),
+#   as with a 30 m TabulateArea
+# - Where class polygons overlap, the one listed last wins
+# -----------------------------------------------------------------------
+
+import time
+
+import numpy as np
+import shapely
+
+from raster_grid import Grid, polygon_cells
+from raster_tiles import run_tiles
+
+
+# ----------------- tabulate_tile -------------------------------------
+
+# Cell counts per (zone, class) in one tile. shared holds 'zones' and
+# 'classes' (geometry arrays) and 'class_codes' (int code of each class
+# polygon, 0..n_codes-1) and 'n_codes'. Returns {'zone', 'code', 'cells'}.
+
+def tabulate_tile(window, shared):
+    if 'zone_tree' not in shared:
+        shared['zone_tree'] = shapely.STRtree(shared['zones'])
+        shared['class_tree'] = shapely.STRtree(shared['classes'])
+    box = shapely.box(*window.bounds)
+    n_codes = shared['n_codes']
+
+    # Class of each cell; n_codes = no class
+    codes = np.full(window.size, n_codes, dtype=np.int32)
+    for k in np.sort(shared['class_tree'].query(box)):
+        codes[polygon_cells(shared['classes'][k], window)] = shared['class_codes'][k]
+
+    zone, code, cells = [], [], []
+    for k in shared['zone_tree'].query(box):
+        counts = np.bincount(codes[polygon_cells(shared['zones'][k], window)], minlength=n_codes + 1)
+        hit = np.flatnonzero(counts[:n_codes])
+        zone.append(np.full(len(hit), k))
+        code.append(hit)
+        cells.append(counts[hit])
+    if not zone:
+        return {'zone': np.empty(0, dtype=np.int64), 'code': np.empty(0, dtype=np.int64),
+                'cells': np.empty(0, dtype=np.int64)}
+    return {'zone': np.concatenate(zone), 'code': np.concatenate(code), 'cells': np.concatenate(cells)}
+
+
+# ----------------- tabulate_areas ------------------------------------
+
+# Area (m2) of each class within each zone, as a (n_zones, n_classes)
+# array, plus the sorted class values (the columns)
+
+def tabulate_areas(zones, classes, class_values, cell_size=30, tile_size=2048, processes=None):
+    zones = np.asarray(zones, dtype=object)
+    classes = np.asarray(classes, dtype=object)
+    values, class_codes = np.unique(np.asarray(class_values).astype(str), return_inverse=True)
+    grid = Grid.from_bounds(shapely.total_bounds(zones), cell_size)
+
+    shared = {'zones': zones, 'classes': classes, 'class_codes': class_codes, 'n_codes': len(values)}
+    _, tiles = run_tiles(tabulate_tile, grid, shared, tile_size=tile_size, processes=processes)
+
+    zone = np.concatenate([t['zone'] for t in tiles])
+    code = np.concatenate([t['code'] for t in tiles])
+    cells = np.concatenate([t['cells'] for t in tiles])
+    counts = np.bincount(zone * len(values) + code, weights=cells, minlength=len(zones) * len(values))
+    return counts.reshape(len(zones), len(values)) * cell_size ** 2, values
+
+
+if __name__ == '__main__':
+
+    from ak_functions import write_table
+    from perimeter_io import read_perimeters
+    import raster_grid
+    import raster_tiles
+    from stage_cache import StageCache
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    polys = "D:\\projects\\ak_fire\\gis\\data\\firePerimeters_1940_2016_individual_polys.shp"
+    akecoregions = "J:\\Base_data\\Boundaries\\ecoregions\\akecoregions.shp"
+    tabAreas_level1 = "D:\\projects\\ak_fire\\gis\\data\\firePerimeters_1940_2016_akecoregions_lvl1.csv"
+    tabAreas_level2 = "D:\\projects\\ak_fire\\gis\\data\\firePerimeters_1940_2016_akecoregions_lvl2.csv"
+    cache_dir = "D:\\projects\\ak_fire\\cache"  # stage_cache.py; None to always recompute
+
+    # Local variables
+    cell_size = 30
+    tile_size = 2048
+    processes = 4
+    # ********************************************************
+
+    ts0 = time.time()
+
+    cache = StageCache(cache_dir) if cache_dir else None
+    shapes = {}
+
+    for level, out_file in [('LEVEL_1', tabAreas_level1), ('LEVEL_2', tabAreas_level2)]:
+        # The perimeters are only read when a level is not in the cache
+        def tabulate():
+            if not shapes:
+                shapes['fires'] = read_perimeters(polys, ['FID'])
+                shapes['eco'] = read_perimeters(akecoregions, ['LEVEL_1', 'LEVEL_2'])
+            fires, eco = shapes['fires'], shapes['eco']
+            areas, values = tabulate_areas(fires['geometry'], eco['geometry'], eco[level], cell_size, tile_size,
+                                           processes)
+            return fires['FID'], areas, values
+        if cache:
+            fid, areas, values = cache.run('tabulate_areas', tabulate, [polys, akecoregions],
+                                           {'level': level, 'cell_size': cell_size},
+                                           code=[__file__, raster_grid, raster_tiles])
+        else:
+            fid, areas, values = tabulate()
+        table = {'FID': fid}
+        columns = ['FID']
+        for j, value in enumerate(values):
+            table[value] = areas[:, j]
+            columns.append(value)
+        write_table(out_file, table, columns)
+        print('Ecoregions ' + level.lower() + ' complete')
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
@@ -0,0 +1,48 @@
+# ---------------------------------------------------------------------------
+# test_partitioned_reburns.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Checks that partitioned_discrete_polygons gives the same faces and fire
+# lists as discrete_polygons on the whole data set.
+#
+#   python -m pytest test_partitioned_reburns.py
+# -----------------------------------------------------------------------
+
+import numpy as np
+import shapely
+
+from partitioned_reburns import discrete_polygons, partitioned_discrete_polygons, polygonal
+
+
+# (fire list, area) of every face, sorted, for comparing face sets
+def _face_areas(faces, offsets, fires):
+    keys = [tuple(fires[offsets[i]:offsets[i + 1]].tolist()) for i in range(len(faces))]
+    return sorted(zip(keys, np.round(shapely.area(faces), 6).tolist()))
+
+
+# An L-shaped fire with an edge on the tile border x = 2 is clipped to a
+# polygon plus a line sliver in the right tile; it must stay in the overlay
+def test_fire_with_edge_on_partition_border():
+    fire0 = shapely.Polygon([(0, 0), (3, 0), (3, 1), (2, 1), (2, 3), (0, 3)])
+    fire1 = shapely.box(1.5, 0.5, 3.5, 2)
+    geoms = np.array([fire0, fire1], dtype=object)
+    tiles = np.array([shapely.box(0, 0, 2, 4), shapely.box(2, 0, 4, 4)], dtype=object)
+
+    whole = discrete_polygons(geoms)
+    parts = partitioned_discrete_polygons(geoms, tiles, processes=1)
+
+    assert np.isclose(shapely.area(parts[0]).sum(), shapely.area(shapely.union_all(geoms)))
+    assert _face_areas(*parts) == _face_areas(*whole)
+
+
+# make_valid of a self-touching perimeter with a spike gives a collection
+# of a polygon and lines; its polygon must still be noded
+def test_geometry_collection_input():
+    spike = shapely.make_valid(shapely.Polygon([(0, 0), (2, 0), (2, 2), (0, 2), (0, 0), (-1, -1), (0, 0)]))
+    assert shapely.get_type_id(spike) == 7
+    assert shapely.get_type_id(polygonal([spike])[0]) == 6
+
+    faces, offsets, fires = discrete_polygons([spike, shapely.box(1, 1, 3, 3)])
+    assert _face_areas(faces, offsets, fires) == [((0,), 3.0), ((0, 1), 1.0), ((1,), 3.0)]
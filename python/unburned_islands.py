@@ -0,0 +1,241 @@
+# ---------------------------------------------------------------------------
+# unburned_islands.py
+#
+# Created on: 2026-10-19
+#
+# Description:
+# Inventory of unburned islands and non-reburned remnants for every fire
+# in the geometry store (geometry_store.py), in place of the Arc
+# intersect/erase output behind intersect_unburned_areas.csv, which was
+# built one fire at a time.
+#
+# Unburned islands are the interior rings (holes) of the fire perimeters.
+# They are read straight from the store's ring arrays: a ring that is not
+# the first ring of its part is a hole. Area and perimeter come from the
+# shoelace formula and segment lengths summed over the ragged coordinates,
+# so no geometries are built for them; only the distance to the edge needs
+# GEOS, and that is one vectorized call for all islands.
+#
+# Non-reburned remnants are, for every pair of overlapping fires, the
+# parts of the older fire outside the newer one: the rows of
+# intersect_unburned_areas.csv. All pairs are found with one STRtree query
+# and differenced in one vectorized call.
+#
+# Input files:
+#
+# 1.  perimeter_store  (geometry_store.py, with 'year' and 'date' attributes)
+#
+# ----------------------------------------------------------
+#  Output:
+#
+# 1. unburned_islands.csv - one row per island
+#
+# islandid parentid year  part  acres   perim_m   edge_dist_m
+#     0      660    1950    0    12.4    1690.2     2210.5
+#
+#    edge_dist_m: distance from the island to the outer edge of the fire
+#    (how far inside the burn it sits)
+#
+# 2. nonreburned_remnants.csv - one row per connected remnant
+#
+# remnantid parentid year newer_parentid newer_year year_int acres perim_m edge_dist_m
+#     0        660   1950     1040         1997       47    812.3  9920.4   1405.7
+#
+#    edge_dist_m: largest distance from a vertex of the remnant to the
+#    newer fire (how far the remnant reaches from the reburn)
+#
+# Notes:
+# - Geometries are assumed to be in a projected coordinate system in meters
+# - 'Older' is decided by date, then by parentid for fires on the same day
+# -----------------------------------------------------------------------
+
+import os
+import time
+
+import numpy as np
+import shapely
+
+from ak_functions import ranges
+
+# Square meters to acres
+sqm2ac = 0.000247105
+
+island_columns = ['islandid', 'parentid', 'year', 'part', 'acres', 'perim_m', 'edge_dist_m']
+remnant_columns = ['remnantid', 'parentid', 'year', 'newer_parentid', 'newer_year', 'year_int',
+                   'acres', 'perim_m', 'edge_dist_m']
+
+
+# ----------------- ring_measures -------------------------------------
+
+# Area (m2, unsigned) and perimeter (m) of every ring of the store
+
+def ring_measures(coords, ring_offsets):
+    coords = np.asarray(coords)
+    ring_offsets = np.asarray(ring_offsets)
+    x, y = coords[:, 0], coords[:, 1]
+    # Rings are closed, so the segment from each vertex to the next never
+    # crosses into the next ring except at the last vertex, which is dropped
+    last = np.zeros(len(coords), dtype=bool)
+    last[ring_offsets[1:] - 1] = True
+    nxt = np.minimum(np.arange(len(coords)) + 1, len(coords) - 1)
+    cross = np.where(last, 0, x * y[nxt] - x[nxt] * y)
+    seg = np.where(last, 0, np.hypot(x[nxt] - x, y[nxt] - y))
+
+    starts = ring_offsets[:-1]
+    cum_cross = np.concatenate([[0], np.cumsum(cross)])
+    cum_seg = np.concatenate([[0], np.cumsum(seg)])
+    area = np.abs(cum_cross[ring_offsets[1:]] - cum_cross[starts]) / 2
+    perim = cum_seg[ring_offsets[1:]] - cum_seg[starts]
+    return area, perim
+
+
+# ----------------- unburned_islands ----------------------------------
+
+# Table of the interior rings of every fire in the store (island_columns),
+# keeping islands of at least min_acres
+
+def unburned_islands(store, min_acres=0):
+    ring_offsets = np.asarray(store.ring_offsets)
+    part_offsets = np.asarray(store.part_offsets)
+    geom_offsets = np.asarray(store.geom_offsets)
+    n_rings = len(ring_offsets) - 1
+
+    # Part of each ring and fire of each part; the first ring of a part is
+    # its exterior
+    ring_part = np.repeat(np.arange(len(part_offsets) - 1), np.diff(part_offsets))
+    part_fire = np.repeat(np.arange(len(geom_offsets) - 1), np.diff(geom_offsets))
+    is_hole = np.ones(n_rings, dtype=bool)
+    is_hole[part_offsets[:-1][np.diff(part_offsets) > 0]] = False
+
+    area, perim = ring_measures(store.coords_array, ring_offsets)
+    holes = np.flatnonzero(is_hole & (area > 0) & (area * sqm2ac >= min_acres))
+    parts = ring_part[holes]
+    fires = part_fire[parts]
+
+    # Island polygons and the outer ring of the part they are in
+    c0, c1 = ring_offsets[holes], ring_offsets[holes + 1]
+    hole_coords = np.asarray(store.coords_array)[ranges(c0, c1)]
+    islands = shapely.from_ragged_array(
+        shapely.GeometryType.POLYGON, hole_coords,
+        (np.concatenate([[0], np.cumsum(c1 - c0)]), np.arange(len(holes) + 1)))
+    outer = part_offsets[parts]
+    e0, e1 = ring_offsets[outer], ring_offsets[outer + 1]
+    shell_coords = np.asarray(store.coords_array)[ranges(e0, e1)]
+    shells = shapely.from_ragged_array(
+        shapely.GeometryType.LINESTRING, shell_coords, (np.concatenate([[0], np.cumsum(e1 - e0)]),))
+    edge_dist = shapely.distance(islands, shells) if len(holes) else np.empty(0)
+
+    out = {'islandid': np.arange(len(holes)),
+           'parentid': np.asarray(store.ids)[fires],
+           'year': _attribute(store, 'year', fires),
+           'part': parts - geom_offsets[fires],
+           'acres': area[holes] * sqm2ac,
+           'perim_m': perim[holes],
+           'edge_dist_m': edge_dist}
+    return dict((k, v) for k, v in out.items() if v is not None)
+
+
+# ----------------- overlapping_pairs ---------------------------------
+
+# (older, newer) store positions of every pair of fires whose interiors
+# overlap, from one STRtree query
+
+def overlapping_pairs(geoms, dates, ids):
+    a, b = shapely.STRtree(geoms).query(geoms, predicate='intersects')
+    keep = a < b
+    a, b = a[keep], b[keep]
+    overlap = shapely.area(shapely.intersection(geoms[a], geoms[b])) > 0
+    a, b = a[overlap], b[overlap]
+    swap = (dates[b] < dates[a]) | ((dates[b] == dates[a]) & (ids[b] < ids[a]))
+    older, newer = np.where(swap, b, a), np.where(swap, a, b)
+    order = np.lexsort((newer, older))
+    return older[order], newer[order]
+
+
+# ----------------- nonreburned_remnants ------------------------------
+
+# Table of the parts of each older fire outside each newer fire that
+# overlaps it (remnant_columns), keeping remnants of at least min_acres
+
+def nonreburned_remnants(store, min_acres=0):
+    geoms = shapely.make_valid(store.geometries_at())
+    ids = np.asarray(store.ids)
+    dates = _attribute(store, 'date', np.arange(len(ids)))
+    years = _attribute(store, 'year', np.arange(len(ids)))
+    older, newer = overlapping_pairs(geoms, dates if dates is not None else years, ids)
+
+    remnants = shapely.difference(geoms[older], geoms[newer])
+    pieces, pair = shapely.get_parts(remnants, return_index=True)
+    poly = shapely.get_type_id(pieces) == 3
+    pieces, pair = pieces[poly], pair[poly]
+    area = shapely.area(pieces)
+    keep = (area > 0) & (area * sqm2ac >= min_acres)
+    pieces, pair, area = pieces[keep], pair[keep], area[keep]
+
+    o, n = older[pair], newer[pair]
+    out = {'remnantid': np.arange(len(pieces)),
+           'parentid': ids[o],
+           'year': years[o] if years is not None else None,
+           'newer_parentid': ids[n],
+           'newer_year': years[n] if years is not None else None,
+           'year_int': years[n] - years[o] if years is not None else None,
+           'acres': area * sqm2ac,
+           'perim_m': shapely.length(pieces),
+           'edge_dist_m': farthest_vertex_distance(pieces, geoms[n])}
+    return dict((k, v) for k, v in out.items() if v is not None)
+
+
+# Largest distance from any vertex of each geometry to the matching other
+# geometry, in one vectorized call over all vertices
+
+def farthest_vertex_distance(geoms, others):
+    coords, idx = shapely.get_coordinates(geoms, return_index=True)
+    dist = shapely.distance(shapely.points(coords), others[idx])
+    out = np.zeros(len(geoms))
+    np.maximum.at(out, idx, dist)
+    return out
+
+
+def _attribute(store, name, idx):
+    if name not in store.attributes:
+        return None
+    return np.asarray(store.attributes[name])[idx]
+
+
+if __name__ == '__main__':
+
+    from ak_functions import write_table
+    from geometry_store import GeometryStore
+
+    # ********  INPUT REQUIRED HERE **************************
+    # Paths
+    store_path = "D:\\projects\\ak_fire\\data\\perimeter_store"  # geometry_store.py
+    path_out = "D:\\projects\\ak_fire\\data\\tables"
+    islands_out = "unburned_islands.csv"
+    remnants_out = "nonreburned_remnants.csv"
+
+    # Local variables
+    min_island_acres = 0
+    min_remnant_acres = 1  # process_intersected_pairs_shape_indices.R drops noburn_ac <= 1
+    # ********************************************************
+
+    ts0 = time.time()
+
+    store = GeometryStore.open(store_path)
+
+    islands = unburned_islands(store, min_island_acres)
+    write_table(os.path.join(path_out, islands_out), islands,
+                [c for c in island_columns if c in islands])
+    print('Unburned islands: ' + str(len(islands['islandid'])))
+
+    remnants = nonreburned_remnants(store, min_remnant_acres)
+    write_table(os.path.join(path_out, remnants_out), remnants,
+                [c for c in remnant_columns if c in remnants])
+    print('Non-reburned remnants: ' + str(len(remnants['remnantid'])))
+
+    print('Done! Files written to: ')
+    print(os.path.join(path_out, islands_out))
+    print(os.path.join(path_out, remnants_out))
+
+    ts1 = time.time()
+    print('Time elapsed: ' + str(ts1 - ts0) + ' seconds')
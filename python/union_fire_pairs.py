@@ -73,6 +73,7 @@
 # Import arcpy module
 import arcpy, os, time
 from arcpy import env
+from pair_telemetry import PairTelemetry, arc_vertex_count
 
 # Set to overwrite
 arcpy.env.overwriteOutput = True
@@ -87,6 +88,7 @@ ws = os.path.join(arcpy.env.workspace, "temp")
 reburn_num = 2  # reburn number of interest (will look for this and n-1)
 filename_add = "_allfids"  # tag for filename
 out_shp_name = "union_burn" + str(reburn_num) + "_" + filename_add + ".shp"
+telemetry_name = "union_burn" + str(reburn_num) + "_" + filename_add + "_telemetry.jsonl"
 # ********************************************************
 
 pt_file = "processed_x.shp"
@@ -115,8 +117,9 @@ tbl_list = []
 # initialize counter
 n_poly = 0
 
-# start the clock
+# start the clock; per-stage and per-pair times go to the telemetry log
 ts0 = time.time()
+telemetry = PairTelemetry(os.path.join(ws, telemetry_name))
 
 # step through all rows in the POINTS layer
 for row in cursor:
@@ -149,17 +152,25 @@ for row in cursor:
             # Get the union of the two burns. This will produce separate polygons
             # for the overlapping as well as non-overlapping portions.
                 print 'Unioning polygons...'
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_prior_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/prior_fc")
-                arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_curr_poly)
-                arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/curr_fc")
+                telemetry.start_pair(n_poly, prior_parent_id, curr_parent_id)
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_prior_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/prior_fc")
+                with telemetry.stage('select'):
+                    arcpy.SelectLayerByAttribute_management("orig_polys_lyr", "NEW_SELECTION", sql_curr_poly)
+                with telemetry.stage('copy'):
+                    arcpy.CopyFeatures_management("orig_polys_lyr", "in_memory/curr_fc")
+                telemetry.add_vertices(arc_vertex_count("in_memory/prior_fc") + arc_vertex_count("in_memory/curr_fc"))
 
                 union_poly = os.path.join(ws, "union_poly" + str(n_poly) + ".shp")
-                arcpy.Union_analysis(["in_memory/prior_fc", "in_memory/curr_fc"], union_poly, "ALL")
+                with telemetry.stage('union'):
+                    arcpy.Union_analysis(["in_memory/prior_fc", "in_memory/curr_fc"], union_poly, "ALL")
 
             # Add field to identify associated polygons -- no way to link them otherwise
-                arcpy.AddField_management(union_poly, "pairid", "SHORT", "6")
-                arcpy.CalculateField_management(union_poly, "pairid", "\"" + str(n_poly) + "\"", "PYTHON")
+                with telemetry.stage('write'):
+                    arcpy.AddField_management(union_poly, "pairid", "SHORT", "6")
+                    arcpy.CalculateField_management(union_poly, "pairid", "\"" + str(n_poly) + "\"", "PYTHON")
 
                # add the output polygon/table to the list
                 print 'Appending files...'
@@ -168,12 +179,14 @@ for row in cursor:
                 # clean up
                 print 'Deleting memory...'
                 arcpy.Delete_management('in_memory')
+                telemetry.end_pair()
 
-    except:
+    except Exception as e:
         print ' ** Could not save polygon ' + str(poly_id)
         ts1 = time.time()
         print 'Time elapsed is: ' + str(ts1 - ts0)
         print arcpy.GetMessages()
+        telemetry.fail_pair(arcpy.GetMessages(2) or e)
         continue
 
 
@@ -207,5 +220,9 @@ print os.path.join(ws, out_shp_name)
 ts1 = time.time()
 print 'Time elapsed: ' + str(ts1 - ts0) + ' seconds'
 
+telemetry.print_summary()
+telemetry.close()
+print 'Telemetry written to: ' + os.path.join(ws, telemetry_name)
+
 
 